@@ -0,0 +1,42 @@
+"""Add avatar video cache
+
+Revision ID: 3f1c2a9d7e54
+Revises: ccab3c4d4db9
+Create Date: 2026-10-18 09:12:41.203118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7e54'
+down_revision: Union[str, None] = 'ccab3c4d4db9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'avatar_video_cache',
+        sa.Column('cache_key', sa.String(length=64), primary_key=True),
+        sa.Column('talk_id', sa.String(), nullable=True),
+        sa.Column('video_url', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False, server_default='processing'),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()'))
+    )
+    op.create_index('ix_avatar_video_cache_talk_id', 'avatar_video_cache', ['talk_id'])
+
+    op.add_column('questions', sa.Column('avatar_cache_key', sa.String(length=64), nullable=True))
+    op.create_index('ix_questions_avatar_cache_key', 'questions', ['avatar_cache_key'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_questions_avatar_cache_key', 'questions')
+    op.drop_column('questions', 'avatar_cache_key')
+    op.drop_index('ix_avatar_video_cache_talk_id', 'avatar_video_cache')
+    op.drop_table('avatar_video_cache')
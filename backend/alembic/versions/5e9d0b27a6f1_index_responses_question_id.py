@@ -0,0 +1,26 @@
+"""Index responses by question
+
+Revision ID: 5e9d0b27a6f1
+Revises: d41a7c93b2e8
+Create Date: 2026-10-18 12:02:44.190367
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9d0b27a6f1'
+down_revision: Union[str, None] = 'd41a7c93b2e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_responses_question_id', 'responses', ['question_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_responses_question_id', 'responses')
@@ -0,0 +1,31 @@
+"""Add partial index on processing avatar videos
+
+Revision ID: 8b2e4f61c0a3
+Revises: 3f1c2a9d7e54
+Create Date: 2026-10-18 10:03:17.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4f61c0a3'
+down_revision: Union[str, None] = '3f1c2a9d7e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_questions_avatar_processing',
+        'questions',
+        ['avatar_video_id'],
+        postgresql_where=sa.text("avatar_video_status = 'processing'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_questions_avatar_processing', 'questions')
@@ -0,0 +1,46 @@
+"""Add processing state to responses
+
+Revision ID: a7c3e5f9d218
+Revises: 5e9d0b27a6f1
+Create Date: 2026-10-18 13:15:52.664029
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e5f9d218'
+down_revision: Union[str, None] = '5e9d0b27a6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('responses', sa.Column('status', sa.String(), nullable=False, server_default='pending'))
+    op.add_column('responses', sa.Column('error', sa.Text(), nullable=True))
+    op.add_column('responses', sa.Column('source_path', sa.String(), nullable=True))
+    op.add_column('responses', sa.Column('processing_metadata', postgresql.JSONB(), nullable=True))
+    op.add_column('responses', sa.Column('processing_started_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('responses', sa.Column('transcribing_started_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('responses', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('responses', sa.Column('failed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_responses_status', 'responses', ['status'])
+
+    # Responses created before the pipeline were processed inside the request
+    op.execute("UPDATE responses SET status = 'completed', completed_at = updated_at")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_responses_status', 'responses')
+    op.drop_column('responses', 'failed_at')
+    op.drop_column('responses', 'completed_at')
+    op.drop_column('responses', 'transcribing_started_at')
+    op.drop_column('responses', 'processing_started_at')
+    op.drop_column('responses', 'processing_metadata')
+    op.drop_column('responses', 'source_path')
+    op.drop_column('responses', 'error')
+    op.drop_column('responses', 'status')
@@ -0,0 +1,43 @@
+"""Add transcript segments table
+
+Revision ID: a94d1e7c3b28
+Revises: f5a2c8e4b716
+Create Date: 2026-10-18 17:21:05.664190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a94d1e7c3b28'
+down_revision: Union[str, None] = 'f5a2c8e4b716'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'transcript_segments',
+        sa.Column('response_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('start_ms', sa.Integer(), nullable=False),
+        sa.Column('end_ms', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('words', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(['response_id'], ['responses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('response_id', 'seq')
+    )
+    op.create_index(
+        'ix_transcript_segments_response_start',
+        'transcript_segments',
+        ['response_id', 'start_ms']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transcript_segments_response_start', 'transcript_segments')
+    op.drop_table('transcript_segments')
@@ -0,0 +1,51 @@
+"""Add full-text and trigram search over transcripts
+
+Revision ID: b1f7d3a9c540
+Revises: a94d1e7c3b28
+Create Date: 2026-10-18 18:04:39.120873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1f7d3a9c540'
+down_revision: Union[str, None] = 'a94d1e7c3b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Generated column: Postgres keeps it in step with transcription on every write
+    op.add_column(
+        'responses',
+        sa.Column(
+            'transcription_tsv',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', coalesce(transcription, ''))", persisted=True)
+        )
+    )
+    op.create_index(
+        'ix_responses_transcription_tsv',
+        'responses',
+        ['transcription_tsv'],
+        postgresql_using='gin'
+    )
+    op.create_index(
+        'ix_responses_transcription_trgm',
+        'responses',
+        ['transcription'],
+        postgresql_using='gin',
+        postgresql_ops={'transcription': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_responses_transcription_trgm', 'responses')
+    op.drop_index('ix_responses_transcription_tsv', 'responses')
+    op.drop_column('responses', 'transcription_tsv')
@@ -0,0 +1,37 @@
+"""Add transcription cache
+
+Revision ID: c6e8a2f4d193
+Revises: b1f7d3a9c540
+Create Date: 2026-10-18 18:47:12.509316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e8a2f4d193'
+down_revision: Union[str, None] = 'b1f7d3a9c540'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'transcription_cache',
+        sa.Column('fingerprint', sa.String(length=64), primary_key=True),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()'))
+    )
+    op.create_index('ix_transcription_cache_last_used_at', 'transcription_cache', ['last_used_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transcription_cache_last_used_at', 'transcription_cache')
+    op.drop_table('transcription_cache')
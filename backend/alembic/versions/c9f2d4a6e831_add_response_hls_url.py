@@ -0,0 +1,26 @@
+"""Add HLS playlist URL to responses
+
+Revision ID: c9f2d4a6e831
+Revises: a7c3e5f9d218
+Create Date: 2026-10-18 14:02:37.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f2d4a6e831'
+down_revision: Union[str, None] = 'a7c3e5f9d218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('responses', sa.Column('hls_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('responses', 'hls_url')
@@ -0,0 +1,26 @@
+"""Add storage key to avatar video cache
+
+Revision ID: d41a7c93b2e8
+Revises: 8b2e4f61c0a3
+Create Date: 2026-10-18 11:26:05.817440
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c93b2e8'
+down_revision: Union[str, None] = '8b2e4f61c0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('avatar_video_cache', sa.Column('storage_key', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('avatar_video_cache', 'storage_key')
@@ -0,0 +1,30 @@
+"""Add preview image URLs to responses
+
+Revision ID: e3b7a1c5d902
+Revises: c9f2d4a6e831
+Create Date: 2026-10-18 14:36:11.902457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b7a1c5d902'
+down_revision: Union[str, None] = 'c9f2d4a6e831'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('responses', sa.Column('poster_url', sa.String(), nullable=True))
+    op.add_column('responses', sa.Column('thumbnail_url', sa.String(), nullable=True))
+    op.add_column('responses', sa.Column('sprite_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('responses', 'sprite_url')
+    op.drop_column('responses', 'thumbnail_url')
+    op.drop_column('responses', 'poster_url')
@@ -0,0 +1,38 @@
+"""Add probed media properties to responses
+
+Revision ID: f5a2c8e4b716
+Revises: e3b7a1c5d902
+Create Date: 2026-10-18 16:02:47.318504
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a2c8e4b716'
+down_revision: Union[str, None] = 'e3b7a1c5d902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('responses', sa.Column('duration_seconds', sa.Float(), nullable=True))
+    op.add_column('responses', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('responses', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('responses', sa.Column('video_codec', sa.String(), nullable=True))
+    op.add_column('responses', sa.Column('audio_codec', sa.String(), nullable=True))
+    op.add_column('responses', sa.Column('audio_channels', sa.Integer(), nullable=True))
+    op.add_column('responses', sa.Column('bit_rate', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('responses', 'bit_rate')
+    op.drop_column('responses', 'audio_channels')
+    op.drop_column('responses', 'audio_codec')
+    op.drop_column('responses', 'video_codec')
+    op.drop_column('responses', 'height')
+    op.drop_column('responses', 'width')
+    op.drop_column('responses', 'duration_seconds')
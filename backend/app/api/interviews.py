@@ -1,20 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, Request, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, exists
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from ..db.session import get_async_db
+from ..db.session import get_async_db, async_session
 from ..db import models
 from ..schemas.interview import (
     InterviewCreate,
     InterviewResponse,
     InterviewUpdate,
     InterviewDetail,
-    InterviewStatus
+    InterviewStatus,
+    InterviewManifest,
+    ManifestItem
 )
 from ..schemas.question import QuestionCreate, QuestionResponse
 from ..core.security import generate_interview_url, create_access_token, verify_interview_token
 from ..services.did_service import DIDService
+from ..services.avatar_cache import AvatarCacheService
+from ..services.avatar_mirror import avatar_mirror
+from ..services.avatar_scheduler import avatar_scheduler, PRIORITY_CANDIDATE, PRIORITY_ADMIN
+from .webhooks import get_did_webhook_url
 from ..core.config import settings
 import uuid
 from datetime import datetime, UTC, timedelta
@@ -31,14 +37,21 @@ class QuestionText(BaseModel):
 
 router = APIRouter(prefix="/interviews", tags=["interviews"])
 did_service = DIDService()
+avatar_cache = AvatarCacheService()
 
-# Move token endpoint to the top with a more specific path
-@router.get("/by-token/{token}", response_model=InterviewDetail)
-async def get_interview_by_token(
-    token: str,
-    db: AsyncSession = Depends(get_async_db)
-):
-    """Get interview by JWT token"""
+def get_avatar_cache_key(text: str, voice_id: Optional[str]) -> str:
+    """Cache key for the inputs actually sent to D-ID for a question"""
+    # voice_style is not forwarded to D-ID yet (see generate_avatar_video),
+    # so it must not split the cache either
+    return avatar_cache.compute_key(
+        text=text,
+        voice_id=voice_id,
+        voice_style=None,
+        source_url=did_service.default_source_url
+    )
+
+def get_interview_id_from_token(token: str) -> uuid.UUID:
+    """Verify a candidate token and return the interview ID it grants access to"""
     logger.debug(f"Attempting to verify token: {token}")
     interview_id = verify_interview_token(token)
     if not interview_id:
@@ -52,6 +65,17 @@ async def get_interview_by_token(
         logger.error(f"Invalid UUID format: {interview_id}")
         raise HTTPException(status_code=400, detail="Invalid interview ID format")
     
+    return interview_uuid
+
+# Move token endpoint to the top with a more specific path
+@router.get("/by-token/{token}", response_model=InterviewDetail)
+async def get_interview_by_token(
+    token: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get interview by JWT token"""
+    interview_uuid = get_interview_id_from_token(token)
+    
     result = await db.execute(
         select(models.Interview)
         .options(
@@ -69,17 +93,81 @@ async def get_interview_by_token(
     logger.debug(f"Successfully found interview: {interview.id}")
     return interview
 
+@router.get("/by-token/{token}/manifest", response_model=InterviewManifest)
+async def get_interview_manifest(
+    token: str,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Compact session manifest: ordered avatar URLs, readiness, the next
+    question and which videos to prefetch while the candidate answers"""
+    interview_uuid = get_interview_id_from_token(token)
+    
+    interview_status = (await db.execute(
+        select(models.Interview.status).where(models.Interview.id == interview_uuid)
+    )).scalar_one_or_none()
+    if interview_status is None:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    
+    answered = exists().where(models.Response.question_id == models.Question.id)
+    result = await db.execute(
+        select(
+            models.Question.id,
+            models.Question.order_number,
+            models.Question.text,
+            models.Question.avatar_video_url,
+            models.Question.avatar_video_status,
+            answered.label("answered")
+        )
+        .where(models.Question.interview_id == interview_uuid)
+        .order_by(models.Question.order_number)
+    )
+    
+    items = [
+        ManifestItem(
+            question_id=row.id,
+            order_number=row.order_number,
+            text=row.text,
+            avatar_video_url=row.avatar_video_url,
+            avatar_video_status=row.avatar_video_status or "pending",
+            ready=row.avatar_video_status == "completed" and bool(row.avatar_video_url),
+            answered=row.answered
+        )
+        for row in result.all()
+    ]
+    
+    next_index = next((i for i, item in enumerate(items) if not item.answered), None)
+    preload = []
+    if next_index is not None:
+        upcoming = items[next_index:next_index + settings.AVATAR_PRELOAD_AHEAD]
+        preload = [item.avatar_video_url for item in upcoming if item.ready]
+    
+    # Readiness changes as renders finish; preload hints let the browser start early
+    response.headers["Cache-Control"] = "no-store"
+    if preload:
+        response.headers["Link"] = ", ".join(f"<{url}>; rel=preload; as=video" for url in preload)
+    
+    return InterviewManifest(
+        interview_id=interview_uuid,
+        status=interview_status,
+        next_question_index=next_index,
+        items=items,
+        preload=preload
+    )
+
 async def generate_avatar_video(
     question_id: uuid.UUID,
     text: str,
     voice_id: str,
     voice_style: Optional[str],
-    db: AsyncSession,
-    max_retries: int = 3,
-    retry_delay: int = 5
+    use_cache: bool = True
 ):
-    """Background task to generate avatar video for a question with retry logic"""
-    try:
+    """Scheduler job to generate the avatar video for a question.
+
+    Runs in its own database session. Errors propagate to the scheduler,
+    which retries retryable ones and calls mark_avatar_error otherwise.
+    """
+    async with async_session() as db:
         # Get the question
         result = await db.execute(
             select(models.Question).where(models.Question.id == question_id)
@@ -89,53 +177,126 @@ async def generate_avatar_video(
         if not question:
             logger.error(f"Question {question_id} not found")
             return
+        # A startup requeue may race a job that already picked this question up
+        if question.avatar_video_status != "pending":
+            logger.info(f"Avatar for question {question_id} already {question.avatar_video_status}")
+            return
         
         logger.info(f"Generating avatar video for question {question_id}")
         logger.info(f"Text: {text}")
         logger.info(f"Voice ID: {voice_id}")
         logger.info(f"Voice Style: {voice_style}")
         
+        cache_key = get_avatar_cache_key(text, voice_id)
+        
+        # Another interview may have rendered (or be rendering) the same video
+        if use_cache:
+            cached = await avatar_cache.lookup(db, cache_key)
+            if cached:
+                await avatar_cache.attach(db, question, cached)
+                await db.commit()
+                return
+        
         # Create avatar video
         talk_id = await did_service.create_avatar_video(
             text=text,
             voice_id=voice_id,
-            voice_style=None  # Temporarily disable voice style
+            voice_style=None,  # Temporarily disable voice style
+            webhook_url=get_did_webhook_url(question_id)
         )
         
         # Update question with talk ID and status
         question.avatar_video_id = talk_id
         question.avatar_video_status = "processing"
+        question.avatar_cache_key = cache_key
+        question.updated_at = datetime.now(UTC)
+        await avatar_cache.register_render(db, cache_key, talk_id)
         await db.commit()
         
-        # Initial check for video URL
-        video_url = await did_service.get_video_url(talk_id)
+        # Initial check for video URL; the webhook or reconciler picks up anything later
+        try:
+            video_url = await did_service.get_video_url(talk_id, max_retries=1)
+        except Exception as e:
+            logger.warning(f"Initial status check failed for talk {talk_id}: {str(e)}")
+            video_url = None
         
         if video_url:
             question.avatar_video_url = video_url
             question.avatar_video_status = "completed"
+            await avatar_cache.complete(db, talk_id, video_url)
             await db.commit()
+            avatar_mirror.schedule(talk_id, video_url)
             logger.info(f"Successfully generated avatar video for question {question_id}")
             return
         
         logger.info(f"Video processing initiated for question {question_id}")
-        return
-            
+
+async def mark_avatar_error(
+    question_id: uuid.UUID,
+    *args,
+    error: Exception,
+    **kwargs
+):
+    """Record a permanently failed avatar generation on the question"""
+    async with async_session() as db:
+        question = await db.get(models.Question, question_id)
+        if not question:
+            return
+        
+        question.avatar_video_status = "error"
+        question.avatar_video_error = str(error)
+        question.updated_at = datetime.now(UTC)
+        if question.avatar_video_id:
+            await avatar_cache.fail(db, question.avatar_video_id)
+        await db.commit()
+
+async def requeue_pending_avatars() -> int:
+    """Resubmit avatar jobs a previous run queued but never finished; called on startup.
+
+    The scheduler's queue and retry timers live in memory, so questions it
+    dropped on shutdown are still pending and nothing else picks them up.
+    """
+    try:
+        async with async_session() as db:
+            result = await db.execute(
+                select(
+                    models.Question.id,
+                    models.Question.text,
+                    models.Question.voice_id,
+                    models.Question.voice_style
+                )
+                .where(models.Question.avatar_video_status == "pending")
+                .order_by(models.Question.created_at)
+            )
+            rows = result.all()
     except Exception as e:
-        logger.error(f"Error generating avatar video: {str(e)}")
-        if question:
-            question.avatar_video_status = "error"
-            question.avatar_video_error = str(e)
-            await db.commit()
+        logger.error(f"Failed to requeue pending avatar videos: {str(e)}")
+        return 0
+
+    for row in rows:
+        avatar_scheduler.submit(
+            generate_avatar_video,
+            row.id,
+            row.text,
+            row.voice_id or "en-US-JennyNeural",
+            row.voice_style,
+            priority=PRIORITY_CANDIDATE,
+            on_failure=mark_avatar_error
+        )
+    if rows:
+        logger.info(f"Requeued {len(rows)} pending avatar videos")
+    return len(rows)
 
 @router.post("/", response_model=InterviewResponse)
 async def create_interview(
     request: Request,
     questions: List[QuestionText],
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new interview session with questions and generate a unique URL"""
     try:
+        avatar_jobs = []
+
         # Generate a unique ID for the interview
         interview_id = uuid.uuid4()
         
@@ -166,18 +327,25 @@ async def create_interview(
             db.add(question)
             await db.flush()
             
-            # Schedule avatar video generation
-            background_tasks.add_task(
-                generate_avatar_video,
-                question.id,
-                q.text,
-                q.voice_id,
-                q.voice_style,
-                db
-            )
+            # Reuse a render shared with other interviews when one exists
+            cached = await avatar_cache.lookup(db, get_avatar_cache_key(q.text, q.voice_id))
+            if cached:
+                await avatar_cache.attach(db, question, cached)
+                continue
+            
+            avatar_jobs.append((question.id, q.text, q.voice_id, q.voice_style))
 
         await db.commit()
         
+        # Schedule avatar video generation once the questions are visible to the jobs
+        for job_args in avatar_jobs:
+            avatar_scheduler.submit(
+                generate_avatar_video,
+                *job_args,
+                priority=PRIORITY_CANDIDATE,
+                on_failure=mark_avatar_error
+            )
+        
         # Load relationships for response
         result = await db.execute(
             select(models.Interview)
@@ -356,6 +524,7 @@ async def get_question_avatar_status(
     db: AsyncSession = Depends(get_async_db)
 ):
     """Get the status of avatar video generation for a question"""
+    # Pure database read: processing videos are resolved by the background reconciler
     result = await db.execute(
         select(models.Question).where(models.Question.id == question_id)
     )
@@ -364,17 +533,6 @@ async def get_question_avatar_status(
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
-    # If the video is still processing, check its status
-    if question.avatar_video_status == "processing" and question.avatar_video_id:
-        try:
-            video_url = await did_service.get_video_url(question.avatar_video_id)
-            if video_url:
-                question.avatar_video_url = video_url
-                question.avatar_video_status = "completed"
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Error checking video status: {str(e)}")
-    
     return {
         "status": question.avatar_video_status,
         "video_url": question.avatar_video_url,
@@ -384,7 +542,6 @@ async def get_question_avatar_status(
 @router.post("/questions/{question_id}/regenerate-avatar")
 async def regenerate_question_avatar(
     question_id: uuid.UUID,
-    background_tasks: BackgroundTasks,
     voice_id: Optional[str] = None,
     voice_style: Optional[str] = None,
     db: AsyncSession = Depends(get_async_db)
@@ -399,20 +556,24 @@ async def regenerate_question_avatar(
         raise HTTPException(status_code=404, detail="Question not found")
     
     # Reset avatar video fields
+    await avatar_cache.release(db, question.avatar_cache_key)
+    question.avatar_cache_key = None
     question.avatar_video_url = None
     question.avatar_video_id = None
     question.avatar_video_status = "pending"
     question.avatar_video_error = None
     await db.commit()
     
-    # Schedule new avatar video generation
-    background_tasks.add_task(
+    # Schedule new avatar video generation behind candidate-facing work
+    avatar_scheduler.submit(
         generate_avatar_video,
         question.id,
         question.text,
         voice_id or question.voice_id or "en-US-JennyNeural",
         voice_style,
-        db
+        use_cache=False,
+        priority=PRIORITY_ADMIN,
+        on_failure=mark_avatar_error
     )
     
     return {"status": "regeneration_scheduled"}
\ No newline at end of file
@@ -0,0 +1,152 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse, RedirectResponse
+from typing import Optional, Tuple, Callable
+from ..core.config import settings
+from ..services.storage import StorageService
+import aiofiles
+import mimetypes
+import logging
+import re
+
+router = APIRouter(prefix="/media", tags=["media"])
+logger = logging.getLogger(__name__)
+
+storage_service = StorageService()
+
+CHUNK_SIZE = 256 * 1024
+
+# Mirrored avatar videos are the same for everyone and may sit in shared caches;
+# candidate recordings must only ever be cached by the browser that fetched them
+PUBLIC_PREFIXES = ("avatars/",)
+PRIVATE_PREFIXES = ("recordings/",)
+
+def cache_control_for(key: str) -> Optional[str]:
+    """Cache-Control for a servable key, None for keys the route doesn't serve"""
+    if key.startswith(PUBLIC_PREFIXES):
+        return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+    if key.startswith(PRIVATE_PREFIXES):
+        return f"private, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+    return None
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into inclusive (start, end) offsets.
+
+    Returns None when the whole file should be sent (no header, or a
+    multi-range request we choose not to support) and raises 416 when the
+    range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    start_str, _, end_str = spec.partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise ValueError
+            start = max(size - length, 0)
+            end = size - 1
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Invalid range", headers={"Content-Range": f"bytes */{size}"})
+
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+
+    return start, end
+
+HLS_URI_ATTRIBUTE = re.compile(r'URI="([^"]+)"')
+
+def rewrite_hls_playlist(playlist: str, resolve: Callable[[str], str]) -> str:
+    """Replace the relative URIs of a media playlist with resolve(uri).
+
+    Stored playlists reference their segments by file name; behind S3 each
+    segment needs its own presigned URL, so they can't be resolved relative
+    to the playlist.
+    """
+    lines = []
+    for line in playlist.splitlines():
+        if line.startswith("#"):
+            line = HLS_URI_ATTRIBUTE.sub(lambda m: f'URI="{resolve(m.group(1))}"', line)
+        elif line.strip():
+            line = resolve(line.strip())
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+async def _iter_file(path, start: int, length: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"])
+async def get_media(key: str, request: Request):
+    """Serve an avatar or recording with HTTP Range support and long-lived caching"""
+    cache_control = cache_control_for(key)
+    if cache_control is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if not storage_service.is_local:
+        # S3 serves Range requests itself; hand out a fresh presigned URL
+        url = storage_service.generate_presigned_url(key)
+        return RedirectResponse(
+            url,
+            status_code=307,
+            headers={"Cache-Control": f"private, max-age={storage_service.default_expiry // 2}"}
+        )
+
+    path = storage_service.local_path(key)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+
+    stat = path.stat()
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "ETag": etag
+    }
+    media_type = mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == etag:
+        byte_range = parse_range_header(request.headers.get("range"), size)
+
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        start, end = 0, size - 1
+        status_code = 200
+
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    return StreamingResponse(
+        _iter_file(path, start, length),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type
+    )
@@ -5,9 +5,11 @@ from typing import List
 from ..db.session import get_async_db
 from ..db import models
 from ..schemas.question import QuestionCreate, QuestionResponse, QuestionUpdate
+from ..services.avatar_cache import AvatarCacheService
 import uuid
 
 router = APIRouter(prefix="/questions", tags=["questions"])
+avatar_cache = AvatarCacheService()
 
 @router.post("/", response_model=QuestionResponse)
 async def create_question(
@@ -63,6 +65,7 @@ async def delete_question(
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
+    await avatar_cache.release(db, question.avatar_cache_key)
     await db.delete(question)
     await db.commit()
     return {"message": "Question deleted successfully"}
\ No newline at end of file
@@ -1,15 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Request, WebSocket, WebSocketDisconnect, Query
+from fastapi.responses import Response
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from ..db.session import get_async_db
+from ..core.config import settings
+from ..db.session import get_async_db, async_session
 from ..db import models
-from ..schemas.response import ResponseCreate, ResponseResponse, ResponseUpdate
+from ..schemas.response import (
+    ResponseCreate, ResponseResponse, ResponseUpdate, ResponseStatus, ResponseStatusDetail,
+    EncodeProgress, TranscriptSegment, PartUrlRequest, PartUrlBatch, MultipartComplete
+)
 from ..services.did_service import DIDService
-from ..services.video_service import VideoService
+from ..services.video_service import VideoService, sniff_video_format
 from ..services.storage import StorageService
 from ..services.transcription import TranscriptionService
+from ..services.recording_pipeline import recording_pipeline
+from ..services.live_ingest import live_ingest
+from ..services.transcript_store import transcript_store, unpack_segment
+from .media import rewrite_hls_playlist
+import asyncio
+import json
 import uuid
 import logging
+from pathlib import Path
 from datetime import datetime, UTC
 
 router = APIRouter(prefix="/recordings", tags=["recordings"])
@@ -47,71 +60,218 @@ async def generate_avatar_video(
             detail="Failed to generate avatar video"
         )
 
-@router.post("/upload", response_model=ResponseResponse)
+@router.post("/upload", response_model=ResponseResponse, status_code=202)
 async def upload_recording(
     file: UploadFile = File(...),
     interview_id: uuid.UUID = Form(...),
     question_id: uuid.UUID = Form(...),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Upload and process a new recording"""
-    try:
-        # Validate video
-        await video_service.validate_video(file)
-
-        # Compress video
-        compressed_video = await video_service.compress_video(file)
-
-        # Upload to S3
-        storage_result = await storage_service.upload_file(
-            compressed_video,
-            f"recordings/{interview_id}/"
-        )
+    """Accept a recording and queue it for processing.
 
-        # Get video metadata
-        metadata = await video_service.get_video_metadata(compressed_video)
-
-        # Transcribe video
-        transcription = await transcription_service.transcribe_video(
-            storage_result["url"]
-        )
+    Returns immediately with a pending response; poll
+    /recordings/{id}/status to follow it through the pipeline.
+    """
+    ingested = None
+    try:
+        # Stream to disk, validating size and format on the way
+        ingested = await video_service.ingest_upload(file)
 
-        # Create database record
-        recording = ResponseCreate(
+        db_recording = models.Response(
             interview_id=interview_id,
             question_id=question_id,
-            video_url=storage_result["url"],
-            transcription_text=transcription["text"]
+            status=ResponseStatus.PENDING.value,
+            source_path=str(ingested["path"]),
+            processing_metadata={
+                "upload": {
+                    "filename": ingested["filename"],
+                    "size": ingested["size"],
+                    "sha256": ingested["sha256"],
+                    "format": ingested["format"]
+                }
+            }
         )
-
-        db_recording = models.Response(**recording.dict())
         db.add(db_recording)
         await db.commit()
         await db.refresh(db_recording)
 
+        recording_pipeline.enqueue(db_recording.id)
         return db_recording
 
+    except HTTPException as e:
+        if ingested and ingested["path"].exists():
+            ingested["path"].unlink()
+        if e.status_code < 500:
+            raise
+        logger.error(f"Error accepting recording: {e.detail}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to accept recording"
+        )
     except Exception as e:
-        logger.error(f"Error processing recording: {str(e)}")
+        if ingested and ingested["path"].exists():
+            ingested["path"].unlink()
+        logger.error(f"Error accepting recording: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail="Failed to process recording"
+            detail="Failed to accept recording"
+        )
+
+async def _update_recording(recording_id: uuid.UUID, **values) -> None:
+    values["updated_at"] = datetime.now(UTC)
+    async with async_session() as db:
+        await db.execute(
+            update(models.Response)
+            .where(models.Response.id == recording_id)
+            .values(**values)
         )
+        await db.commit()
+
+@router.websocket("/stream")
+async def stream_recording(
+    websocket: WebSocket,
+    interview_id: uuid.UUID,
+    question_id: uuid.UUID
+):
+    """Receive a recording while it is being made.
+
+    Send MediaRecorder chunks as binary frames and {"type": "stop"} after the
+    last one. The server answers {"type": "accepted", "id": ...} on connect
+    and {"type": "complete", "id": ...} once the recording is queued for the
+    pipeline; it is then followed like any other upload via
+    /recordings/{id}/status.
+    """
+    # Sessions are opened per step rather than held for the whole recording
+    try:
+        async with async_session() as db:
+            db_recording = models.Response(
+                interview_id=interview_id,
+                question_id=question_id,
+                status=ResponseStatus.UPLOADING.value
+            )
+            db.add(db_recording)
+            await db.commit()
+            recording_id = db_recording.id
+    except Exception as e:
+        logger.error(f"Error opening recording stream: {str(e)}")
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    try:
+        session = await live_ingest.open()
+    except Exception as e:
+        logger.error(f"Error opening recording stream {recording_id}: {str(e)}")
+        await _update_recording(
+            recording_id,
+            status=ResponseStatus.FAILED.value,
+            error="Failed to receive recording",
+            failed_at=datetime.now(UTC)
+        )
+        await websocket.close(code=1011)
+        return
+
+    result = None
+    try:
+        await websocket.send_json({"type": "accepted", "id": str(recording_id)})
+
+        while True:
+            message = await asyncio.wait_for(
+                websocket.receive(),
+                timeout=settings.RECORDING_STREAM_IDLE_SECONDS
+            )
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text"):
+                control = json.loads(message["text"])
+                if isinstance(control, dict) and control.get("type") == "stop":
+                    break
+
+        result = await session.finish()
+        await _update_recording(
+            recording_id,
+            status=ResponseStatus.PENDING.value,
+            source_path=str(result["path"]),
+            processing_metadata={
+                "upload": {
+                    "filename": None,
+                    "size": result["size"],
+                    "sha256": result["sha256"],
+                    "format": result["format"],
+                    "streamed": True
+                },
+                "live_encode": result["live_encode"]
+            }
+        )
+        recording_pipeline.enqueue(recording_id)
+
+        await websocket.send_json({"type": "complete", "id": str(recording_id)})
+        await websocket.close()
+
+    except Exception as e:
+        close_code = 1008  # Policy violation: the client sent something we reject
+        if isinstance(e, WebSocketDisconnect):
+            error = "Upload interrupted"
+        elif isinstance(e, asyncio.TimeoutError):
+            error = "Upload timed out"
+        elif isinstance(e, json.JSONDecodeError):
+            error = "Invalid control message"
+            close_code = 1003  # Unsupported data
+        elif isinstance(e, HTTPException) and e.status_code < 500:
+            error = e.detail
+        else:
+            logger.error(f"Error receiving recording stream {recording_id}: {str(e)}")
+            error = "Failed to receive recording"
+            close_code = 1011
+
+        await session.abort()
+        await _update_recording(
+            recording_id,
+            status=ResponseStatus.FAILED.value,
+            error=error,
+            failed_at=datetime.now(UTC)
+        )
+        if not isinstance(e, WebSocketDisconnect):
+            try:
+                await websocket.send_json({"type": "error", "detail": error})
+                await websocket.close(code=close_code)
+            except Exception:
+                pass
+
+    finally:
+        live_ingest.close(session, result)
 
 @router.post("/upload/multipart/init", response_model=dict)
 async def init_multipart_upload(
     filename: str = Form(...),
     content_type: str = Form(...),
-    interview_id: uuid.UUID = Form(...)
+    interview_id: uuid.UUID = Form(...),
+    file_size: Optional[int] = Form(None)
 ):
-    """Initialize a multipart upload"""
+    """Initialize a multipart upload.
+
+    With S3 the parts go straight to the bucket. In local storage mode the
+    upload is resumable: PUT each part to /upload/multipart/{upload_id}/parts/{n}
+    and GET /upload/multipart/{upload_id} to see which parts have arrived.
+    """
     try:
         result = await storage_service.create_multipart_upload(
             filename,
             content_type,
-            f"recordings/{interview_id}/"
+            f"recordings/{interview_id}/",
+            file_size
         )
         return result
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise
+        logger.error(f"Error initializing multipart upload: {e.detail}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to initialize upload"
+        )
     except Exception as e:
         logger.error(f"Error initializing multipart upload: {str(e)}")
         raise HTTPException(
@@ -119,44 +279,148 @@ async def init_multipart_upload(
             detail="Failed to initialize upload"
         )
 
-@router.post("/upload/multipart/complete", response_model=ResponseResponse)
+@router.post("/upload/multipart/{upload_id}/part-urls", response_model=PartUrlBatch)
+async def get_part_upload_urls(upload_id: str, request: PartUrlRequest):
+    """Presigned S3 URLs for a batch of parts.
+
+    The client PUTs each part straight to its URL, in parallel, and keeps the
+    returned ETag header for /upload/multipart/complete. Request further
+    batches as needed; each batch is capped at S3_PART_URL_BATCH_LIMIT.
+    """
+    if len(request.part_numbers) > settings.S3_PART_URL_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.S3_PART_URL_BATCH_LIMIT} part URLs per request"
+        )
+    urls = await storage_service.generate_presigned_upload_urls(
+        request.key,
+        upload_id,
+        sorted(set(request.part_numbers))
+    )
+    return PartUrlBatch(
+        upload_id=upload_id,
+        key=request.key,
+        expires_in=3600,
+        parts=[{"part_number": n, "url": url} for n, url in urls.items()]
+    )
+
+@router.put("/upload/multipart/{upload_id}/parts/{part_number}")
+async def upload_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    upload_checksum: str = Header(..., description='tus-style "sha256 <base64 digest>" of the part')
+):
+    """Upload one part of a resumable local upload; parts may arrive in any order"""
+    algorithm, _, digest = upload_checksum.partition(" ")
+    if algorithm.lower() != "sha256" or not digest:
+        raise HTTPException(status_code=400, detail="Upload-Checksum must be \"sha256 <base64>\"")
+
+    status = await storage_service.write_upload_part(upload_id, part_number, request.stream(), digest)
+    return Response(
+        content=json.dumps(status),
+        media_type="application/json",
+        headers={"Upload-Offset": str(status["offset"]), "Upload-Length": str(status["size"])}
+    )
+
+@router.api_route("/upload/multipart/{upload_id}", methods=["GET", "HEAD"])
+async def get_upload_status(upload_id: str, request: Request):
+    """Received parts and contiguous offset of a resumable local upload"""
+    status = await storage_service.get_upload_status(upload_id)
+    headers = {
+        "Upload-Offset": str(status["offset"]),
+        "Upload-Length": str(status["size"]),
+        "Cache-Control": "no-store"
+    }
+    if request.method == "HEAD":
+        return Response(status_code=200, headers=headers)
+    return Response(content=json.dumps(status), media_type="application/json", headers=headers)
+
+def _read_head(path: Path, size: int = 64) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(size)
+
+@router.post("/upload/multipart/complete", response_model=ResponseResponse, status_code=202)
 async def complete_multipart_upload(
-    interview_id: uuid.UUID = Form(...),
-    question_id: uuid.UUID = Form(...),
-    upload_id: str = Form(...),
-    key: str = Form(...),
-    parts: List[dict] = Form(...),
+    request: MultipartComplete,
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Complete a multipart upload and process the video"""
+    """Complete a multipart upload and queue the video for processing"""
+    interview_id, question_id, key = request.interview_id, request.question_id, request.key
+    # Uploads are started under the interview's prefix; anything else isn't one of them
+    if not key.startswith(f"recordings/{interview_id}/"):
+        raise HTTPException(status_code=400, detail="Key does not belong to this interview")
     try:
         # Complete multipart upload
         result = await storage_service.complete_multipart_upload(
             key,
-            upload_id,
-            parts
+            request.upload_id,
+            [{"PartNumber": p.part_number, "ETag": p.etag} for p in sorted(request.parts, key=lambda p: p.part_number)]
         )
 
-        # Transcribe video
-        transcription = await transcription_service.transcribe_video(
-            result["url"]
-        )
+        if "path" in result:
+            # Local uploads are assembled on our disk, so they get the full pipeline
+            source_path = Path(result["path"])
+            video_format = sniff_video_format(await asyncio.to_thread(_read_head, source_path))
+            if video_format is None:
+                await asyncio.to_thread(source_path.unlink)
+                raise HTTPException(status_code=400, detail="File is not a recognized video container")
+            size = (await asyncio.to_thread(source_path.stat)).st_size
 
-        # Create database record
-        recording = ResponseCreate(
-            interview_id=interview_id,
-            question_id=question_id,
-            video_url=result["url"],
-            transcription_text=transcription["text"]
-        )
+            db_recording = models.Response(
+                interview_id=interview_id,
+                question_id=question_id,
+                status=ResponseStatus.PENDING.value,
+                source_path=str(source_path),
+                processing_metadata={
+                    "upload": {
+                        "filename": Path(key).name,
+                        "size": size,
+                        "format": video_format,
+                        "resumable": True
+                    }
+                }
+            )
+        else:
+            # Parts went straight to the bucket, so check the object before queuing it
+            head, size = await storage_service.read_head(key)
+            video_format = sniff_video_format(head)
+            if video_format is None or size > video_service.max_file_size:
+                await storage_service.delete_file(key)
+                if video_format is None:
+                    raise HTTPException(status_code=400, detail="File is not a recognized video container")
+                raise video_service._file_too_large()
 
-        db_recording = models.Response(**recording.dict())
+            # The pipeline fetches the object and processes it like any upload
+            db_recording = models.Response(
+                interview_id=interview_id,
+                question_id=question_id,
+                status=ResponseStatus.PENDING.value,
+                processing_metadata={
+                    "upload": {
+                        "filename": Path(key).name,
+                        "storage_key": key,
+                        "etag": result["etag"],
+                        "size": size,
+                        "format": video_format
+                    }
+                }
+            )
         db.add(db_recording)
         await db.commit()
         await db.refresh(db_recording)
 
+        recording_pipeline.enqueue(db_recording.id)
         return db_recording
 
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise
+        logger.error(f"Error completing multipart upload: {e.detail}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to complete upload"
+        )
     except Exception as e:
         logger.error(f"Error completing multipart upload: {str(e)}")
         raise HTTPException(
@@ -189,20 +453,115 @@ async def get_recording(
         raise HTTPException(status_code=404, detail="Recording not found")
     return recording
 
+@router.get("/{recording_id}/status", response_model=ResponseStatusDetail)
+async def get_recording_status(
+    recording_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the processing status of a recording, with live encode progress"""
+    recording = await db.get(models.Response, recording_id)
+    if not recording:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    detail = ResponseStatusDetail.model_validate(recording)
+    detail.encodes = [EncodeProgress(**e) for e in recording_pipeline.encode_progress(recording.id)]
+    return detail
+
+@router.post("/{recording_id}/retry", response_model=ResponseResponse, status_code=202)
+async def retry_recording(
+    recording_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Send a failed recording through the pipeline again.
+
+    Failed rows keep their uploaded source, or the storage key of their
+    processed video, so a transient encode, storage or transcription error
+    doesn't need a new upload.
+    """
+    recording = await db.get(models.Response, recording_id)
+    if not recording:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    if recording.status != ResponseStatus.FAILED.value:
+        raise HTTPException(status_code=409, detail="Only failed recordings can be retried")
+    metadata = recording.processing_metadata or {}
+    if not (
+        recording.source_path
+        or metadata.get("upload", {}).get("storage_key")
+        or metadata.get("video_key")
+        or recording.video_url
+    ):
+        raise HTTPException(status_code=409, detail="Recording has no media to process")
+    # Failed rows' sources are only kept for SCRATCH_MAX_AGE_HOURS
+    if recording.source_path and not await asyncio.to_thread(Path(recording.source_path).exists):
+        raise HTTPException(status_code=409, detail="Recording source is no longer available")
+
+    recording.status = ResponseStatus.PENDING.value
+    recording.error = None
+    recording.failed_at = None
+    recording.updated_at = datetime.now(UTC)
+    await db.commit()
+    await db.refresh(recording)
+
+    recording_pipeline.enqueue(recording.id)
+    return recording
+
+@router.get("/{recording_id}/segments", response_model=List[TranscriptSegment])
+async def get_recording_segments(
+    recording_id: uuid.UUID,
+    start: float = Query(0.0, ge=0, description="Seconds; segments ending after this are included"),
+    end: Optional[float] = Query(None, gt=0, description="Seconds; segments starting before this are included"),
+    words: bool = Query(True, description="Include word timings when available"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Transcript segments overlapping a time range, for captions and seeking"""
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    recording = await db.get(models.Response, recording_id)
+    if not recording:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    segments = await transcript_store.overlapping(db, recording_id, start, end)
+    return [unpack_segment(segment, words) for segment in segments]
+
+@router.get("/{recording_id}/hls.m3u8")
+async def get_recording_playlist(
+    recording_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """HLS playlist for a recording with directly fetchable segment URLs"""
+    recording = await db.get(models.Response, recording_id)
+    hls = (recording.processing_metadata or {}).get("hls") if recording else None
+    if not hls:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    playlist_key = hls["playlist_key"]
+    prefix = playlist_key.rsplit("/", 1)[0] + "/"
+    playlist = (await storage_service.read_file(playlist_key)).decode()
+
+    return Response(
+        rewrite_hls_playlist(playlist, lambda uri: storage_service.playback_url(prefix + uri)),
+        media_type="application/vnd.apple.mpegurl",
+        # Must not outlive the presigned segment URLs it contains
+        headers={"Cache-Control": f"private, max-age={storage_service.default_expiry // 2}"}
+    )
+
 @router.delete("/{recording_id}")
 async def delete_recording(
     recording_id: uuid.UUID,
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Delete a recording"""
-    try:
-        recording = await db.get(models.Response, recording_id)
-        if not recording:
-            raise HTTPException(status_code=404, detail="Recording not found")
+    """Delete a recording with its stored video, HLS rendition and previews"""
+    recording = await db.get(models.Response, recording_id)
+    if not recording:
+        raise HTTPException(status_code=404, detail="Recording not found")
 
-        # Delete from S3
-        key = recording.video_url.split("/")[-1]
-        await storage_service.delete_file(f"recordings/{key}")
+    try:
+        # Pending and failed rows may have no stored video yet, only a raw upload
+        metadata = recording.processing_metadata or {}
+        for key in (metadata.get("video_key"), metadata.get("upload", {}).get("storage_key")):
+            if key:
+                await storage_service.delete_file(key)
+        await storage_service.delete_prefix(f"recordings/{recording.interview_id}/{recording.id}/")
+        if recording.video_url and not metadata.get("video_key"):
+            logger.warning(f"Recording {recording_id} predates stored video keys; its video is left in storage")
 
         # Delete from database
         await db.delete(recording)
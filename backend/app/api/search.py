@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime
+from ..db.session import get_async_db
+from ..schemas.interview import InterviewStatus
+from ..schemas.search import TranscriptSearchResults
+from ..services.transcript_search import transcript_search
+import logging
+
+router = APIRouter(prefix="/search", tags=["search"])
+logger = logging.getLogger(__name__)
+
+@router.get("/transcripts", response_model=TranscriptSearchResults)
+async def search_transcripts(
+    q: str = Query(..., min_length=2, max_length=200, description="Words, \"quoted phrases\", OR, -excluded"),
+    status: Optional[InterviewStatus] = Query(None, description="Only interviews in this status"),
+    created_from: Optional[datetime] = Query(None, description="Answers recorded at or after"),
+    created_to: Optional[datetime] = Query(None, description="Answers recorded before"),
+    fuzzy: bool = Query(False, description="Also match misspelled terms"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search every answer transcript, best matches first"""
+    return await transcript_search.search(
+        db,
+        q=q,
+        interview_status=status.value if status else None,
+        created_from=created_from,
+        created_to=created_to,
+        fuzzy=fuzzy,
+        limit=limit,
+        cursor=cursor
+    )
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Any
+from ..core.config import settings
+from ..db.session import get_async_db
+from ..db import models
+from ..core.security import create_webhook_token, verify_webhook_token
+from ..services.avatar_reconciler import avatar_reconciler
+import logging
+import uuid
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+logger = logging.getLogger(__name__)
+
+def get_did_webhook_url(question_id) -> Optional[str]:
+    """Callback URL signed for one question's talk, or None when webhooks are disabled"""
+    if not settings.DID_WEBHOOK_SECRET:
+        return None
+    return f"{settings.BACKEND_URL}{settings.API_V1_STR}/webhooks/did?token={create_webhook_token(question_id)}"
+
+def _error_message(error: Any) -> str:
+    """D-ID sends error as an object or, for some failures, a bare string"""
+    if isinstance(error, dict):
+        return error.get("message") or error.get("description") or "Unknown error"
+    if isinstance(error, str) and error:
+        return error
+    return "Unknown error"
+
+@router.post("/did")
+async def did_webhook(
+    request: Request,
+    token: str = Query(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Receive D-ID talk completion events and update the matching questions"""
+    question_id = verify_webhook_token(token)
+    if not question_id:
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        event = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+    talk_id = event.get("id")
+    status = event.get("status")
+    if not talk_id:
+        raise HTTPException(status_code=400, detail="Missing talk ID")
+
+    logger.info(f"D-ID webhook for talk {talk_id}: {status}")
+
+    if status in ("done", "error", "rejected"):
+        # The token only vouches for the talk of the question it was issued for
+        try:
+            question = await db.get(models.Question, uuid.UUID(question_id))
+        except ValueError:
+            question = None
+        if not question or question.avatar_video_id != talk_id:
+            logger.warning(f"Webhook token for question {question_id} used for talk {talk_id}")
+            raise HTTPException(status_code=403, detail="Webhook token does not match talk")
+
+    if status == "done" and event.get("result_url"):
+        updated = await avatar_reconciler.apply_results({talk_id: event["result_url"]}, {})
+    elif status in ("error", "rejected"):
+        error_msg = _error_message(event.get("error"))
+        updated = await avatar_reconciler.apply_results({}, {talk_id: f"Video generation failed: {error_msg}"})
+    else:
+        # Intermediate states carry nothing to store
+        updated = 0
+
+    return {"talk_id": talk_id, "status": status, "updated": updated}
@@ -30,16 +30,119 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: str = "your-access-key-id"
     AWS_SECRET_ACCESS_KEY: str = "your-secret-access-key"
     AWS_REGION: str = "us-east-1"
+    AWS_S3_ENDPOINT_URL: str = ""  # S3-compatible store such as MinIO; empty for AWS
+    AWS_S3_PUBLIC_ENDPOINT_URL: str = ""  # Endpoint browsers reach for presigned URLs, if different
+    S3_PART_URL_BATCH_LIMIT: int = 100
+
+    # Resumable uploads in local storage mode
+    LOCAL_UPLOAD_PART_SIZE: int = 5 * 1024 * 1024
+    LOCAL_UPLOAD_EXPIRY_HOURS: int = 24  # Unfinished uploads idle for longer are discarded
     
     # D-ID
     DID_API_KEY: str = ""  # Get from https://studio.d-id.com/account-settings
     DID_API_URL: str = "https://api.d-id.com"
     
+    DID_WEBHOOK_SECRET: str = ""  # Enables D-ID completion webhooks when set
+    DID_WEBHOOK_TOKEN_TTL_HOURS: int = 6  # Webhook URLs are signed per question and expire
+    DID_CREATE_TIMEOUT: float = 30.0
+    DID_STATUS_TIMEOUT: float = 10.0
+    
+    # Avatar generation scheduler
+    AVATAR_JOB_CONCURRENCY: int = 5
+    AVATAR_JOB_RATE_PER_SECOND: float = 2.0  # Sustained D-ID talk creations per second
+    AVATAR_JOB_BURST: int = 5
+    AVATAR_JOB_MAX_ATTEMPTS: int = 4
+    AVATAR_JOB_RETRY_BASE_SECONDS: float = 2.0
+    
+    # Avatar mirroring and media serving
+    AVATAR_MIRROR_ENABLED: bool = True
+    AVATAR_MIRROR_CONCURRENCY: int = 4
+    MEDIA_CACHE_MAX_AGE: int = 60 * 60 * 24 * 365  # Storage keys are never reused
+    AVATAR_PRELOAD_AHEAD: int = 2  # Avatar videos the session manifest asks clients to prefetch
+    
+    # Avatar status reconciler
+    AVATAR_RECONCILER_ENABLED: bool = True
+    AVATAR_RECONCILE_INTERVAL_SECONDS: float = 5.0
+    AVATAR_RECONCILE_CONCURRENCY: int = 10
+    AVATAR_RECONCILE_BATCH_SIZE: int = 200
+    AVATAR_RECONCILE_MAX_BACKOFF_SECONDS: float = 60.0
+    AVATAR_PROCESSING_TIMEOUT_MINUTES: int = 30
+    
+    # Recording processing pipeline
+    RECORDING_WORKERS: int = 2
+    RECORDING_STALE_MINUTES: int = 30  # In-flight rows older than this are requeued on startup
+    RECORDING_MAX_DURATION_SECONDS: int = 5 * 60  # Longer answers are rejected before encoding
+    RECORDING_MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024  # Same limit for single, streamed and multipart uploads
+    RECORDING_STREAM_MAX_ENCODERS: int = 4  # Live encodes for streamed recordings; extra streams are only spooled
+    RECORDING_STREAM_IDLE_SECONDS: float = 30.0  # Streams silent for longer are dropped
+    RECORDING_STREAM_FINISH_SECONDS: float = 60.0  # Wait for the live encode to flush after the last chunk
+    
+    # Transcoding scheduler (0 = derive from the CPU count)
+    TRANSCODE_MAX_CONCURRENT: int = 0
+    TRANSCODE_THREADS_PER_JOB: int = 0
+    TRANSCODE_MAX_WAIT_SECONDS: float = 600.0
+    TRANSCODE_REQUEUE_DELAY_SECONDS: float = 60.0  # Recordings that timed out waiting for a slot are retried after this
+    FFMPEG_STALL_TIMEOUT_SECONDS: float = 120.0  # ffmpeg runs whose output stops advancing this long are killed
+
+    # Remux fast path: compliant H.264/AAC uploads are stream-copied, not re-encoded
+    REMUX_ENABLED: bool = True
+    REMUX_MIN_HEIGHT: int = 720  # Shorter side, so portrait recordings qualify too
+    REMUX_MAX_VIDEO_BITRATE: int = 5_000_000  # bits/s; heavier files are re-encoded to save storage
+    
+    # HLS renditions for admin playback
+    HLS_ENABLED: bool = True
+    HLS_SEGMENT_SECONDS: int = 2  # Short segments keep time-to-first-frame low on slow links
+    HLS_MAX_BITRATE: int = 1_500_000  # bits/s; remuxed uploads above this are re-encoded for HLS
+    HLS_UPLOAD_CONCURRENCY: int = 8
+
+    # Recording previews (poster, thumbnail, scrub sprite)
+    PREVIEWS_ENABLED: bool = True
+    SPRITE_TILE_WIDTH: int = 160
+    SPRITE_MAX_TILES: int = 100  # Longer answers get a wider interval between tiles
+
+    # Scratch space for media processing
+    SCRATCH_DIR: str = "scratch"
+    SCRATCH_TMPFS_DIR: str = ""  # e.g. /dev/shm/interview-scratch for small intermediates
+    SCRATCH_QUOTA_BYTES: int = 10 * 1024 * 1024 * 1024
+    SCRATCH_JOB_SIZE_FACTOR: float = 3.0  # Bytes a processing job reserves per byte of input
+    SCRATCH_MAX_AGE_HOURS: int = 24  # Shared scratch files older than this are swept
+    SCRATCH_SWEEP_INTERVAL_SECONDS: int = 300
+
+    # Outbound HTTP connection pool
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_DEFAULT_TIMEOUT: float = 30.0
+    VIDEO_DOWNLOAD_TIMEOUT: float = 120.0
+    
+    # Avatar video cache
+    AVATAR_CACHE_TTL_HOURS: int = 24  # D-ID result URLs expire; applies only to renders not yet mirrored
+    AVATAR_CACHE_IDLE_HOURS: int = 6  # Unreferenced entries are dropped after this long unused
+    
     # OpenAI
     OPENAI_API_KEY: str = "your-openai-api-key"
     
     # Transcription
-    TRANSCRIPTION_PROVIDER: str = "whisper"
+    TRANSCRIPTION_PROVIDER: str = "whisper"  # whisper (OpenAI API) or local (faster-whisper on this host)
+    ENABLE_TRANSCRIPTION: bool = True
+    TRANSCRIPTION_CHUNK_SECONDS: float = 60.0  # Longer audio is split at silences into chunks up to this long
+    TRANSCRIPTION_MAX_PARALLEL: int = 4  # Concurrent transcription calls per process
+    TRANSCRIPTION_CHUNK_RETRIES: int = 2  # Extra attempts for a failed chunk before the answer fails
+    TRANSCRIPTION_CACHE_ENABLED: bool = True  # Reuse transcripts of audio already transcribed
+    TRANSCRIPTION_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # Least recently used entries beyond this are evicted
+
+    # Transcript search
+    SEARCH_MAX_CANDIDATES: int = 2000  # Most recent matches ranked per query; older ones are left out
+
+    # Local transcription (TRANSCRIPTION_PROVIDER=local)
+    LOCAL_WHISPER_MODEL: str = "small"  # faster-whisper model name or path
+    LOCAL_WHISPER_COMPUTE_TYPE: str = "int8"  # Quantised weights; fastest on CPU
+    LOCAL_WHISPER_WORKERS: int = 2  # Worker processes, each with the model loaded
+    LOCAL_WHISPER_THREADS: int = 0  # CPU threads per worker (0 = CPU count / workers)
+    LOCAL_WHISPER_BATCH_SIZE: int = 4  # Queued clips handed to a worker at once
+    LOCAL_WHISPER_BATCH_WAIT_MS: int = 50  # How long a batch waits to fill
     
     # SQLAlchemy
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
@@ -74,4 +74,29 @@ def hash_content(content: str) -> str:
 
 def generate_random_token(length: int = 32) -> str:
     """Generate a random secure token"""
-    return secrets.token_urlsafe(length)
\ No newline at end of file
+    return secrets.token_urlsafe(length)
+
+def create_webhook_token(question_id: str) -> str:
+    """Create the token embedded in a question's D-ID webhook URL.
+
+    It is bound to the question and expires, so a leaked callback URL can
+    only ever report on that question's talk, and not for long.
+    """
+    expire = datetime.utcnow() + timedelta(hours=settings.DID_WEBHOOK_TOKEN_TTL_HOURS)
+    return jwt.encode(
+        {"question_id": str(question_id), "purpose": "did-webhook", "exp": expire},
+        settings.DID_WEBHOOK_SECRET,
+        algorithm=settings.JWT_ALGORITHM
+    )
+
+def verify_webhook_token(token: str) -> Optional[str]:
+    """Verify a webhook URL token and return the question ID it was issued for"""
+    if not settings.DID_WEBHOOK_SECRET or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.DID_WEBHOOK_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+    if payload.get("purpose") != "did-webhook":
+        return None
+    return payload.get("question_id")
@@ -2,7 +2,7 @@
 Database module for the Interview Platform
 """
 
-from .models import Base, Interview, Question, Response
+from .models import Base, Interview, Question, Response, TranscriptSegment, AvatarVideoCache, TranscriptionCache
 from .session import get_async_db, async_session
 
 __all__ = [
@@ -10,6 +10,9 @@ __all__ = [
     'Interview',
     'Question',
     'Response',
+    'TranscriptSegment',
+    'AvatarVideoCache',
+    'TranscriptionCache',
     'get_async_db',
     'async_session'
 ]
\ No newline at end of file
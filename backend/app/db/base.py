@@ -3,5 +3,8 @@ from .base_class import Base  # noqa
 from ..db.models import Interview  # noqa
 from ..db.models import Question  # noqa
 from ..db.models import Response  # noqa
+from ..db.models import TranscriptSegment  # noqa
+from ..db.models import AvatarVideoCache  # noqa
+from ..db.models import TranscriptionCache  # noqa
 
 # Make sure all models are imported before initializing Alembic
\ No newline at end of file
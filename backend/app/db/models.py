@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, BigInteger, Float, Text, Index, Computed, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship, declarative_base
 import uuid
 from datetime import datetime, UTC
@@ -21,6 +21,14 @@ class Interview(Base):
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # Small partial index: only questions still waiting on D-ID
+        Index(
+            "ix_questions_avatar_processing",
+            "avatar_video_id",
+            postgresql_where=text("avatar_video_status = 'processing'")
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     interview_id = Column(UUID(as_uuid=True), ForeignKey("interviews.id"), nullable=False)
@@ -32,6 +40,7 @@ class Question(Base):
     avatar_video_url = Column(String, nullable=True)
     avatar_video_status = Column(String, nullable=True)
     avatar_video_error = Column(Text, nullable=True)
+    avatar_cache_key = Column(String(64), nullable=True, index=True)
     
     # Voice customization fields
     voice_id = Column(String, nullable=True, default="en-US-JennyNeural")
@@ -46,15 +55,102 @@ class Question(Base):
 
 class Response(Base):
     __tablename__ = "responses"
+    __table_args__ = (
+        # Transcript search: full-text matches, and trigram matches for misspelled terms
+        Index("ix_responses_transcription_tsv", "transcription_tsv", postgresql_using="gin"),
+        Index(
+            "ix_responses_transcription_trgm",
+            "transcription",
+            postgresql_using="gin",
+            postgresql_ops={"transcription": "gin_trgm_ops"}
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     interview_id = Column(UUID(as_uuid=True), ForeignKey("interviews.id"), nullable=False)
-    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False, index=True)
     video_url = Column(String, nullable=True)
+    hls_url = Column(String, nullable=True)  # Playlist route; set once the HLS rendition is stored
+    poster_url = Column(String, nullable=True)
+    thumbnail_url = Column(String, nullable=True)
+    sprite_url = Column(String, nullable=True)  # Layout in processing_metadata["sprite"]
     transcription = Column(Text, nullable=True)
+    # Maintained by Postgres on every write; see services.transcript_search
+    transcription_tsv = Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(transcription, ''))", persisted=True)
+    )
+
+    # Probed properties of the stored video
+    duration_seconds = Column(Float, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    video_codec = Column(String, nullable=True)
+    audio_codec = Column(String, nullable=True)
+    audio_channels = Column(Integer, nullable=True)
+    bit_rate = Column(BigInteger, nullable=True)
+    
+    # Processing pipeline state (see schemas.response.ResponseStatus)
+    status = Column(String, nullable=False, default="pending", index=True)
+    error = Column(Text, nullable=True)
+    source_path = Column(String, nullable=True)  # Local upload waiting to be processed
+    processing_metadata = Column(JSONB, nullable=True)
+    processing_started_at = Column(DateTime(timezone=True), nullable=True)
+    transcribing_started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)
+    
     created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
     updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
 
     # Relationships
     interview = relationship("Interview", back_populates="responses")
-    question = relationship("Question", back_populates="responses")
\ No newline at end of file
+    question = relationship("Question", back_populates="responses")
+    # Deleted by the database's ON DELETE CASCADE, not loaded to be deleted one by one
+    segments = relationship("TranscriptSegment", cascade="all, delete-orphan", passive_deletes=True)
+
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+    __table_args__ = (
+        # Time-range lookups within one response
+        Index("ix_transcript_segments_response_start", "response_id", "start_ms"),
+    )
+
+    response_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("responses.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    seq = Column(Integer, primary_key=True)
+    # Milliseconds from the start of the recording
+    start_ms = Column(Integer, nullable=False)
+    end_ms = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    # Word timings packed as [[start_ms, end_ms, "word"], ...]; null when not reported
+    words = Column(JSONB, nullable=True)
+
+class AvatarVideoCache(Base):
+    __tablename__ = "avatar_video_cache"
+
+    # sha256 of the render inputs (text, voice, style, source image)
+    cache_key = Column(String(64), primary_key=True)
+    talk_id = Column(String, nullable=True, index=True)
+    video_url = Column(String, nullable=True)
+    # Set once the render has been mirrored into our own storage
+    storage_key = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="processing")
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
+    last_used_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
+
+class TranscriptionCache(Base):
+    __tablename__ = "transcription_cache"
+
+    # sha256 of the audio decoded to 16 kHz mono PCM, plus backend and language
+    fingerprint = Column(String(64), primary_key=True)
+    result = Column(JSONB, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
+    # Eviction order
+    last_used_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC), index=True)
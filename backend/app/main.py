@@ -3,8 +3,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 from .core.config import settings
-from .api import interviews, questions, recordings
+from .api import interviews, questions, recordings, webhooks, media, search
 from .db.init_db import init_db
+from .services.http_client import http_client_pool
+from .services.avatar_reconciler import avatar_reconciler
+from .services.avatar_scheduler import avatar_scheduler
+from .services.avatar_mirror import avatar_mirror
+from .services.recording_pipeline import recording_pipeline
+from .services.transcode_scheduler import transcode_scheduler
+from .services.live_ingest import live_ingest
+from .services.scratch import scratch
+from .services.encode_progress import encode_progress
+from .services.transcription_backends import close_backends
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -31,12 +41,50 @@ app.mount("/public", StaticFiles(directory=static_dir), name="public")
 app.include_router(interviews.router, prefix=settings.API_V1_STR)
 app.include_router(questions.router, prefix=settings.API_V1_STR)
 app.include_router(recordings.router, prefix=settings.API_V1_STR)
+app.include_router(webhooks.router, prefix=settings.API_V1_STR)
+app.include_router(media.router, prefix=settings.API_V1_STR)
+app.include_router(search.router, prefix=settings.API_V1_STR)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the database with test data on startup"""
     await init_db()
+    # Pending recordings' sources must outlive the sweeper's age limit
+    scratch.keep_in_use(recording_pipeline.files_in_use)
+    await scratch.start()
+    await http_client_pool.startup()
+    await avatar_scheduler.start()
+    await interviews.requeue_pending_avatars()
+    await recording_pipeline.start()
+    recordings.storage_service.expire_uploads()
+    if settings.AVATAR_RECONCILER_ENABLED:
+        await avatar_reconciler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and release pooled resources"""
+    await avatar_reconciler.stop()
+    await avatar_scheduler.stop()
+    await avatar_mirror.stop()
+    await recording_pipeline.stop()
+    await close_backends()
+    await scratch.stop()
+    await http_client_pool.shutdown()
 
 @app.get("/")
 async def root():
-    return {"message": "Interview Platform API"}
\ No newline at end of file
+    return {"message": "Interview Platform API"}
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime statistics for shared resources"""
+    return {
+        "http_pool": http_client_pool.stats(),
+        "avatar_jobs": avatar_scheduler.stats(),
+        "recording_pipeline": recording_pipeline.stats(),
+        "transcription": recording_pipeline.transcription_service.stats(),
+        "transcoding": transcode_scheduler.stats(),
+        "live_ingest": live_ingest.stats(),
+        "scratch": scratch.stats(),
+        "encodes": encode_progress.stats()
+    }
\ No newline at end of file
@@ -61,6 +61,31 @@ class InterviewResponse(InterviewBase):
     responses: List[ResponseBase] = []
     model_config = ConfigDict(from_attributes=True)
 
+class ManifestItem(BaseModel):
+    question_id: UUID
+    order_number: int
+    text: str
+    avatar_video_url: Optional[str] = None
+    avatar_video_status: AvatarVideoStatus = Field(default=AvatarVideoStatus.PENDING)
+    ready: bool = Field(default=False, description="Avatar video can be played now")
+    answered: bool = Field(default=False, description="A response has been recorded for this question")
+    model_config = ConfigDict(from_attributes=True)
+
+class InterviewManifest(BaseModel):
+    """Compact view of a candidate session used to prefetch avatar videos"""
+    interview_id: UUID
+    status: InterviewStatus
+    next_question_index: Optional[int] = Field(
+        default=None,
+        description="Index into items of the first unanswered question, null when all are answered"
+    )
+    items: List[ManifestItem] = []
+    preload: List[str] = Field(
+        default_factory=list,
+        description="Avatar URLs the client should start downloading now, most urgent first"
+    )
+    model_config = ConfigDict(from_attributes=True)
+
 class InterviewDetail(InterviewResponse):
     """Detailed interview response including full question and response data"""
     pass
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, AliasChoices
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 from enum import Enum
 
@@ -44,6 +44,8 @@ class ResponseUpdate(BaseModel):
 class ResponseInQuestion(BaseModel):
     id: UUID
     video_url: Optional[HttpUrl] = None
+    thumbnail_url: Optional[str] = None
+    duration_seconds: Optional[float] = None
     transcription_text: Optional[str] = None
     status: ResponseStatus
     created_at: datetime
@@ -54,12 +56,106 @@ class ResponseInQuestion(BaseModel):
 
 class ResponseResponse(ResponseBase):
     id: UUID
+    # Stored URLs may be media-route or local-storage URLs, not strictly HttpUrl
+    video_url: Optional[str] = None
+    hls_url: Optional[str] = Field(None, description="HLS playlist for streaming playback")
+    poster_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    sprite_url: Optional[str] = Field(
+        None,
+        description="Scrub preview sprite sheet; tile layout is in metadata.sprite"
+    )
+    duration_seconds: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    audio_channels: Optional[int] = None
+    bit_rate: Optional[int] = None
+    transcription_text: Optional[str] = Field(
+        None,
+        validation_alias=AliasChoices("transcription_text", "transcription")
+    )
+    metadata: Optional[Dict[str, Any]] = Field(
+        None,
+        validation_alias=AliasChoices("processing_metadata", "metadata")
+    )
+    error: Optional[str] = None
+    processing_started_at: Optional[datetime] = None
+    transcribing_started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    failed_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class EncodeProgress(BaseModel):
+    """Progress of one running ffmpeg job"""
+    stage: str
+    percent: Optional[float] = None
+    speed: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    out_time_seconds: float
+    elapsed_seconds: float
+
+class ResponseStatusDetail(BaseModel):
+    """Processing progress of a response"""
+    id: UUID
+    status: ResponseStatus
+    error: Optional[str] = None
+    processing_started_at: Optional[datetime] = None
+    transcribing_started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    failed_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+    encodes: List[EncodeProgress] = []  # Running ffmpeg jobs, while processing
 
     class Config:
         from_attributes = True
 
+class TranscriptWord(BaseModel):
+    start: float
+    end: float
+    word: str
+
+class TranscriptSegment(BaseModel):
+    """A timed stretch of the transcript, in seconds from the start of the recording"""
+    start: float
+    end: float
+    text: str
+    words: Optional[List[TranscriptWord]] = None
+
+class PartUrlRequest(BaseModel):
+    key: str
+    part_numbers: List[int] = Field(..., min_length=1, description="Parts to presign, 1-based")
+
+class PartUrl(BaseModel):
+    part_number: int
+    url: str
+
+class PartUrlBatch(BaseModel):
+    upload_id: str
+    key: str
+    expires_in: int = Field(..., description="Seconds the URLs stay valid")
+    parts: List[PartUrl]
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(..., validation_alias=AliasChoices("part_number", "PartNumber"))
+    etag: str = Field(..., validation_alias=AliasChoices("etag", "ETag"))
+
+class MultipartComplete(BaseModel):
+    interview_id: UUID
+    question_id: UUID
+    upload_id: str
+    key: str
+    parts: List[CompletedPart] = Field(
+        default_factory=list,
+        description="ETag of every part uploaded to S3; local uploads track their own parts"
+    )
+
 class ResponseList(BaseModel):
     items: list[ResponseResponse]
     total: int = Field(..., description="Total number of responses")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List
+from uuid import UUID
+
+class TranscriptHit(BaseModel):
+    response_id: UUID
+    interview_id: UUID
+    question_id: UUID
+    interview_status: str
+    created_at: datetime
+    rank: float
+    snippet: str = Field(..., description="Matching passages with terms wrapped in <mark>")
+
+class TranscriptSearchResults(BaseModel):
+    results: List[TranscriptHit]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor for the next page; null on the last")
@@ -0,0 +1,45 @@
+"""
+Allow the frontend to upload parts straight to the bucket.
+
+Browsers need a CORS rule for the PUTs to presigned part URLs, and the ETag
+header has to be exposed so the client can pass it to
+/recordings/upload/multipart/complete:
+
+    python app/scripts/configure_s3_cors.py
+    python app/scripts/configure_s3_cors.py --origin https://interviews.example.com
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.config import settings
+from app.services.storage import StorageService
+
+def configure_s3_cors(origins):
+    storage = StorageService()
+    if not storage._ensure_client():
+        print("S3 is not configured, nothing to do")
+        sys.exit(1)
+
+    storage.s3_client.put_bucket_cors(
+        Bucket=storage.bucket_name,
+        CORSConfiguration={
+            "CORSRules": [{
+                "AllowedOrigins": origins,
+                "AllowedMethods": ["GET", "PUT", "HEAD"],
+                "AllowedHeaders": ["*"],
+                "ExposeHeaders": ["ETag"],
+                "MaxAgeSeconds": 3600
+            }]
+        }
+    )
+    print(f"CORS configured on {storage.bucket_name} for {', '.join(origins)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Configure bucket CORS for direct part uploads")
+    parser.add_argument("--origin", action="append", help="Allowed origin (repeatable, defaults to FRONTEND_URL)")
+    args = parser.parse_args()
+    configure_s3_cors(args.origin or [settings.FRONTEND_URL])
@@ -0,0 +1,56 @@
+"""
+Local stub for D-ID completion webhooks.
+
+Posts a talk event to the running API exactly as D-ID would, so the webhook
+flow can be exercised offline:
+
+    python app/scripts/send_did_webhook.py <question-id> tlk_abc123 --result-url https://example.com/video.mp4
+    python app/scripts/send_did_webhook.py <question-id> tlk_abc123 --status error --error "Face not detected"
+"""
+import sys
+import os
+import argparse
+import httpx
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.config import settings
+from app.core.security import create_webhook_token
+
+def send_did_webhook(question_id: str, talk_id: str, status: str, result_url: str = None, error: str = None, backend_url: str = None):
+    if not settings.DID_WEBHOOK_SECRET:
+        print("DID_WEBHOOK_SECRET is not set, the API would reject the webhook")
+        sys.exit(1)
+
+    backend_url = backend_url or settings.BACKEND_URL
+    url = f"{backend_url}{settings.API_V1_STR}/webhooks/did"
+
+    event = {"id": talk_id, "status": status}
+    if result_url:
+        event["result_url"] = result_url
+    if error:
+        event["error"] = {"kind": "StubError", "description": error, "message": error}
+
+    response = httpx.post(url, params={"token": create_webhook_token(question_id)}, json=event, timeout=10.0)
+    print(f"{response.status_code}: {response.text}")
+    response.raise_for_status()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send a stub D-ID webhook to the local API")
+    parser.add_argument("question_id", help="Question the talk was created for")
+    parser.add_argument("talk_id", help="D-ID talk ID stored in Question.avatar_video_id")
+    parser.add_argument("--status", default="done", choices=["created", "started", "done", "error", "rejected"])
+    parser.add_argument("--result-url", default="https://d-id-public-bucket.s3.us-west-2.amazonaws.com/sample.mp4")
+    parser.add_argument("--error", default=None)
+    parser.add_argument("--backend-url", default=None)
+    args = parser.parse_args()
+
+    send_did_webhook(
+        args.question_id,
+        args.talk_id,
+        args.status,
+        result_url=args.result_url if args.status == "done" else None,
+        error=args.error,
+        backend_url=args.backend_url
+    )
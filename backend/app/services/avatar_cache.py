@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, UTC
+from typing import Optional, Dict, List
+from sqlalchemy import update, delete, select, or_, and_, case
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..db import models
+from .storage import StorageService
+
+logger = logging.getLogger(__name__)
+
+class AvatarCacheService:
+    """Content-addressed cache of rendered avatar videos shared across interviews"""
+
+    def __init__(self):
+        self.ttl = timedelta(hours=settings.AVATAR_CACHE_TTL_HOURS)
+        self.idle_timeout = timedelta(hours=settings.AVATAR_CACHE_IDLE_HOURS)
+        self.storage = StorageService()
+
+    def compute_key(
+        self,
+        text: str,
+        voice_id: Optional[str],
+        voice_style: Optional[str],
+        source_url: str
+    ) -> str:
+        """Hash the inputs that determine what D-ID renders"""
+        payload = json.dumps(
+            {
+                "text": text.strip(),
+                "voice_id": voice_id,
+                "voice_style": voice_style,
+                "source_url": source_url
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        cache_key: str
+    ) -> Optional[models.AvatarVideoCache]:
+        """Return a usable cache entry (completed or still rendering) for the key"""
+        entry = await db.get(models.AvatarVideoCache, cache_key)
+        if not entry or entry.status == "error":
+            return None
+
+        # Mirrored copies live in our storage and do not expire with D-ID's URL
+        if not entry.storage_key and datetime.now(UTC) - entry.created_at > self.ttl:
+            logger.info(f"Avatar cache entry {cache_key} expired")
+            return None
+
+        return entry
+
+    async def attach(
+        self,
+        db: AsyncSession,
+        question: models.Question,
+        entry: models.AvatarVideoCache
+    ) -> None:
+        """Point a question at a cached render and take a reference on it"""
+        question.avatar_cache_key = entry.cache_key
+        question.avatar_video_id = entry.talk_id
+        question.avatar_video_url = entry.video_url
+        question.avatar_video_status = entry.status
+        question.avatar_video_error = None
+
+        await db.execute(
+            update(models.AvatarVideoCache)
+            .where(models.AvatarVideoCache.cache_key == entry.cache_key)
+            .values(
+                ref_count=models.AvatarVideoCache.ref_count + 1,
+                last_used_at=datetime.now(UTC)
+            )
+        )
+        logger.info(f"Reusing cached avatar {entry.cache_key} ({entry.status}) for question {question.id}")
+
+    async def register_render(
+        self,
+        db: AsyncSession,
+        cache_key: str,
+        talk_id: str
+    ) -> None:
+        """Record a freshly started D-ID render so later questions can share it"""
+        await self.evict(db)
+
+        now = datetime.now(UTC)
+        stmt = insert(models.AvatarVideoCache).values(
+            cache_key=cache_key,
+            talk_id=talk_id,
+            status="processing",
+            ref_count=1,
+            created_at=now,
+            last_used_at=now
+        )
+        # A newer render replaces an expired, failed or forcibly regenerated one
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.AvatarVideoCache.cache_key],
+            set_={
+                "talk_id": talk_id,
+                "video_url": None,
+                "storage_key": None,
+                "status": "processing",
+                "ref_count": models.AvatarVideoCache.ref_count + 1,
+                "created_at": now,
+                "last_used_at": now
+            }
+        )
+        await db.execute(stmt)
+
+    async def complete(self, db: AsyncSession, talk_id: str, video_url: str) -> None:
+        """Store the finished video for every entry rendered by this talk"""
+        await db.execute(
+            update(models.AvatarVideoCache)
+            .where(models.AvatarVideoCache.talk_id == talk_id)
+            .values(status="completed", video_url=video_url)
+        )
+
+    async def store_mirror(
+        self,
+        db: AsyncSession,
+        talk_id: str,
+        storage_key: str,
+        video_url: str
+    ) -> None:
+        """Switch entries rendered by this talk to the mirrored copy"""
+        await db.execute(
+            update(models.AvatarVideoCache)
+            .where(models.AvatarVideoCache.talk_id == talk_id)
+            .values(storage_key=storage_key, video_url=video_url)
+        )
+
+    async def complete_many(self, db: AsyncSession, video_urls: Dict[str, str]) -> None:
+        """Store finished videos for several talks in a single statement"""
+        if not video_urls:
+            return
+
+        await db.execute(
+            update(models.AvatarVideoCache)
+            .where(models.AvatarVideoCache.talk_id.in_(list(video_urls)))
+            .values(
+                status="completed",
+                video_url=case(video_urls, value=models.AvatarVideoCache.talk_id)
+            )
+        )
+
+    async def fail_many(self, db: AsyncSession, talk_ids: List[str]) -> None:
+        """Mark several renders as failed in a single statement"""
+        if not talk_ids:
+            return
+
+        await db.execute(
+            update(models.AvatarVideoCache)
+            .where(models.AvatarVideoCache.talk_id.in_(talk_ids))
+            .values(status="error")
+        )
+
+    async def fail(self, db: AsyncSession, talk_id: str) -> None:
+        """Mark a render as failed so the next question triggers a new one"""
+        await db.execute(
+            update(models.AvatarVideoCache)
+            .where(models.AvatarVideoCache.talk_id == talk_id)
+            .values(status="error")
+        )
+
+    async def release(self, db: AsyncSession, cache_key: Optional[str]) -> None:
+        """Drop a question's reference on a cache entry"""
+        if not cache_key:
+            return
+
+        await db.execute(
+            update(models.AvatarVideoCache)
+            .where(
+                models.AvatarVideoCache.cache_key == cache_key,
+                models.AvatarVideoCache.ref_count > 0
+            )
+            .values(ref_count=models.AvatarVideoCache.ref_count - 1)
+        )
+
+    async def evict(self, db: AsyncSession) -> int:
+        """Delete unmirrored entries past their TTL, and unreferenced entries left idle too long"""
+        now = datetime.now(UTC)
+        result = await db.execute(
+            delete(models.AvatarVideoCache)
+            .where(
+                or_(
+                    and_(
+                        models.AvatarVideoCache.storage_key.is_(None),
+                        models.AvatarVideoCache.created_at < now - self.ttl
+                    ),
+                    and_(
+                        models.AvatarVideoCache.ref_count <= 0,
+                        models.AvatarVideoCache.last_used_at < now - self.idle_timeout
+                    )
+                )
+            )
+            .returning(models.AvatarVideoCache.storage_key)
+        )
+        evicted_keys = result.scalars().all()
+        for storage_key in filter(None, evicted_keys):
+            try:
+                await self.storage.delete_file(storage_key)
+            except Exception as e:
+                logger.warning(f"Failed to delete mirrored avatar {storage_key}: {str(e)}")
+
+        evicted = len(evicted_keys)
+        if evicted:
+            logger.info(f"Evicted {evicted} avatar cache entries")
+        return evicted
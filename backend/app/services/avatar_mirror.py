@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Set
+import aiofiles
+from sqlalchemy import select, update
+from ..core.config import settings
+from ..db import models
+from ..db.session import async_session
+from .avatar_cache import AvatarCacheService
+from .http_client import http_client_pool
+from .storage import StorageService
+from .scratch import scratch
+
+logger = logging.getLogger(__name__)
+
+class AvatarMirrorService:
+    """Copies finished D-ID renders into our storage so they never expire
+    and are served from our own cacheable, range-capable URL"""
+
+    def __init__(self):
+        self.storage = StorageService()
+        self.avatar_cache = AvatarCacheService()
+        self._semaphore = asyncio.Semaphore(settings.AVATAR_MIRROR_CONCURRENCY)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, talk_id: str, result_url: str) -> None:
+        """Mirror a finished render in the background"""
+        if not settings.AVATAR_MIRROR_ENABLED:
+            return
+        task = asyncio.create_task(self.mirror(talk_id, result_url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self) -> None:
+        """Cancel in-flight copies; questions keep the D-ID URL until mirrored"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _download(self, url: str, dest: Path) -> None:
+        """Stream the video to disk in chunks over the shared pool"""
+        async with http_client_pool.client.stream(
+            "GET",
+            url,
+            timeout=http_client_pool.timeout("video_download")
+        ) as response:
+            response.raise_for_status()
+            async with aiofiles.open(dest, "wb") as f:
+                async for chunk in response.aiter_bytes(1024 * 1024):
+                    await f.write(chunk)
+
+    async def mirror(self, talk_id: str, result_url: str) -> None:
+        async with self._semaphore, scratch.workspace("avatar") as workspace:
+            temp_file = workspace.path(f"{talk_id}.mp4")
+            try:
+                async with async_session() as db:
+                    cache_key = (await db.execute(
+                        select(models.AvatarVideoCache.cache_key)
+                        .where(models.AvatarVideoCache.talk_id == talk_id)
+                    )).scalars().first()
+
+                # Content-addressed and talk-specific, so the object is immutable
+                key = f"avatars/{cache_key or 'uncached'}/{talk_id}.mp4"
+
+                await self._download(result_url, temp_file)
+                stored = await self.storage.upload_file_to_key(
+                    temp_file,
+                    key,
+                    content_type="video/mp4",
+                    cache_control=f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+                )
+
+                async with async_session() as db:
+                    await db.execute(
+                        update(models.Question)
+                        .where(
+                            models.Question.avatar_video_id == talk_id,
+                            models.Question.avatar_video_status == "completed"
+                        )
+                        .values(avatar_video_url=stored["url"])
+                    )
+                    await self.avatar_cache.store_mirror(db, talk_id, key, stored["url"])
+                    await db.commit()
+
+                logger.info(f"Mirrored avatar video for talk {talk_id} to {key}")
+
+            except Exception as e:
+                # The D-ID URL keeps working until it expires, so this is not fatal
+                logger.error(f"Failed to mirror avatar video for talk {talk_id}: {str(e)}")
+
+avatar_mirror = AvatarMirrorService()
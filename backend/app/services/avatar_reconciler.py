@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Optional, Dict, List, Tuple, Any
+from sqlalchemy import select, update, case, text
+from ..core.config import settings
+from ..db import models
+from ..db.session import async_session, engine
+from .avatar_cache import AvatarCacheService
+from .avatar_mirror import avatar_mirror
+from .did_service import DIDService
+
+logger = logging.getLogger(__name__)
+
+# Postgres advisory lock key, so only one process per deployment sweeps
+RECONCILER_LOCK_ID = 0x61766174
+
+class AvatarReconciler:
+    """Background sweeper that resolves avatar videos stuck in "processing" """
+
+    def __init__(self, did_service: Optional[DIDService] = None):
+        self.did_service = did_service or DIDService()
+        self.avatar_cache = AvatarCacheService()
+        self.interval = settings.AVATAR_RECONCILE_INTERVAL_SECONDS
+        self.concurrency = settings.AVATAR_RECONCILE_CONCURRENCY
+        self.batch_size = settings.AVATAR_RECONCILE_BATCH_SIZE
+        self.max_backoff = settings.AVATAR_RECONCILE_MAX_BACKOFF_SECONDS
+        self.processing_timeout = timedelta(minutes=settings.AVATAR_PROCESSING_TIMEOUT_MINUTES)
+        # talk_id -> (monotonic time of next check, checks so far)
+        self._backoff: Dict[str, Tuple[float, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def start(self) -> None:
+        """Start the sweep loop in the background"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the sweep loop and release the leader lock"""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        """Hold the advisory lock while sweeping; other processes stand by"""
+        while not self._stopping.is_set():
+            try:
+                async with engine.connect() as lock_conn:
+                    acquired = (await lock_conn.execute(
+                        text("SELECT pg_try_advisory_lock(:lock_id)"),
+                        {"lock_id": RECONCILER_LOCK_ID}
+                    )).scalar()
+                    if not acquired:
+                        await self._sleep(self.interval * 6)
+                        continue
+
+                    logger.info("Avatar reconciler acquired leader lock")
+                    try:
+                        while not self._stopping.is_set():
+                            await self.sweep()
+                            await self._sleep(self.interval)
+                    finally:
+                        await lock_conn.execute(
+                            text("SELECT pg_advisory_unlock(:lock_id)"),
+                            {"lock_id": RECONCILER_LOCK_ID}
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Avatar reconciler error: {str(e)}")
+                await self._sleep(self.interval)
+
+    def _is_due(self, talk_id: str, now: float) -> bool:
+        if talk_id not in self._backoff and settings.DID_WEBHOOK_SECRET:
+            # D-ID will call the webhook; polling is only a fallback for lost callbacks
+            self._backoff[talk_id] = (now + self.max_backoff, 0)
+            return False
+        next_check, _ = self._backoff.get(talk_id, (0.0, 0))
+        return now >= next_check
+
+    def _defer(self, talk_id: str, now: float) -> None:
+        """Exponential backoff with jitter for talks that are not ready yet"""
+        _, checks = self._backoff.get(talk_id, (0.0, 0))
+        delay = min(self.interval * (2 ** checks), self.max_backoff)
+        self._backoff[talk_id] = (now + delay * random.uniform(0.8, 1.2), checks + 1)
+
+    async def _check(self, semaphore: asyncio.Semaphore, talk_id: str) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return talk_id, await self.did_service.get_talk_status(talk_id)
+            except Exception as e:
+                logger.warning(f"Failed to check talk {talk_id}: {str(e)}")
+                return talk_id, {"status": None}
+
+    async def sweep(self) -> Dict[str, int]:
+        """Check every processing question once and write results back in batches"""
+        async with async_session() as db:
+            result = await db.execute(
+                select(
+                    models.Question.avatar_video_id,
+                    models.Question.updated_at
+                ).where(
+                    models.Question.avatar_video_status == "processing",
+                    models.Question.avatar_video_id.isnot(None)
+                )
+            )
+            rows = result.all()
+
+        # Cached renders are shared, so several questions can wait on one talk
+        oldest: Dict[str, datetime] = {}
+        for talk_id, updated_at in rows:
+            if talk_id not in oldest or updated_at < oldest[talk_id]:
+                oldest[talk_id] = updated_at
+
+        now = time.monotonic()
+        due = [talk_id for talk_id in oldest if self._is_due(talk_id, now)]
+        # Forget backoff state for talks resolved elsewhere (webhook, regeneration)
+        self._backoff = {k: v for k, v in self._backoff.items() if k in oldest}
+        if not due:
+            return {"checked": 0, "completed": 0, "failed": 0}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._check(semaphore, talk_id) for talk_id in due))
+
+        completed: Dict[str, str] = {}
+        failed: Dict[str, str] = {}
+        deadline = datetime.now(UTC) - self.processing_timeout
+        for talk_id, talk in results:
+            status = talk.get("status")
+            if status == "done" and talk.get("result_url"):
+                completed[talk_id] = talk["result_url"]
+            elif status in ("error", "rejected"):
+                failed[talk_id] = f"Video generation failed: {talk.get('error') or 'Unknown error'}"
+            elif oldest[talk_id] < deadline:
+                failed[talk_id] = "Video generation timed out"
+            else:
+                self._defer(talk_id, now)
+
+        await self.apply_results(completed, failed)
+        for talk_id in list(completed) + list(failed):
+            self._backoff.pop(talk_id, None)
+
+        if completed or failed:
+            logger.info(f"Avatar reconciler: {len(completed)} completed, {len(failed)} failed, {len(due)} checked")
+        return {"checked": len(due), "completed": len(completed), "failed": len(failed)}
+
+    async def apply_results(self, completed: Dict[str, str], failed: Dict[str, str]) -> int:
+        """Apply outcomes with one UPDATE per batch instead of one per question"""
+        now = datetime.now(UTC)
+        updated = 0
+        async with async_session() as db:
+            for batch in _batches(list(completed), self.batch_size):
+                urls = {talk_id: completed[talk_id] for talk_id in batch}
+                result = await db.execute(
+                    update(models.Question)
+                    .where(
+                        models.Question.avatar_video_id.in_(batch),
+                        models.Question.avatar_video_status == "processing"
+                    )
+                    .values(
+                        avatar_video_url=case(urls, value=models.Question.avatar_video_id),
+                        avatar_video_status="completed",
+                        avatar_video_error=None,
+                        updated_at=now
+                    )
+                )
+                updated += result.rowcount
+                await self.avatar_cache.complete_many(db, urls)
+
+            for batch in _batches(list(failed), self.batch_size):
+                errors = {talk_id: failed[talk_id] for talk_id in batch}
+                result = await db.execute(
+                    update(models.Question)
+                    .where(
+                        models.Question.avatar_video_id.in_(batch),
+                        models.Question.avatar_video_status == "processing"
+                    )
+                    .values(
+                        avatar_video_error=case(errors, value=models.Question.avatar_video_id),
+                        avatar_video_status="error",
+                        updated_at=now
+                    )
+                )
+                updated += result.rowcount
+                await self.avatar_cache.fail_many(db, batch)
+
+            await db.commit()
+
+        # Copy finished renders into our own storage off the request path
+        for talk_id, video_url in completed.items():
+            avatar_mirror.schedule(talk_id, video_url)
+        return updated
+
+def _batches(items: List[str], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+avatar_reconciler = AvatarReconciler()
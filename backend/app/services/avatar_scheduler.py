@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+import logging
+import random
+import time
+from typing import Optional, Dict, Any, Callable, Awaitable, List, Set
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower values run first
+PRIORITY_CANDIDATE = 0  # Interviews being created for candidates
+PRIORITY_ADMIN = 10  # Admin-triggered regenerations
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by all workers"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AvatarJobScheduler:
+    """Process-wide queue for avatar generation jobs with bounded concurrency,
+    a rate limit towards D-ID, priorities and jittered retries"""
+
+    def __init__(self):
+        self.concurrency = settings.AVATAR_JOB_CONCURRENCY
+        self.max_attempts = settings.AVATAR_JOB_MAX_ATTEMPTS
+        self.retry_base_delay = settings.AVATAR_JOB_RETRY_BASE_SECONDS
+        self.bucket = TokenBucket(settings.AVATAR_JOB_RATE_PER_SECOND, settings.AVATAR_JOB_BURST)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._retry_tasks: Set[asyncio.Task] = set()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def start(self) -> None:
+        """Spawn the worker tasks"""
+        self._ensure_workers()
+
+    async def stop(self) -> None:
+        """Cancel workers and pending retries. Queued jobs are dropped; their
+        questions stay pending and are resubmitted on the next startup"""
+        for task in self._workers + list(self._retry_tasks):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retry_tasks, return_exceptions=True)
+        self._workers = []
+        self._retry_tasks.clear()
+
+    def _ensure_workers(self) -> None:
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def submit(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        priority: int = PRIORITY_CANDIDATE,
+        on_failure: Optional[Callable[..., Awaitable[Any]]] = None,
+        **kwargs
+    ) -> None:
+        """Queue a job; on_failure(*args, error=...) runs once retries are exhausted"""
+        self._ensure_workers()
+        job = {
+            "func": func,
+            "args": args,
+            "kwargs": kwargs,
+            "on_failure": on_failure,
+            "attempt": 0
+        }
+        self._queue.put_nowait((priority, next(self._seq), job))
+
+    async def _worker(self) -> None:
+        while True:
+            priority, _, job = await self._queue.get()
+            try:
+                await self._run(priority, job)
+            except Exception as e:
+                logger.error(f"Avatar job handler error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, priority: int, job: Dict[str, Any]) -> None:
+        await self.bucket.acquire()
+        job["attempt"] += 1
+        self.running += 1
+        try:
+            await job["func"](*job["args"], **job["kwargs"])
+            self.completed += 1
+        except Exception as e:
+            if getattr(e, "retryable", False) and job["attempt"] < self.max_attempts:
+                # Exponential backoff with full jitter so retries don't arrive in waves
+                delay = random.uniform(0, self.retry_base_delay * (2 ** job["attempt"]))
+                logger.warning(
+                    f"Avatar job attempt {job['attempt']} failed: {str(e)}. Retrying in {delay:.1f}s"
+                )
+                self.retried += 1
+                task = asyncio.create_task(self._requeue(delay, priority, job))
+                self._retry_tasks.add(task)
+                task.add_done_callback(self._retry_tasks.discard)
+            else:
+                self.failed += 1
+                logger.error(f"Avatar job failed after {job['attempt']} attempts: {str(e)}")
+                if job["on_failure"]:
+                    await job["on_failure"](*job["args"], error=e)
+        finally:
+            self.running -= 1
+
+    async def _requeue(self, delay: float, priority: int, job: Dict[str, Any]) -> None:
+        await asyncio.sleep(delay)
+        self._queue.put_nowait((priority, next(self._seq), job))
+
+    def stats(self) -> Dict[str, Any]:
+        """Report queue depth and job outcomes"""
+        return {
+            "queued": self._queue.qsize(),
+            "waiting_retry": len(self._retry_tasks),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "concurrency": self.concurrency
+        }
+
+avatar_scheduler = AvatarJobScheduler()
@@ -2,13 +2,23 @@ import httpx
 import logging
 from typing import Optional, Dict, Any
 from app.core.config import settings
+from app.services.http_client import http_client_pool
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+class DIDServiceError(Exception):
+    """Error from the D-ID API, flagged when retrying the same call may succeed"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
 class DIDService:
     def __init__(self):
         self.base_url = "https://api.d-id.com"
+        self.default_source_url = "https://d-id-public-bucket.s3.us-west-2.amazonaws.com/alice.jpg"
         # Use the exact authorization header that worked in the test
         self.headers = {
             "accept": "application/json",
@@ -26,7 +36,7 @@ class DIDService:
     ) -> str:
         """Create a new avatar video using D-ID API"""
         if not source_url:
-            source_url = "https://d-id-public-bucket.s3.us-west-2.amazonaws.com/alice.jpg"
+            source_url = self.default_source_url
 
         url = f"{self.base_url}/talks"
         
@@ -64,24 +74,24 @@ class DIDService:
             logger.info(f"Request headers: {self.headers}")
             logger.info(f"Request payload: {payload}")
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers=self.headers,
-                    follow_redirects=True
-                )
-                
-                # Log response details for debugging
-                logger.info(f"Response status: {response.status_code}")
-                logger.info(f"Response headers: {dict(response.headers)}")
-                logger.info(f"Response body: {response.text}")
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                logger.info(f"Successfully created avatar video with ID: {data.get('id')}")
-                return data.get("id")
+            response = await http_client_pool.client.post(
+                url,
+                json=payload,
+                headers=self.headers,
+                timeout=http_client_pool.timeout("did_create"),
+                follow_redirects=True
+            )
+            
+            # Log response details for debugging
+            logger.info(f"Response status: {response.status_code}")
+            logger.info(f"Response headers: {dict(response.headers)}")
+            logger.info(f"Response body: {response.text}")
+            
+            response.raise_for_status()
+            
+            data = response.json()
+            logger.info(f"Successfully created avatar video with ID: {data.get('id')}")
+            return data.get("id")
                 
         except httpx.HTTPStatusError as e:
             status_code = e.response.status_code
@@ -89,23 +99,34 @@ class DIDService:
             
             if status_code == 401:
                 logger.error("Authentication failed with D-ID API")
-                raise Exception("Invalid D-ID API credentials. Please check your API key.")
+                raise DIDServiceError("Invalid D-ID API credentials. Please check your API key.", status_code)
             elif status_code == 402:
                 logger.error("Insufficient credits in D-ID account")
-                raise Exception("Insufficient credits in D-ID account")
+                raise DIDServiceError("Insufficient credits in D-ID account", status_code)
             elif status_code == 400:
                 logger.error(f"Bad request: {error_detail}")
-                raise Exception(f"Invalid request parameters: {error_detail}")
+                raise DIDServiceError(f"Invalid request parameters: {error_detail}", status_code)
             elif status_code == 451:
                 logger.error(f"Content moderation failed: {error_detail}")
-                raise Exception(f"Content moderation failed: {error_detail}")
+                raise DIDServiceError(f"Content moderation failed: {error_detail}", status_code)
             else:
                 logger.error(f"HTTP error creating avatar: {error_detail}")
-                raise Exception(f"Failed to create avatar video: {error_detail}")
+                raise DIDServiceError(
+                    f"Failed to create avatar video: {error_detail}",
+                    status_code,
+                    retryable=status_code == 429 or status_code >= 500
+                )
             
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # The request never reached D-ID, so no talk was created; safe to retry
+            logger.error(f"Could not reach D-ID to create avatar: {str(e)}")
+            raise DIDServiceError(f"Could not reach D-ID: {str(e)}", retryable=True)
+
         except Exception as e:
+            # Read timeouts and dropped connections may come after D-ID created the
+            # talk; retrying could render (and bill) it twice
             logger.error(f"Unexpected error creating avatar: {str(e)}")
-            raise Exception(f"Unexpected error creating avatar video: {str(e)}")
+            raise DIDServiceError(f"Unexpected error creating avatar video: {str(e)}")
 
     async def get_video_url(self, talk_id: str, max_retries: int = 3) -> Optional[str]:
         """Get the URL of a generated video"""
@@ -114,29 +135,29 @@ class DIDService:
         for attempt in range(max_retries):
             try:
                 logger.info(f"Checking status for talk ID: {talk_id} (attempt {attempt + 1}/{max_retries})")
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        url,
-                        headers=self.headers,
-                        follow_redirects=True
-                    )
-                    response.raise_for_status()
-                    
-                    result = response.json()
-                    status = result.get("status")
-                    logger.info(f"Talk status: {status}")
-                    
-                    if status == "done":
-                        return result.get("result_url")
-                    elif status == "error":
-                        error_msg = result.get("error", {}).get("message", "Unknown error")
-                        raise Exception(f"Video generation failed: {error_msg}")
-                    elif status in ["started", "created"]:
-                        logger.info(f"Video {status}, not ready yet")
-                        return None
-                    else:
-                        logger.warning(f"Unknown status: {status}")
-                        return None
+                response = await http_client_pool.client.get(
+                    url,
+                    headers=self.headers,
+                    timeout=http_client_pool.timeout("did_status"),
+                    follow_redirects=True
+                )
+                response.raise_for_status()
+                
+                result = response.json()
+                status = result.get("status")
+                logger.info(f"Talk status: {status}")
+                
+                if status == "done":
+                    return result.get("result_url")
+                elif status == "error":
+                    error_msg = result.get("error", {}).get("message", "Unknown error")
+                    raise Exception(f"Video generation failed: {error_msg}")
+                elif status in ["started", "created"]:
+                    logger.info(f"Video {status}, not ready yet")
+                    return None
+                else:
+                    logger.warning(f"Unknown status: {status}")
+                    return None
                     
             except httpx.HTTPStatusError as e:
                 if attempt == max_retries - 1:  # Last attempt
@@ -151,6 +172,23 @@ class DIDService:
                     raise Exception(f"Unexpected error getting video status: {str(e)}")
                 logger.warning(f"Attempt {attempt + 1} failed, retrying...")
 
+    async def get_talk_status(self, talk_id: str) -> Dict[str, Any]:
+        """Fetch the current state of a talk in a single request, without retries"""
+        response = await http_client_pool.client.get(
+            f"{self.base_url}/talks/{talk_id}",
+            headers=self.headers,
+            timeout=http_client_pool.timeout("did_status"),
+            follow_redirects=True
+        )
+        response.raise_for_status()
+
+        result = response.json()
+        return {
+            "status": result.get("status"),
+            "result_url": result.get("result_url"),
+            "error": (result.get("error") or {}).get("message")
+        }
+
     async def _get_error_detail(self, response: httpx.Response) -> str:
         """Extract detailed error message from response"""
         try:
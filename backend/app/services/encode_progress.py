@@ -0,0 +1,116 @@
+import logging
+import re
+import time
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+DURATION_PATTERN = re.compile(rb"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+def parse_duration(log_line: bytes) -> Optional[float]:
+    """Input duration from ffmpeg's "Duration: 00:01:23.45" log line, if this is it"""
+    match = DURATION_PATTERN.search(log_line)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds) or None
+
+def _parse_speed(value: str) -> Optional[float]:
+    # ffmpeg reports e.g. "2.35x", or "N/A" before the first frame
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:
+        return None
+
+class EncodeProgress:
+    """Progress of one ffmpeg run, fed from its -progress output"""
+
+    def __init__(self, job: Optional[str], stage: str, duration: Optional[float]):
+        self.job = job
+        self.stage = stage
+        self.duration = duration if duration and duration > 0 else None
+        self.out_time = 0.0
+        self.speed: Optional[float] = None
+        self.started_at = time.time()
+        self.updated_at = self.started_at
+        # Monotonic time output last moved forward; drives stall detection
+        self.advanced_at = time.monotonic()
+        self._block: Dict[str, str] = {}
+
+    def feed(self, line: str) -> bool:
+        """Consume one key=value line; True when the encode has moved forward"""
+        key, _, value = line.partition("=")
+        if key != "progress":
+            self._block[key] = value
+            return False
+
+        # "progress=continue|end" closes a block
+        block, self._block = self._block, {}
+        self.updated_at = time.time()
+        self.speed = _parse_speed(block.get("speed", "N/A"))
+        out_time_us = block.get("out_time_us", block.get("out_time_ms", ""))
+        try:
+            out_time = int(out_time_us) / 1_000_000
+        except ValueError:
+            return False
+        if out_time > self.out_time:
+            self.out_time = out_time
+            self.advanced_at = time.monotonic()
+            return True
+        return False
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.duration:
+            return None
+        return round(min(100.0, self.out_time / self.duration * 100), 1)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if not self.duration or not self.speed:
+            return None
+        return round(max(0.0, self.duration - self.out_time) / self.speed, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "percent": self.percent,
+            "speed": self.speed,
+            "eta_seconds": self.eta_seconds,
+            "out_time_seconds": round(self.out_time, 2),
+            "elapsed_seconds": round(time.time() - self.started_at, 1)
+        }
+
+class EncodeProgressRegistry:
+    """In-memory view of the ffmpeg runs in flight, keyed by job"""
+
+    def __init__(self):
+        self._active: Dict[int, EncodeProgress] = {}
+        self.completed = 0
+        self.stalled = 0
+
+    def start(self, job: Optional[str], stage: str, duration: Optional[float] = None) -> EncodeProgress:
+        progress = EncodeProgress(job, stage, duration)
+        self._active[id(progress)] = progress
+        return progress
+
+    def finish(self, progress: EncodeProgress, stalled: bool = False) -> None:
+        self._active.pop(id(progress), None)
+        if stalled:
+            self.stalled += 1
+        else:
+            self.completed += 1
+
+    def for_job(self, job: str) -> List[Dict[str, Any]]:
+        """Every ffmpeg run currently working for job (e.g. HLS and previews side by side)"""
+        return [p.to_dict() for p in self._active.values() if p.job == job]
+
+    def stats(self) -> Dict[str, Any]:
+        """Report running encodes and how many were killed as stalled"""
+        return {
+            "active": [{"job": p.job, **p.to_dict()} for p in self._active.values()],
+            "completed": self.completed,
+            "stalled": self.stalled
+        }
+
+encode_progress = EncodeProgressRegistry()
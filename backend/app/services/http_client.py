@@ -0,0 +1,94 @@
+import httpx
+import logging
+from typing import Optional, Dict, Any
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HTTPClientPool:
+    """Process-wide pooled httpx client shared by all outbound HTTP calls"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests_total = 0
+        self.http2 = settings.HTTP2_ENABLED
+        self.limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        # Per-endpoint read timeouts, in seconds
+        self.timeouts = {
+            "default": settings.HTTP_DEFAULT_TIMEOUT,
+            "did_create": settings.DID_CREATE_TIMEOUT,
+            "did_status": settings.DID_STATUS_TIMEOUT,
+            "video_download": settings.VIDEO_DOWNLOAD_TIMEOUT
+        }
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the shared client, falling back to HTTP/1.1 without h2 installed"""
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+                self.http2 = False
+
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=self.limits,
+            timeout=self.timeout("default"),
+            event_hooks={"request": [self._on_request]}
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self.requests_total += 1
+
+    async def startup(self) -> None:
+        """Open the shared client (called from the application startup event)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+            logger.info(f"HTTP client pool started (http2={self.http2}, max_connections={settings.HTTP_MAX_CONNECTIONS})")
+
+    async def shutdown(self) -> None:
+        """Close the shared client and all pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("HTTP client pool closed")
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, created lazily outside of the app (scripts, workers)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def timeout(self, endpoint: str) -> httpx.Timeout:
+        """Timeout for a named endpoint, with a shared connect timeout"""
+        return httpx.Timeout(
+            self.timeouts.get(endpoint, self.timeouts["default"]),
+            connect=settings.HTTP_CONNECT_TIMEOUT
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Report pool usage"""
+        connections = []
+        if self._client is not None and not self._client.is_closed:
+            # httpx does not expose pool state publicly; read it from httpcore
+            pool = getattr(self._client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "connections": len(connections),
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle,
+            "requests_total": self.requests_total
+        }
+
+http_client_pool = HTTPClientPool()
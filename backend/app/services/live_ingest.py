@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Deque
+import aiofiles
+from fastapi import HTTPException
+from ..core.config import settings
+from .video_service import VideoService, SPEECH_AUDIO_ARGS, keyframe_args, sniff_video_format
+from .transcode_scheduler import transcode_scheduler
+from .scratch import scratch
+
+logger = logging.getLogger(__name__)
+
+class LiveIngestSession:
+    """One recording streamed in as MediaRecorder chunks.
+
+    Every chunk is appended to a spool file and piped into a live ffmpeg
+    encode, so the processed video and speech track are ready moments after
+    the last chunk. The spool is the source of truth: if the live encode
+    fails or isn't available, the pipeline processes the spool as a normal
+    upload.
+    """
+
+    def __init__(self, manager: "LiveIngestManager"):
+        self.manager = manager
+        self.video_service = manager.video_service
+        token = os.urandom(8).hex()
+        temp_dir = self.video_service.temp_dir
+        self.spool_path = temp_dir / f"stream_{token}.part"
+        self.video_path = temp_dir / f"live_{token}.mp4"
+        self.audio_path = temp_dir / f"speech_{token}.ogg"
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        self._head = b""
+        self._spool = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_tail: Deque[bytes] = deque(maxlen=20)
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._encoder_reserved = False
+        self.encoder_failed = False
+
+    def _command(self) -> List[str]:
+        return [
+            'ffmpeg',
+            '-i', 'pipe:0',
+            '-c:v', 'libx264',
+            '-c:a', 'aac',
+            '-b:v', '1000k',
+            '-b:a', '128k',
+            '-threads', str(transcode_scheduler.threads_per_job),
+            *keyframe_args(),
+            '-movflags', '+faststart',
+            '-y',
+            str(self.video_path)
+        ] + SPEECH_AUDIO_ARGS + ['-y', str(self.audio_path)]
+
+    async def start(self) -> None:
+        self._spool = await aiofiles.open(self.spool_path, "wb")
+        self._encoder_reserved = self.manager._reserve_encoder()
+        if not self._encoder_reserved:
+            # Over the live encoder limit: spool only, the pipeline encodes later
+            self.encoder_failed = True
+            return
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *self._command(),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            self._stderr_task = asyncio.create_task(self._drain_stderr())
+        except Exception as e:
+            logger.error(f"Could not start live encoder: {str(e)}")
+            self._encoder_down()
+
+    async def _drain_stderr(self) -> None:
+        # ffmpeg blocks if nobody reads its log output
+        async for line in self._process.stderr:
+            self._stderr_tail.append(line)
+
+    def _encoder_down(self) -> None:
+        self.encoder_failed = True
+        if self._encoder_reserved:
+            self._encoder_reserved = False
+            self.manager._release_encoder()
+
+    async def feed(self, chunk: bytes) -> None:
+        """Append a chunk to the spool and the live encode"""
+        self.size += len(chunk)
+        if self.size > self.video_service.max_file_size:
+            raise self.video_service._file_too_large()
+        if len(self._head) < 64:
+            self._head += chunk[:64 - len(self._head)]
+        self._hasher.update(chunk)
+        await self._spool.write(chunk)
+
+        if not self.encoder_failed:
+            try:
+                self._process.stdin.write(chunk)
+                await self._process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                logger.warning("Live encoder exited early, falling back to the spool")
+                self._encoder_down()
+
+    async def finish(self) -> Dict[str, Any]:
+        """Close the stream; returns the spool details and live outputs if they succeeded"""
+        await self._spool.close()
+        video_format = sniff_video_format(self._head)
+        if video_format is None:
+            await self.abort()
+            raise HTTPException(status_code=400, detail="Stream is not a recognized video container")
+
+        self.spool_path = self.spool_path.rename(self.spool_path.with_suffix(f".{video_format}"))
+        # Held until the pipeline has processed it
+        scratch.adjust_shared(self.size)
+
+        live_encode = None
+        if not self.encoder_failed:
+            try:
+                self._process.stdin.close()
+                await asyncio.wait_for(self._process.wait(), timeout=settings.RECORDING_STREAM_FINISH_SECONDS)
+                await self._stderr_task
+                if self._process.returncode == 0:
+                    live_encode = {"video": str(self.video_path), "audio": str(self.audio_path)}
+                else:
+                    logger.error(f"Live encoder error: {b''.join(self._stderr_tail).decode(errors='replace')}")
+            except asyncio.TimeoutError:
+                logger.error("Live encoder did not finish in time")
+                self._process.kill()
+            finally:
+                self._encoder_down()
+
+        if live_encode is None:
+            self._remove(self.video_path, self.audio_path)
+
+        return {
+            "path": self.spool_path,
+            "size": self.size,
+            "sha256": self._hasher.hexdigest(),
+            "format": video_format,
+            "live_encode": live_encode
+        }
+
+    async def abort(self) -> None:
+        """Drop the stream and everything written for it"""
+        if self._spool and not self._spool.closed:
+            await self._spool.close()
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        self._encoder_down()
+        self._remove(self.spool_path, self.video_path, self.audio_path)
+
+    @staticmethod
+    def _remove(*paths: Path) -> None:
+        for path in paths:
+            if path.exists():
+                path.unlink()
+
+class LiveIngestManager:
+    """Creates live ingest sessions; a live encoder runs only while it holds a
+    transcoding slot, and at most RECORDING_STREAM_MAX_ENCODERS at once"""
+
+    def __init__(self):
+        self.video_service = VideoService()
+        self.max_encoders = settings.RECORDING_STREAM_MAX_ENCODERS
+        self.encoders = 0
+        self.sessions = 0
+        self.completed = 0
+        self.fallbacks = 0
+
+    def _reserve_encoder(self) -> bool:
+        # Live encodes share the CPU budget with the pipeline's; a stream never
+        # waits for a slot, it is spooled and encoded by the pipeline instead
+        if self.encoders >= self.max_encoders or not transcode_scheduler.try_acquire():
+            return False
+        self.encoders += 1
+        return True
+
+    def _release_encoder(self) -> None:
+        self.encoders -= 1
+        transcode_scheduler.release()
+
+    async def open(self) -> LiveIngestSession:
+        session = LiveIngestSession(self)
+        await session.start()
+        self.sessions += 1
+        return session
+
+    def close(self, session: LiveIngestSession, result: Optional[Dict[str, Any]]) -> None:
+        self.sessions -= 1
+        if result is not None:
+            self.completed += 1
+            if result["live_encode"] is None:
+                self.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Report open streams and live encode outcomes"""
+        return {
+            "sessions": self.sessions,
+            "encoders": self.encoders,
+            "max_encoders": self.max_encoders,
+            "completed": self.completed,
+            "fallbacks": self.fallbacks
+        }
+
+live_ingest = LiveIngestManager()
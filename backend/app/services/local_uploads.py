@@ -0,0 +1,177 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Any, AsyncIterator, Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+class LocalUploadStore:
+    """Resumable multipart uploads on the local filesystem.
+
+    Each upload is one preallocated data file plus a small JSON state file.
+    Parts are written in place at part_number * part_size, in any order and
+    concurrently, and each is verified against its sha256 before it counts
+    as received. Completing an upload renames the data file into place, so
+    assembly never copies bytes.
+    """
+
+    def __init__(self, root: Path, part_size: int):
+        self.root = root
+        self.part_size = part_size
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _data_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.data"
+
+    def _state_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def _save_state(self, upload_id: str, state: Dict[str, Any]) -> None:
+        # Write-then-rename so a crash never leaves a torn state file
+        temp_path = self._state_path(upload_id).with_suffix(".json.tmp")
+        temp_path.write_text(json.dumps(state))
+        os.replace(temp_path, self._state_path(upload_id))
+
+    def load(self, upload_id: str) -> Dict[str, Any]:
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        try:
+            return json.loads(self._state_path(upload_id).read_text())
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+    @staticmethod
+    def part_count(state: Dict[str, Any]) -> int:
+        return max(1, math.ceil(state["size"] / state["part_size"]))
+
+    @staticmethod
+    def received_offset(state: Dict[str, Any]) -> int:
+        """Bytes received without gaps from the start, tus' Upload-Offset"""
+        offset = 0
+        part_number = 1
+        while str(part_number) in state["parts"]:
+            offset += state["parts"][str(part_number)]["size"]
+            part_number += 1
+        return offset
+
+    def create(self, key: str, size: int, content_type: str) -> Dict[str, Any]:
+        """Start an upload and reserve its full size on disk"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        upload_id = os.urandom(16).hex()
+        with open(self._data_path(upload_id), "wb") as f:
+            try:
+                # Reserve the blocks up front so out-of-order writes can't fragment the file
+                # or run out of space halfway through
+                os.posix_fallocate(f.fileno(), 0, size)
+            except (AttributeError, OSError):
+                f.truncate(size)
+
+        state = {
+            "upload_id": upload_id,
+            "key": key,
+            "size": size,
+            "part_size": self.part_size,
+            "content_type": content_type,
+            "created_at": time.time(),
+            "parts": {}
+        }
+        self._save_state(upload_id, state)
+        return state
+
+    async def write_part(
+        self,
+        upload_id: str,
+        part_number: int,
+        chunks: AsyncIterator[bytes],
+        sha256: str
+    ) -> Dict[str, Any]:
+        """Write one part at its offset; sha256 is the base64 digest the client computed"""
+        state = self.load(upload_id)
+        if not 1 <= part_number <= self.part_count(state):
+            raise HTTPException(status_code=400, detail="Part number out of range")
+
+        offset = (part_number - 1) * state["part_size"]
+        expected = min(state["part_size"], state["size"] - offset)
+        hasher = hashlib.sha256()
+        written = 0
+
+        fd = os.open(self._data_path(upload_id), os.O_WRONLY)
+        try:
+            async for chunk in chunks:
+                if written + len(chunk) > expected:
+                    raise HTTPException(status_code=400, detail="Part is larger than expected")
+                hasher.update(chunk)
+                # pwrite is positional, so concurrent parts never share a file offset
+                await asyncio.to_thread(os.pwrite, fd, chunk, offset + written)
+                written += len(chunk)
+        finally:
+            os.close(fd)
+
+        if written != expected:
+            raise HTTPException(status_code=400, detail="Part is smaller than expected")
+        digest = base64.b64encode(hasher.digest()).decode()
+        if digest != sha256:
+            # The bytes stay on disk but the part is not marked received; the client resends it
+            raise HTTPException(status_code=460, detail="Checksum mismatch")
+
+        async with self._lock(upload_id):
+            state = self.load(upload_id)
+            state["parts"][str(part_number)] = {"size": written, "sha256": digest}
+            self._save_state(upload_id, state)
+        return state
+
+    async def complete(self, upload_id: str, destination: Path) -> Dict[str, Any]:
+        """Move a fully received upload to destination"""
+        async with self._lock(upload_id):
+            state = self.load(upload_id)
+            missing = [
+                n for n in range(1, self.part_count(state) + 1)
+                if str(n) not in state["parts"]
+            ]
+            if missing:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload is missing parts: {', '.join(map(str, missing[:20]))}"
+                )
+
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._data_path(upload_id), destination)
+            self._state_path(upload_id).unlink()
+        self._locks.pop(upload_id, None)
+        return state
+
+    def abort(self, upload_id: str) -> None:
+        """Drop an upload and its reserved space"""
+        self.load(upload_id)
+        for path in (self._data_path(upload_id), self._state_path(upload_id)):
+            if path.exists():
+                path.unlink()
+        self._locks.pop(upload_id, None)
+
+    def expire(self, max_age_hours: float) -> int:
+        """Remove uploads not completed within max_age_hours"""
+        if not self.root.exists():
+            return 0
+        cutoff = time.time() - max_age_hours * 3600
+        expired = 0
+        for state_path in self.root.glob("*.json"):
+            try:
+                if state_path.stat().st_mtime < cutoff:
+                    self.abort(state_path.stem)
+                    expired += 1
+            except Exception as e:
+                logger.error(f"Error expiring upload {state_path.stem}: {str(e)}")
+        return expired
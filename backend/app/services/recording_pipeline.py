@@ -0,0 +1,527 @@
+import asyncio
+import logging
+import shutil
+import uuid
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set
+from sqlalchemy import select, update
+from ..core.config import settings
+from ..db import models
+from ..db.session import async_session
+from ..schemas.response import ResponseStatus
+from .video_service import VideoService, RecordingTooLong
+from .storage import StorageService
+from .transcription import TranscriptionService
+from .transcode_scheduler import transcode_scheduler, TranscodeQueueTimeout, PRIORITY_LOW
+from .scratch import scratch, Workspace
+from .encode_progress import encode_progress
+from .transcript_store import transcript_store
+
+logger = logging.getLogger(__name__)
+
+class RecordingPipeline:
+    """Worker pool that moves uploaded responses through
+    pending -> processing -> transcribing -> completed (or failed)"""
+
+    def __init__(self):
+        self.video_service = VideoService()
+        self.storage_service = StorageService()
+        self.transcription_service = TranscriptionService()
+        self.concurrency = settings.RECORDING_WORKERS
+        self.stale_after = timedelta(minutes=settings.RECORDING_STALE_MINUTES)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.requeued = 0
+
+    async def start(self) -> None:
+        """Spawn workers and pick up responses left unfinished by a previous run"""
+        self._ensure_workers()
+        try:
+            await self.requeue_unfinished()
+        except Exception as e:
+            logger.error(f"Failed to requeue unfinished recordings: {str(e)}")
+
+    async def stop(self) -> None:
+        """Cancel workers; claimed responses keep their source and are retried once stale"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _ensure_workers(self) -> None:
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def enqueue(self, response_id: uuid.UUID) -> None:
+        """Queue a persisted pending response for processing"""
+        self._ensure_workers()
+        self._queue.put_nowait(response_id)
+
+    async def requeue_unfinished(self) -> int:
+        """Reset stale in-flight rows to pending and queue every pending row"""
+        stale_before = datetime.now(UTC) - self.stale_after
+        async with async_session() as db:
+            await db.execute(
+                update(models.Response)
+                .where(
+                    models.Response.status.in_([
+                        ResponseStatus.PROCESSING.value,
+                        ResponseStatus.TRANSCRIBING.value
+                    ]),
+                    models.Response.updated_at < stale_before
+                )
+                .values(status=ResponseStatus.PENDING.value, updated_at=datetime.now(UTC))
+            )
+            # Streams cut off by the restart can't be resumed
+            await db.execute(
+                update(models.Response)
+                .where(
+                    models.Response.status == ResponseStatus.UPLOADING.value,
+                    models.Response.updated_at < stale_before
+                )
+                .values(
+                    status=ResponseStatus.FAILED.value,
+                    error="Upload interrupted",
+                    failed_at=datetime.now(UTC),
+                    updated_at=datetime.now(UTC)
+                )
+            )
+            await db.commit()
+
+            result = await db.execute(
+                select(models.Response.id)
+                .where(models.Response.status == ResponseStatus.PENDING.value)
+                .order_by(models.Response.created_at)
+            )
+            response_ids = result.scalars().all()
+
+        for response_id in response_ids:
+            self.enqueue(response_id)
+        if response_ids:
+            logger.info(f"Requeued {len(response_ids)} unfinished recordings")
+        return len(response_ids)
+
+    async def files_in_use(self) -> Set[Path]:
+        """Ingested sources and live outputs that unfinished rows still point at"""
+        async with async_session() as db:
+            result = await db.execute(
+                select(models.Response.source_path, models.Response.processing_metadata)
+                .where(
+                    models.Response.source_path.isnot(None),
+                    models.Response.status.in_([
+                        ResponseStatus.UPLOADING.value,
+                        ResponseStatus.PENDING.value,
+                        ResponseStatus.PROCESSING.value,
+                        ResponseStatus.TRANSCRIBING.value
+                    ])
+                )
+            )
+            rows = result.all()
+
+        files = set()
+        for source_path, metadata in rows:
+            files.add(Path(source_path).resolve())
+            live_encode = (metadata or {}).get("live_encode") or {}
+            files.update(Path(path).resolve() for path in live_encode.values() if path)
+        return files
+
+    async def _worker(self) -> None:
+        while True:
+            response_id = await self._queue.get()
+            self.active += 1
+            try:
+                await self.process(response_id)
+            except Exception as e:
+                logger.error(f"Recording worker error for {response_id}: {str(e)}")
+            finally:
+                self.active -= 1
+                self._queue.task_done()
+
+    async def _update(self, response_id: uuid.UUID, **values) -> None:
+        """Write a stage transition in its own short transaction"""
+        values["updated_at"] = datetime.now(UTC)
+        async with async_session() as db:
+            await db.execute(
+                update(models.Response)
+                .where(models.Response.id == response_id)
+                .values(**values)
+            )
+            await db.commit()
+
+    async def _complete(self, response_id: uuid.UUID, transcription: Dict[str, Any], **values) -> None:
+        """Store the timed segments and mark the response completed in one transaction"""
+        values["updated_at"] = datetime.now(UTC)
+        async with async_session() as db:
+            await transcript_store.save(db, response_id, transcription)
+            await db.execute(
+                update(models.Response)
+                .where(models.Response.id == response_id)
+                .values(
+                    transcription=transcription["text"],
+                    status=ResponseStatus.COMPLETED.value,
+                    completed_at=datetime.now(UTC),
+                    **values
+                )
+            )
+            await db.commit()
+
+    async def _claim(self, response_id: uuid.UUID) -> Optional[models.Response]:
+        """Atomically move a pending response to processing so only one worker runs it"""
+        now = datetime.now(UTC)
+        async with async_session() as db:
+            result = await db.execute(
+                update(models.Response)
+                .where(
+                    models.Response.id == response_id,
+                    models.Response.status == ResponseStatus.PENDING.value
+                )
+                .values(
+                    status=ResponseStatus.PROCESSING.value,
+                    processing_started_at=now,
+                    error=None,
+                    updated_at=now
+                )
+                .returning(models.Response)
+            )
+            response = result.scalar_one_or_none()
+            await db.commit()
+            return response
+
+    def _live_encode(self, live_encode: Optional[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """Outputs already produced while the recording was streamed in, if still on disk"""
+        if not live_encode:
+            return None
+        video_path, audio_path = Path(live_encode["video"]), Path(live_encode["audio"])
+        if not video_path.exists():
+            if audio_path.exists():
+                audio_path.unlink()
+            return None
+        return {
+            "path": video_path,
+            "mode": "live",
+            "reason": None,
+            "audio_path": audio_path if audio_path.exists() else None,
+            "probe": None
+        }
+
+    @staticmethod
+    def _media_columns(video: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Probed properties of the stored video, as Response columns"""
+        if not video:
+            return {}
+        return {
+            "duration_seconds": video["duration"],
+            "width": video["width"],
+            "height": video["height"],
+            "video_codec": video["codec"],
+            "audio_codec": video.get("audio_codec"),
+            "audio_channels": video.get("audio_channels"),
+            "bit_rate": video["bit_rate"] or None
+        }
+
+    async def _hls_needs_reencode(self, video_path: Path, video_metadata: Dict[str, Any]) -> bool:
+        """Whether a remuxed upload can't be stream-copied into HLS as it is.
+
+        Browser and phone recorders often put keyframes many seconds apart,
+        or only at the start, and a stream copy can only cut segments at
+        keyframes.
+        """
+        if (video_metadata.get("bit_rate") or 0) > settings.HLS_MAX_BITRATE:
+            return True
+        gap = await self.video_service.keyframe_gap(video_path, video_metadata.get("duration"))
+        # A frame of slack for timestamps that land just past the boundary
+        return gap is None or gap > settings.HLS_SEGMENT_SECONDS + 0.05
+
+    async def _publish_hls(
+        self,
+        response: models.Response,
+        video_path: Path,
+        video_metadata: Dict[str, Any],
+        remuxed: bool,
+        workspace: Workspace
+    ) -> Optional[Dict[str, Any]]:
+        """Package and store the HLS rendition; playback keeps using the MP4 if this fails"""
+        hls_dir = None
+        try:
+            reencode = remuxed and await self._hls_needs_reencode(video_path, video_metadata)
+            hls_dir = await self.video_service.package_hls(video_path, reencode, PRIORITY_LOW, workspace)
+            prefix = f"recordings/{response.interview_id}/{response.id}/hls/"
+            semaphore = asyncio.Semaphore(settings.HLS_UPLOAD_CONCURRENCY)
+
+            async def upload(path: Path) -> None:
+                async with semaphore:
+                    # Candidates' answers: browsers may cache them, shared caches and CDNs may not
+                    await self.storage_service.upload_file_to_key(
+                        path,
+                        prefix + path.name,
+                        cache_control=f"private, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+                    )
+
+            # Segments first, so a stored playlist never references a missing object
+            playlist = hls_dir / "index.m3u8"
+            parts = [p for p in hls_dir.iterdir() if p != playlist]
+            await asyncio.gather(*(upload(p) for p in parts))
+            await upload(playlist)
+
+            return {
+                "playlist_key": prefix + playlist.name,
+                "segments": sum(1 for p in parts if p.suffix == ".m4s"),
+                "segment_seconds": settings.HLS_SEGMENT_SECONDS,
+                "reencoded": reencode
+            }
+
+        except Exception as e:
+            logger.error(f"Error publishing HLS for recording {response.id}: {str(e)}")
+            return None
+
+        finally:
+            if hls_dir:
+                shutil.rmtree(hls_dir, ignore_errors=True)
+
+    async def _publish_previews(
+        self,
+        response: models.Response,
+        video_path: Path,
+        video_metadata: Dict[str, Any],
+        workspace: Workspace
+    ) -> Optional[Dict[str, Any]]:
+        """Store poster, thumbnail and sprite; returns their URLs and the sprite layout"""
+        previews = None
+        try:
+            previews = await self.video_service.extract_previews(video_path, video_metadata, workspace)
+            prefix = f"recordings/{response.interview_id}/{response.id}/previews/"
+            urls = {}
+            for name in ("poster", "thumbnail", "sprite"):
+                # Stills of the candidate, cached like the answer itself
+                stored = await self.storage_service.upload_file_to_key(
+                    previews[name],
+                    prefix + previews[name].name,
+                    cache_control=f"private, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+                )
+                urls[f"{name}_url"] = stored["url"]
+            return {**urls, "sprite_info": previews["sprite_info"]}
+
+        except Exception as e:
+            logger.error(f"Error publishing previews for recording {response.id}: {str(e)}")
+            return None
+
+        finally:
+            if previews:
+                shutil.rmtree(previews["directory"], ignore_errors=True)
+
+    @staticmethod
+    def _job_name(response_id: uuid.UUID) -> str:
+        return f"response_{response_id}"
+
+    def encode_progress(self, response_id: uuid.UUID) -> List[Dict[str, Any]]:
+        """Live progress of the ffmpeg runs currently working on a response"""
+        return encode_progress.for_job(self._job_name(response_id))
+
+    async def process(self, response_id: uuid.UUID) -> None:
+        response = await self._claim(response_id)
+        if response is None:
+            return
+
+        # Reserve scratch space for the job's intermediates before writing any
+        upload = (response.processing_metadata or {}).get("upload", {})
+        has_media = bool(
+            response.source_path
+            or upload.get("storage_key")
+            or (response.processing_metadata or {}).get("video_key")
+        )
+        input_size = upload.get("size") or self.video_service.max_file_size
+        reserve_bytes = int(input_size * settings.SCRATCH_JOB_SIZE_FACTOR) if has_media else 0
+        async with scratch.workspace(self._job_name(response_id), reserve_bytes) as workspace:
+            await self._process(response, workspace)
+
+    @staticmethod
+    def _discard_source(source_path: Optional[Path], workspace: Workspace) -> None:
+        """Delete an ingested upload once nothing needs it; downloads go with the workspace"""
+        if source_path and source_path.exists() and workspace.directory not in source_path.parents:
+            scratch.adjust_shared(-source_path.stat().st_size)
+            source_path.unlink()
+
+    async def _discard_raw_upload(self, storage_key: str) -> None:
+        """Delete a direct-to-storage upload once its processed video is stored"""
+        try:
+            await self.storage_service.delete_file(storage_key)
+        except Exception as e:
+            logger.error(f"Error deleting raw upload {storage_key}: {str(e)}")
+
+    async def _process(self, response: models.Response, workspace: Workspace) -> None:
+        response_id = response.id
+        source_path = Path(response.source_path) if response.source_path else None
+        compressed_video = None
+        speech_audio = None
+        metadata: Dict[str, Any] = dict(response.processing_metadata or {})
+        video_url = response.video_url
+        video_key = metadata.get("video_key")
+        storage_key = metadata.get("upload", {}).get("storage_key")
+        local_video = None
+        hls_task = None
+        previews_task = None
+        try:
+            # Direct-to-storage uploads are fetched once and then processed like local ones
+            if not source_path and storage_key:
+                source_path = workspace.path(f"source{Path(storage_key).suffix}")
+                await self.storage_service.download_file(storage_key, source_path)
+
+            # Processing: compressed (or remuxed) and stored; responses whose video
+            # is already stored (a retry after a failed transcription) skip to
+            # transcription from a fresh copy of it
+            if source_path:
+                prepared = self._live_encode(metadata.pop("live_encode", None))
+                if prepared is None:
+                    prepared = await self.video_service.prepare_video(source_path, workspace=workspace)
+                compressed_video = prepared["path"]
+                speech_audio = prepared["audio_path"]
+                metadata["encode"] = {"mode": prepared["mode"], "reason": prepared["reason"]}
+                source = prepared["probe"]
+                if prepared["mode"] == "remux" and source and source["duration"] is not None:
+                    # A stream copy has the source's properties; no need to probe it again
+                    metadata["video"] = {**source, "size": compressed_video.stat().st_size}
+                else:
+                    metadata["video"] = await self.video_service.get_video_metadata(compressed_video)
+                    if source:
+                        metadata["encode"]["source"] = source
+                # Streamed WebM doesn't declare its duration, so it is only known
+                # now; checked before anything is stored for the answer
+                self.video_service.check_duration(metadata["video"]["duration"])
+
+                storage_result = await self.storage_service.upload_file(
+                    compressed_video,
+                    f"recordings/{response.interview_id}/"
+                )
+                video_url = storage_result["url"]
+                video_key = metadata["video_key"] = storage_result["key"]
+                local_video = compressed_video
+                if storage_key:
+                    # The raw upload is superseded; a retry works from the stored video
+                    metadata["upload"] = {k: v for k, v in metadata["upload"].items() if k != "storage_key"}
+                if prepared["mode"] == "transcode":
+                    transcode_scheduler.record_media_seconds(metadata["video"]["duration"])
+            elif video_key:
+                local_video = workspace.path(f"stored{Path(video_key).suffix}")
+                await self.storage_service.download_file(video_key, local_video)
+
+            await self._update(
+                response_id,
+                video_url=video_url,
+                processing_metadata=metadata,
+                source_path=None,
+                status=ResponseStatus.TRANSCRIBING.value,
+                transcribing_started_at=datetime.now(UTC),
+                **self._media_columns(metadata.get("video"))
+            )
+            # The processed video is stored and recorded; only now is the original expendable
+            self._discard_source(source_path, workspace)
+            if storage_key:
+                await self._discard_raw_upload(storage_key)
+
+            # HLS packaging is local work and runs while transcription waits on the API
+            if local_video and settings.HLS_ENABLED and "hls" not in metadata:
+                remuxed = metadata.get("encode", {}).get("mode") == "remux"
+                hls_task = asyncio.create_task(
+                    self._publish_hls(response, local_video, metadata["video"], remuxed, workspace)
+                )
+            if local_video and settings.PREVIEWS_ENABLED and "sprite" not in metadata:
+                previews_task = asyncio.create_task(
+                    self._publish_previews(response, local_video, metadata["video"], workspace)
+                )
+
+            # Transcribing: from the speech track written alongside the encode when
+            # there is one, otherwise from the local copy of the stored video
+            if speech_audio:
+                transcription = await self.transcription_service.transcribe_audio(speech_audio)
+            elif local_video:
+                transcription = await self.transcription_service.transcribe_audio(local_video)
+            else:
+                # Rows stored before their video key was recorded
+                transcription = await self.transcription_service.transcribe_video(video_url)
+
+            completed: Dict[str, Any] = {}
+            if hls_task:
+                hls = await hls_task
+                if hls:
+                    metadata["hls"] = hls
+                    completed["processing_metadata"] = metadata
+                    completed["hls_url"] = (
+                        f"{settings.BACKEND_URL}{settings.API_V1_STR}/recordings/{response_id}/hls.m3u8"
+                    )
+            if previews_task:
+                previews = await previews_task
+                if previews:
+                    metadata["sprite"] = previews.pop("sprite_info")
+                    completed["processing_metadata"] = metadata
+                    completed.update(previews)
+
+            await self._complete(response_id, transcription, **completed)
+            self.completed += 1
+            logger.info(f"Recording {response_id} processed")
+
+        except TranscodeQueueTimeout as e:
+            # The encoders are saturated; nothing is wrong with the recording itself
+            self.requeued += 1
+            logger.warning(f"Requeueing recording {response_id}: {str(e)}")
+            await self._update(response_id, status=ResponseStatus.PENDING.value)
+            asyncio.get_running_loop().call_later(
+                settings.TRANSCODE_REQUEUE_DELAY_SECONDS, self.enqueue, response_id
+            )
+
+        except RecordingTooLong as e:
+            # A retry would be rejected again, so nothing uploaded for it is kept
+            self.failed += 1
+            logger.warning(f"Rejected recording {response_id}: {e.detail}")
+            if storage_key:
+                metadata["upload"] = {k: v for k, v in metadata["upload"].items() if k != "storage_key"}
+            await self._update(
+                response_id,
+                status=ResponseStatus.FAILED.value,
+                error=str(e),
+                failed_at=datetime.now(UTC),
+                source_path=None,
+                processing_metadata=metadata
+            )
+            self._discard_source(source_path, workspace)
+            if storage_key:
+                await self._discard_raw_upload(storage_key)
+
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error processing recording {response_id}: {str(e)}")
+            await self._update(
+                response_id,
+                status=ResponseStatus.FAILED.value,
+                error=str(e),
+                failed_at=datetime.now(UTC)
+            )
+
+        finally:
+            side_tasks = [t for t in (hls_task, previews_task) if t and not t.done()]
+            for task in side_tasks:
+                task.cancel()
+            await asyncio.gather(*side_tasks, return_exceptions=True)
+            # The workspace goes with the job; live outputs are shared files. The
+            # ingested source is kept on failure and cancellation so the row can be
+            # retried (or requeued once stale) without the candidate uploading again
+            for temp_file in (compressed_video, speech_audio):
+                if temp_file and temp_file.exists() and workspace.directory not in temp_file.parents:
+                    temp_file.unlink()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report queue depth and outcomes"""
+        return {
+            "queued": self._queue.qsize(),
+            "active": self.active,
+            "workers": self.concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "requeued": self.requeued
+        }
+
+recording_pipeline = RecordingPipeline()
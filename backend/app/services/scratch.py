@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Set, Callable, Awaitable
+from fastapi import HTTPException
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Workspace:
+    """Private scratch directory for one job, removed when the job ends"""
+
+    def __init__(self, name: str, directory: Path, fast_directory: Optional[Path]):
+        # The job name, e.g. "response_42"; also keys the job's encode progress
+        self.name = name
+        self.directory = directory
+        self.fast_directory = fast_directory
+
+    def path(self, name: str) -> Path:
+        """Location for a large intermediate (encodes, downloads, segments)"""
+        return self.directory / name
+
+    def small_path(self, name: str) -> Path:
+        """Location for a small intermediate; on tmpfs when one is configured"""
+        return (self.fast_directory or self.directory) / name
+
+    def cleanup(self) -> None:
+        for directory in (self.directory, self.fast_directory):
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+
+class ScratchSpace:
+    """Owns every temporary media file the backend writes.
+
+    Jobs get their own workspace and reserve an estimate of the bytes they
+    will write; reservations wait while the global quota is exhausted.
+    Long-lived shared directories (ingested uploads, live spools, resumable
+    uploads) are swept periodically, sparing files that rows still need, and
+    their measured size counts against the same quota.
+    """
+
+    def __init__(self):
+        self.root = Path(settings.SCRATCH_DIR)
+        self.fast_root = Path(settings.SCRATCH_TMPFS_DIR) if settings.SCRATCH_TMPFS_DIR else None
+        self.quota = settings.SCRATCH_QUOTA_BYTES
+        self.max_age = settings.SCRATCH_MAX_AGE_HOURS * 3600
+        self.reserved = 0
+        self.shared_usage = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._active: Set[str] = set()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._in_use: Optional[Callable[[], Awaitable[Set[Path]]]] = None
+        self.waits = 0
+        self.swept_files = 0
+        self.swept_bytes = 0
+
+    @property
+    def jobs_root(self) -> Path:
+        return self.root / "jobs"
+
+    def dir(self, name: str) -> Path:
+        """Shared directory for files that outlive a single job"""
+        path = self.root / name
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @property
+    def available(self) -> int:
+        return self.quota - self.reserved - self.shared_usage
+
+    def ensure_room(self, nbytes: int) -> None:
+        """Refuse new shared files (e.g. uploads) that would overrun the quota"""
+        if nbytes > self.available:
+            raise HTTPException(status_code=507, detail="Server is out of processing space, try again later")
+
+    def adjust_shared(self, delta: int) -> None:
+        """Account files added to or removed from shared directories between sweeps"""
+        self.shared_usage = max(0, self.shared_usage + delta)
+
+    def keep_in_use(self, provider: Callable[[], Awaitable[Set[Path]]]) -> None:
+        """Register a callback naming shared files still needed, which are never swept"""
+        self._in_use = provider
+
+    def _cond(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def reserve(self, nbytes: int) -> None:
+        """Wait until nbytes fit in the quota; an oversized job runs alone rather than never"""
+        async with self._cond():
+            if not (nbytes <= self.available or self.reserved == 0):
+                self.waits += 1
+                logger.info(f"Waiting for {nbytes} bytes of scratch space ({self.available} available)")
+            await self._cond().wait_for(lambda: nbytes <= self.available or self.reserved == 0)
+            self.reserved += nbytes
+
+    async def release(self, nbytes: int) -> None:
+        async with self._cond():
+            self.reserved -= nbytes
+            self._cond().notify_all()
+
+    @asynccontextmanager
+    async def workspace(self, name: str, reserve_bytes: int = 0):
+        """Reserve space, create a job directory and remove it afterwards"""
+        await self.reserve(reserve_bytes)
+        token = f"{name}_{os.urandom(6).hex()}"
+        workspace = Workspace(
+            name,
+            self.jobs_root / token,
+            self.fast_root / token if self.fast_root else None
+        )
+        self._active.add(token)
+        try:
+            for directory in (workspace.directory, workspace.fast_directory):
+                if directory:
+                    directory.mkdir(parents=True)
+            yield workspace
+        finally:
+            self._active.discard(token)
+            workspace.cleanup()
+            await self.release(reserve_bytes)
+
+    def sweep(
+        self,
+        max_age: Optional[float] = None,
+        directory: Optional[Path] = None,
+        keep: Optional[Set[Path]] = None
+    ) -> int:
+        """Delete files older than max_age and job directories left by a crash.
+
+        Limited to one shared directory when given; resolved paths in keep are
+        left alone whatever their age. Returns bytes freed.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        keep = keep or set()
+        cutoff = time.time() - max_age
+        freed = 0
+
+        if directory:
+            roots = [directory]
+        elif self.root.exists():
+            roots = [p for p in self.root.iterdir() if p.is_dir() and p != self.jobs_root]
+        else:
+            roots = []
+
+        for root in roots:
+            for path in root.rglob("*"):
+                try:
+                    stat = path.stat()
+                    if path.is_file() and stat.st_mtime < cutoff and path.resolve() not in keep:
+                        path.unlink()
+                        freed += stat.st_size
+                        self.swept_files += 1
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.error(f"Error sweeping {path}: {str(e)}")
+
+        if directory is None:
+            for jobs_root in (self.jobs_root, self.fast_root):
+                if not jobs_root or not jobs_root.exists():
+                    continue
+                for path in jobs_root.iterdir():
+                    if path.name not in self._active and path.stat().st_mtime < cutoff:
+                        freed += self._size(path)
+                        shutil.rmtree(path, ignore_errors=True)
+
+        self.swept_bytes += freed
+        return freed
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        total = 0
+        for child in path.rglob("*"):
+            try:
+                if child.is_file():
+                    total += child.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def measure(self) -> int:
+        """Recount the bytes held in shared directories"""
+        if not self.root.exists():
+            self.shared_usage = 0
+        else:
+            self.shared_usage = sum(
+                self._size(p) for p in self.root.iterdir()
+                if p.is_dir() and p != self.jobs_root
+            )
+        return self.shared_usage
+
+    async def start(self) -> None:
+        """Sweep now and then every SCRATCH_SWEEP_INTERVAL_SECONDS"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._run_sweeper())
+
+    async def stop(self) -> None:
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    async def _run_sweeper(self) -> None:
+        while True:
+            try:
+                # If the files in use can't be listed, nothing shared is swept this round
+                keep = await self._in_use() if self._in_use else set()
+                freed = await asyncio.to_thread(self.sweep, None, None, keep)
+                await asyncio.to_thread(self.measure)
+                if freed:
+                    logger.info(f"Scratch sweep freed {freed} bytes")
+                # Measured usage may have dropped below what waiting jobs need
+                async with self._cond():
+                    self._cond().notify_all()
+            except Exception as e:
+                logger.error(f"Scratch sweep failed: {str(e)}")
+            await asyncio.sleep(settings.SCRATCH_SWEEP_INTERVAL_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report quota use and sweeper activity"""
+        return {
+            "quota_bytes": self.quota,
+            "reserved_bytes": self.reserved,
+            "shared_bytes": self.shared_usage,
+            "available_bytes": self.available,
+            "active_jobs": len(self._active),
+            "reservation_waits": self.waits,
+            "swept_files": self.swept_files,
+            "swept_bytes": self.swept_bytes,
+            "tmpfs": str(self.fast_root) if self.fast_root else None
+        }
+
+scratch = ScratchSpace()
@@ -1,23 +1,37 @@
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
 from ..core.config import settings
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
 import mimetypes
+import shutil
+import asyncio
+import os
 from datetime import datetime, timedelta, UTC
+from .local_uploads import LocalUploadStore
+from .scratch import scratch
 
 logger = logging.getLogger(__name__)
 
+# HLS renditions; not in every platform's mime.types
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/iso.segment", ".m4s")
+
 class StorageService:
     def __init__(self):
         self.s3_client = None
+        self.presign_client = None
         self.bucket_name = settings.AWS_BUCKET_NAME
-        self.max_upload_size = 500 * 1024 * 1024  # 500MB
+        self.max_upload_size = settings.RECORDING_MAX_UPLOAD_BYTES
         self.default_expiry = 3600  # 1 hour
         self.temp_dir = Path("temp_storage")
         self.temp_dir.mkdir(exist_ok=True)
+        # Scratch space, not temp_storage: partial uploads are never served as media,
+        # and they count against the scratch quota like every other upload
+        self.local_uploads = LocalUploadStore(scratch.dir("uploads"), settings.LOCAL_UPLOAD_PART_SIZE)
 
     def _ensure_client(self) -> bool:
         """Ensure S3 client is initialized"""
@@ -31,12 +45,25 @@ class StorageService:
                 return False
             
             try:
+                client_kwargs = {
+                    'aws_access_key_id': settings.AWS_ACCESS_KEY_ID,
+                    'aws_secret_access_key': settings.AWS_SECRET_ACCESS_KEY,
+                    'region_name': settings.AWS_REGION
+                }
+                if settings.AWS_S3_ENDPOINT_URL:
+                    # S3-compatible stores are addressed by path, not bucket subdomain
+                    client_kwargs['config'] = Config(signature_version='s3v4', s3={'addressing_style': 'path'})
                 self.s3_client = boto3.client(
                     's3',
-                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                    region_name=settings.AWS_REGION
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL or None,
+                    **client_kwargs
                 )
+                # Signing is offline, so this client only needs the hostname browsers use
+                public_endpoint = settings.AWS_S3_PUBLIC_ENDPOINT_URL
+                if public_endpoint and public_endpoint != settings.AWS_S3_ENDPOINT_URL:
+                    self.presign_client = boto3.client('s3', endpoint_url=public_endpoint, **client_kwargs)
+                else:
+                    self.presign_client = self.s3_client
             except Exception as e:
                 logger.error(f"Failed to initialize S3 client: {str(e)}")
                 return False
@@ -87,6 +114,114 @@ class StorageService:
             logger.error(f"Unexpected error uploading file: {str(e)}")
             raise HTTPException(status_code=500, detail="Internal server error during file upload")
 
+    @property
+    def is_local(self) -> bool:
+        """True when files are kept on local disk because S3 is not configured"""
+        return not self._ensure_client()
+
+    def local_path(self, key: str) -> Path:
+        """Resolve a storage key to a local file, refusing paths outside the storage root"""
+        root = self.temp_dir.resolve()
+        path = (root / key).resolve()
+        if root not in path.parents:
+            raise HTTPException(status_code=404, detail="File not found")
+        return path
+
+    def public_url(self, key: str) -> str:
+        """Stable, cacheable URL served by the media route for a storage key"""
+        return f"{settings.BACKEND_URL}{settings.API_V1_STR}/media/{key}"
+
+    def playback_url(self, key: str) -> str:
+        """URL a client can fetch directly: presigned on S3, the media route locally"""
+        if not self._ensure_client():
+            return self.public_url(key)
+        return self.generate_presigned_url(key)
+
+    async def read_file(self, key: str) -> bytes:
+        """Read a small stored object (playlists, manifests) into memory"""
+        try:
+            if not self._ensure_client():
+                local_path = self.local_path(key)
+                if not local_path.is_file():
+                    raise HTTPException(status_code=404, detail="File not found")
+                return await asyncio.to_thread(local_path.read_bytes)
+
+            response = await asyncio.to_thread(
+                self.s3_client.get_object,
+                Bucket=self.bucket_name,
+                Key=key
+            )
+            return await asyncio.to_thread(response['Body'].read)
+
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                raise HTTPException(status_code=404, detail="File not found")
+            logger.error(f"Error reading file from S3: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to read file from storage")
+
+    async def read_head(self, key: str, size: int = 64) -> Tuple[bytes, int]:
+        """The first bytes of a stored object, to sniff its format, and its total size"""
+        try:
+            if not self._ensure_client():
+                local_path = self.local_path(key)
+                if not local_path.is_file():
+                    raise HTTPException(status_code=404, detail="File not found")
+
+                def read() -> Tuple[bytes, int]:
+                    with open(local_path, "rb") as f:
+                        return f.read(size), local_path.stat().st_size
+                return await asyncio.to_thread(read)
+
+            response = await asyncio.to_thread(
+                self.s3_client.get_object,
+                Bucket=self.bucket_name,
+                Key=key,
+                Range=f"bytes=0-{size - 1}"
+            )
+            head = await asyncio.to_thread(response['Body'].read)
+            # "bytes 0-63/12345"
+            total = int(response['ContentRange'].rsplit("/", 1)[1]) if response.get('ContentRange') else len(head)
+            return head, total
+
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                raise HTTPException(status_code=404, detail="File not found")
+            logger.error(f"Error reading file from S3: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to read file from storage")
+
+    async def upload_file_to_key(
+        self,
+        file_path: Path,
+        key: str,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Upload a file under an exact key, streaming from disk"""
+        content_type = content_type or mimetypes.guess_type(str(file_path))[0] or 'application/octet-stream'
+        try:
+            if not self._ensure_client():
+                local_path = self.local_path(key)
+                local_path.parent.mkdir(parents=True, exist_ok=True)
+                await asyncio.to_thread(shutil.copyfile, file_path, local_path)
+                return {"url": self.public_url(key), "key": key, "content_type": content_type}
+
+            extra_args = {'ContentType': content_type}
+            if cache_control:
+                extra_args['CacheControl'] = cache_control
+            # boto3 streams from disk with a multipart transfer for large files
+            await asyncio.to_thread(
+                self.s3_client.upload_file,
+                str(file_path),
+                self.bucket_name,
+                key,
+                ExtraArgs=extra_args
+            )
+            return {"url": self.public_url(key), "key": key, "content_type": content_type}
+
+        except ClientError as e:
+            logger.error(f"AWS S3 error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to upload file to storage")
+
     def generate_presigned_url(
         self,
         s3_key: str,
@@ -100,7 +235,7 @@ class StorageService:
 
         try:
             expiry = expiry or self.default_expiry
-            url = self.s3_client.generate_presigned_url(
+            url = self.presign_client.generate_presigned_url(
                 'get_object',
                 Params={
                     'Bucket': self.bucket_name,
@@ -133,6 +268,36 @@ class StorageService:
             logger.error(f"Error deleting file from S3: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to delete file from storage")
 
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every object under a key prefix; returns how many were deleted"""
+        try:
+            if not self._ensure_client():
+                directory = self.local_path(prefix)
+                if not directory.is_dir():
+                    return 0
+                count = sum(1 for p in directory.rglob("*") if p.is_file())
+                await asyncio.to_thread(shutil.rmtree, directory, True)
+                return count
+
+            def delete_all() -> int:
+                deleted = 0
+                paginator = self.s3_client.get_paginator('list_objects_v2')
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                    objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+                    if objects:
+                        # A listing page holds at most 1000 keys, the delete_objects limit
+                        self.s3_client.delete_objects(
+                            Bucket=self.bucket_name,
+                            Delete={'Objects': objects, 'Quiet': True}
+                        )
+                        deleted += len(objects)
+                return deleted
+            return await asyncio.to_thread(delete_all)
+
+        except ClientError as e:
+            logger.error(f"Error deleting {prefix} from S3: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to delete files from storage")
+
     async def get_file_metadata(self, s3_key: str) -> Dict[str, Any]:
         """Get metadata for a file in storage"""
         try:
@@ -168,19 +333,35 @@ class StorageService:
         self,
         file_name: str,
         content_type: str,
-        key_prefix: str = "recordings/"
-    ) -> Dict[str, str]:
+        key_prefix: str = "recordings/",
+        file_size: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Initialize a multipart upload"""
-        if not self._ensure_client():
+        timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
+        s3_key = f"{key_prefix}{timestamp}_{Path(file_name).name}"
+
+        if file_size is not None and file_size > self.max_upload_size:
             raise HTTPException(
-                status_code=501,
-                detail="Multipart uploads not supported in local storage mode"
+                status_code=413,
+                detail=f"File too large. Maximum size: {self.max_upload_size / 1024 / 1024}MB"
             )
 
-        try:
-            timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
-            s3_key = f"{key_prefix}{timestamp}_{file_name}"
+        if not self._ensure_client():
+            # Resumable local upload; the size is needed to preallocate the file
+            if file_size is None or file_size <= 0:
+                raise HTTPException(status_code=400, detail="file_size is required for local uploads")
+            scratch.ensure_room(file_size)
+            state = await asyncio.to_thread(self.local_uploads.create, s3_key, file_size, content_type)
+            # The data file is preallocated, so the space is taken now
+            scratch.adjust_shared(file_size)
+            return {
+                "upload_id": state["upload_id"],
+                "key": s3_key,
+                "part_size": state["part_size"],
+                "part_count": self.local_uploads.part_count(state)
+            }
 
+        try:
             response = self.s3_client.create_multipart_upload(
                 Bucket=self.bucket_name,
                 Key=s3_key,
@@ -213,7 +394,7 @@ class StorageService:
             )
 
         try:
-            url = self.s3_client.generate_presigned_url(
+            url = self.presign_client.generate_presigned_url(
                 'upload_part',
                 Params={
                     'Bucket': self.bucket_name,
@@ -228,6 +409,80 @@ class StorageService:
             logger.error(f"Error generating upload URL: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to generate upload URL")
 
+    async def generate_presigned_upload_urls(
+        self,
+        s3_key: str,
+        upload_id: str,
+        part_numbers: List[int]
+    ) -> Dict[int, str]:
+        """Presign a batch of part uploads so the client can send them in parallel"""
+        if not all(1 <= n <= 10000 for n in part_numbers):
+            raise HTTPException(status_code=400, detail="Part numbers must be between 1 and 10000")
+        # Each URL is signed locally, there is no request to S3 per part
+        return {
+            n: await self.generate_presigned_upload_url(s3_key, upload_id, n)
+            for n in part_numbers
+        }
+
+    async def download_file(self, key: str, destination: Path) -> Path:
+        """Fetch a stored object to a local file, streaming from S3"""
+        try:
+            if not self._ensure_client():
+                await asyncio.to_thread(shutil.copyfile, self.local_path(key), destination)
+                return destination
+
+            await asyncio.to_thread(
+                self.s3_client.download_file,
+                self.bucket_name,
+                key,
+                str(destination)
+            )
+            return destination
+
+        except ClientError as e:
+            logger.error(f"Error downloading file from S3: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to download file from storage")
+
+    async def write_upload_part(
+        self,
+        upload_id: str,
+        part_number: int,
+        chunks: AsyncIterator[bytes],
+        sha256: str
+    ) -> Dict[str, Any]:
+        """Receive one part of a local resumable upload"""
+        if self._ensure_client():
+            raise HTTPException(
+                status_code=501,
+                detail="Parts are uploaded directly to S3 with presigned URLs"
+            )
+        state = await self.local_uploads.write_part(upload_id, part_number, chunks, sha256)
+        return self._upload_status(state)
+
+    async def get_upload_status(self, upload_id: str) -> Dict[str, Any]:
+        """Which parts of a local resumable upload have arrived"""
+        if self._ensure_client():
+            raise HTTPException(
+                status_code=501,
+                detail="Upload status is only tracked in local storage mode"
+            )
+        return self._upload_status(self.local_uploads.load(upload_id))
+
+    def _upload_status(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "upload_id": state["upload_id"],
+            "key": state["key"],
+            "size": state["size"],
+            "part_size": state["part_size"],
+            "part_count": self.local_uploads.part_count(state),
+            "received_parts": sorted(int(n) for n in state["parts"]),
+            "offset": self.local_uploads.received_offset(state)
+        }
+
+    def expire_uploads(self) -> int:
+        """Discard local resumable uploads abandoned by their clients"""
+        return self.local_uploads.expire(settings.LOCAL_UPLOAD_EXPIRY_HOURS)
+
     async def complete_multipart_upload(
         self,
         s3_key: str,
@@ -236,10 +491,17 @@ class StorageService:
     ) -> Dict[str, str]:
         """Complete a multipart upload"""
         if not self._ensure_client():
-            raise HTTPException(
-                status_code=501,
-                detail="Multipart uploads not supported in local storage mode"
-            )
+            if self.local_uploads.load(upload_id)["key"] != s3_key:
+                raise HTTPException(status_code=400, detail="Key does not match upload")
+            # Assembled next to the other ingested uploads; the pipeline stores the
+            # processed video, so the raw upload never goes into storage
+            destination = scratch.dir("videos") / f"upload_{os.urandom(8).hex()}{Path(s3_key).suffix.lower()}"
+            await self.local_uploads.complete(upload_id, destination)
+            return {
+                "key": s3_key,
+                "etag": "",
+                "path": str(destination)
+            }
 
         try:
             response = self.s3_client.complete_multipart_upload(
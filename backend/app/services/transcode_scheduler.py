@@ -0,0 +1,133 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Deque
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower values are granted a slot first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+THROUGHPUT_WINDOW_SECONDS = 300
+
+class TranscodeQueueTimeout(Exception):
+    """No encode slot came free within max_wait; the job can be tried again later"""
+
+class TranscodeScheduler:
+    """Limits concurrent ffmpeg encodes to what the CPU can sustain and
+    assigns each encode a fixed thread budget instead of -threads 0"""
+
+    def __init__(self):
+        cpus = os.cpu_count() or 1
+        self.threads_per_job = settings.TRANSCODE_THREADS_PER_JOB or max(1, min(4, cpus // 2))
+        self.max_concurrent = settings.TRANSCODE_MAX_CONCURRENT or max(1, cpus // self.threads_per_job)
+        self.max_wait = settings.TRANSCODE_MAX_WAIT_SECONDS
+        self._active = 0
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.wait_seconds_total = 0.0
+        self.encode_seconds_total = 0.0
+        self.media_seconds_total = 0.0
+        self._recent: Deque[float] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for w in self._waiters if not w[-1].done())
+
+    async def _acquire(self, priority: int) -> None:
+        if self._active < self.max_concurrent and self.queue_depth == 0:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), future])
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up on it
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise TranscodeQueueTimeout(f"No transcoding slot within {self.max_wait:g}s")
+            raise
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free now, for encodes that can't wait (live streams)"""
+        if self._active < self.max_concurrent and self.queue_depth == 0:
+            self._active += 1
+            return True
+        return False
+
+    def release(self) -> None:
+        """Return a slot taken with try_acquire"""
+        self._release()
+
+    def _release(self) -> None:
+        """Hand the slot to the highest-priority live waiter, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL):
+        """Wait for an encode slot; yields the ffmpeg thread count to use"""
+        queued_at = time.monotonic()
+        await self._acquire(priority)
+        started_at = time.monotonic()
+        self.wait_seconds_total += started_at - queued_at
+        try:
+            yield self.threads_per_job
+            self.completed += 1
+            self._recent.append(time.monotonic())
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.encode_seconds_total += time.monotonic() - started_at
+            self._release()
+
+    def record_media_seconds(self, seconds: float) -> None:
+        """Account the duration of media produced by a finished encode"""
+        self.media_seconds_total += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Report queue depth, utilisation and encode throughput"""
+        cutoff = time.monotonic() - THROUGHPUT_WINDOW_SECONDS
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+
+        finished = self.completed + self.failed
+        return {
+            "max_concurrent": self.max_concurrent,
+            "threads_per_job": self.threads_per_job,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": self.wait_seconds_total / finished if finished else 0.0,
+            "avg_encode_seconds": self.encode_seconds_total / finished if finished else 0.0,
+            "jobs_per_minute": len(self._recent) * 60 / THROUGHPUT_WINDOW_SECONDS,
+            "realtime_factor": (
+                self.media_seconds_total / self.encode_seconds_total
+                if self.encode_seconds_total else 0.0
+            )
+        }
+
+transcode_scheduler = TranscodeScheduler()
@@ -0,0 +1,141 @@
+import base64
+import json
+import logging
+import re
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select, func, or_, and_, literal, Float, cast
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..db import models
+
+logger = logging.getLogger(__name__)
+
+# Must match the configuration of the generated responses.transcription_tsv column
+SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=12, "
+    "MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+def search_terms(q: str) -> str:
+    """The words of a web-search query, without quotes, OR or -exclusions"""
+    words = []
+    for token in q.replace('"', " ").split():
+        if token == "OR" or token.startswith("-"):
+            continue
+        words.append(token)
+    return " ".join(words)
+
+def encode_cursor(rank: float, response_id: uuid.UUID) -> str:
+    """Opaque position after the last result of a page"""
+    return base64.urlsafe_b64encode(json.dumps([rank, str(response_id)]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, uuid.UUID]:
+    try:
+        rank, response_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), uuid.UUID(response_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+class TranscriptSearch:
+    """Ranked full-text search over answer transcripts.
+
+    Matching uses the GIN-indexed tsvector column (web-search syntax:
+    quoted phrases, OR, -exclusions); fuzzy mode also accepts trigram word
+    matches on the query's words so misspelled terms still find answers.
+    Only the SEARCH_MAX_CANDIDATES most recent matches are ranked, which
+    bounds the work a broad query does. Pages are keyset paginated on
+    (rank, id) and snippets are only highlighted for the rows returned.
+    """
+
+    def build_query(
+        self,
+        q: str,
+        interview_status: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        fuzzy: bool = False,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Select:
+        Response, Interview = models.Response, models.Interview
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        # Normalization 32 scales ranks into [0, 1)
+        rank = func.ts_rank_cd(Response.transcription_tsv, query, 32)
+        match = Response.transcription_tsv.op("@@")(query)
+        terms = search_terms(q)
+        if fuzzy and terms:
+            rank = rank + func.word_similarity(terms, Response.transcription)
+            match = or_(match, literal(terms).op("<%")(Response.transcription))
+        rank = cast(rank, Float)
+
+        candidates = (
+            select(Response.id)
+            .join(Interview, Interview.id == Response.interview_id)
+            .where(match)
+        )
+        if interview_status:
+            candidates = candidates.where(Interview.status == interview_status)
+        if created_from:
+            candidates = candidates.where(Response.created_at >= created_from)
+        if created_to:
+            candidates = candidates.where(Response.created_at < created_to)
+        # Fixed order, so every page of a query ranks the same candidates
+        candidates = (
+            candidates
+            .order_by(Response.created_at.desc(), Response.id)
+            .limit(settings.SEARCH_MAX_CANDIDATES)
+            .subquery()
+        )
+
+        ranked = (
+            select(Response.id.label("id"), rank.label("rank"))
+            .join(candidates, candidates.c.id == Response.id)
+        )
+        if cursor:
+            after_rank, after_id = decode_cursor(cursor)
+            ranked = ranked.where(or_(rank < after_rank, and_(rank == after_rank, Response.id > after_id)))
+        # One extra row tells whether there is another page
+        ranked = ranked.order_by(rank.desc(), Response.id).limit(limit + 1).subquery()
+
+        return (
+            select(
+                ranked.c.id,
+                ranked.c.rank,
+                Response.interview_id,
+                Response.question_id,
+                Response.created_at,
+                Interview.status.label("interview_status"),
+                func.ts_headline(SEARCH_CONFIG, Response.transcription, query, HEADLINE_OPTIONS).label("snippet")
+            )
+            .join(Response, Response.id == ranked.c.id)
+            .join(Interview, Interview.id == Response.interview_id)
+            .order_by(ranked.c.rank.desc(), ranked.c.id)
+        )
+
+    async def search(self, db: AsyncSession, limit: int = 20, **filters) -> Dict[str, Any]:
+        """One page of results and the cursor for the next, None on the last page"""
+        rows = (await db.execute(self.build_query(limit=limit, **filters))).all()
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1].rank, page[-1].id) if len(rows) > limit else None
+        return {
+            "results": [
+                {
+                    "response_id": row.id,
+                    "interview_id": row.interview_id,
+                    "question_id": row.question_id,
+                    "interview_status": row.interview_status,
+                    "created_at": row.created_at,
+                    "rank": row.rank,
+                    "snippet": row.snippet
+                }
+                for row in page
+            ],
+            "next_cursor": next_cursor
+        }
+
+transcript_search = TranscriptSearch()
@@ -0,0 +1,85 @@
+import logging
+import uuid
+from typing import Optional, Dict, Any, List
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db import models
+
+logger = logging.getLogger(__name__)
+
+def _ms(seconds: float) -> int:
+    return int(round(seconds * 1000))
+
+def pack_segments(response_id: uuid.UUID, transcription: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rows for transcript_segments: integer millisecond times, each segment's
+    words packed as [[start_ms, end_ms, word], ...] (None when there are none)"""
+    segments = sorted(transcription.get("segments") or [], key=lambda s: s["start"])
+    words = sorted(transcription.get("words") or [], key=lambda w: w["start"])
+    rows = []
+    w = 0
+    for seq, segment in enumerate(segments):
+        next_start = segments[seq + 1]["start"] if seq + 1 < len(segments) else float("inf")
+        packed = []
+        # Words belong to the segment they start in; anything before the first
+        # segment is attached to it
+        while w < len(words) and words[w]["start"] < next_start:
+            word = words[w]
+            packed.append([_ms(word["start"]), _ms(word["end"]), word["word"].strip()])
+            w += 1
+        rows.append({
+            "response_id": response_id,
+            "seq": seq,
+            "start_ms": _ms(segment["start"]),
+            "end_ms": _ms(segment["end"]),
+            "text": segment["text"].strip(),
+            "words": packed or None
+        })
+    return rows
+
+def unpack_segment(segment: models.TranscriptSegment, with_words: bool = True) -> Dict[str, Any]:
+    """API shape of a stored segment, times back in seconds"""
+    return {
+        "start": segment.start_ms / 1000,
+        "end": segment.end_ms / 1000,
+        "text": segment.text,
+        "words": [
+            {"start": start / 1000, "end": end / 1000, "word": word}
+            for start, end, word in segment.words
+        ] if with_words and segment.words else None
+    }
+
+class TranscriptStore:
+    """Timed transcript segments of each response, queryable by time range"""
+
+    async def save(self, db: AsyncSession, response_id: uuid.UUID, transcription: Dict[str, Any]) -> int:
+        """Replace a response's segments (reprocessing rewrites them); returns the count"""
+        rows = pack_segments(response_id, transcription)
+        await db.execute(
+            delete(models.TranscriptSegment).where(models.TranscriptSegment.response_id == response_id)
+        )
+        if rows:
+            await db.execute(models.TranscriptSegment.__table__.insert(), rows)
+        return len(rows)
+
+    async def overlapping(
+        self,
+        db: AsyncSession,
+        response_id: uuid.UUID,
+        start: float = 0.0,
+        end: Optional[float] = None
+    ) -> List[models.TranscriptSegment]:
+        """Segments that overlap [start, end) seconds, in order"""
+        query = (
+            select(models.TranscriptSegment)
+            .where(
+                models.TranscriptSegment.response_id == response_id,
+                models.TranscriptSegment.end_ms > _ms(start)
+            )
+            .order_by(models.TranscriptSegment.start_ms)
+        )
+        if end is not None:
+            query = query.where(models.TranscriptSegment.start_ms < _ms(end))
+        result = await db.execute(query)
+        return list(result.scalars())
+
+transcript_store = TranscriptStore()
@@ -1,45 +1,117 @@
-from openai import OpenAI
 import logging
+import re
+import shutil
 import tempfile
 import httpx
 from pathlib import Path
 from fastapi import HTTPException
 import asyncio
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import os
+import aiofiles
 from ..core.config import settings
+from .http_client import http_client_pool
+from .scratch import scratch
+from .encode_progress import parse_duration
+from .video_service import VideoService, SPEECH_AUDIO_ARGS
+from .transcription_backends import get_backend
+from .transcription_cache import transcription_cache
 
 logger = logging.getLogger(__name__)
 
+# Pauses quieter than this for at least this long are candidate cut points
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.4
+SILENCE_START = re.compile(rb"silence_start: (-?[\d.]+)")
+SILENCE_END = re.compile(rb"silence_end: (-?[\d.]+)")
+
+def parse_silences(log: bytes, duration: float) -> List[Tuple[float, float]]:
+    """(start, end) pauses from ffmpeg's silencedetect output"""
+    silences = []
+    start = None
+    for line in log.splitlines():
+        if match := SILENCE_START.search(line):
+            start = max(0.0, float(match.group(1)))
+        elif (match := SILENCE_END.search(line)) and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    if start is not None:
+        # Trailing silence runs to the end of the file
+        silences.append((start, duration))
+    return silences
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]], max_seconds: float) -> List[float]:
+    """Cut points splitting duration into chunks of at most max_seconds.
+
+    Each cut is the middle of the latest pause in the second half of the
+    window, so words are never split; only speech without any pause is cut
+    hard at the limit.
+    """
+    cuts = []
+    start = 0.0
+    while duration - start > max_seconds:
+        window_end = start + max_seconds
+        pauses = [
+            (s + e) / 2 for s, e in silences
+            if start + max_seconds / 2 < (s + e) / 2 <= window_end
+        ]
+        cut = max(pauses) if pauses else window_end
+        cuts.append(round(cut, 3))
+        start = cut
+    return cuts
+
+def stitch_transcripts(results: List[Dict[str, Any]], offsets: List[float]) -> Dict[str, Any]:
+    """Join chunk transcripts, shifting their timestamps back onto the full recording"""
+    return {
+        "text": " ".join(r["text"].strip() for r in results if r["text"].strip()),
+        "language": results[0]["language"],
+        "segments": [
+            {**segment, "start": segment["start"] + offset, "end": segment["end"] + offset}
+            for result, offset in zip(results, offsets)
+            for segment in result["segments"]
+        ],
+        "words": [
+            {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+            for result, offset in zip(results, offsets)
+            for word in result.get("words", [])
+        ]
+    }
+
 class TranscriptionService:
     def __init__(self):
-        self.client = None
+        self.backend = get_backend()
+        self.video_service = VideoService()
         self.supported_languages = ["en"]  # Add more languages as needed
-        self.temp_dir = Path("temp_transcriptions")
-        self.temp_dir.mkdir(exist_ok=True)
-
-    def _ensure_client(self):
-        """Ensure OpenAI client is initialized"""
-        if not self.client:
-            if not settings.OPENAI_API_KEY:
-                logger.warning("OpenAI API key not configured")
-                return False
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        return True
+        self.temp_dir = scratch.dir("transcriptions")
+        self.chunk_seconds = settings.TRANSCRIPTION_CHUNK_SECONDS
+        self.retries = settings.TRANSCRIPTION_CHUNK_RETRIES
+        self.retry_delay = 1  # seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.chunks_transcribed = 0
+        self.chunk_retries = 0
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.TRANSCRIPTION_MAX_PARALLEL)
+        return self._semaphore
 
     async def download_video(self, url: str) -> Path:
         """Download video from URL to temporary file"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url)
+            # Stream straight to disk over the shared connection pool
+            temp_file = self.temp_dir / f"video_{os.urandom(8).hex()}.mp4"
+            async with http_client_pool.client.stream(
+                "GET",
+                url,
+                timeout=http_client_pool.timeout("video_download")
+            ) as response:
                 response.raise_for_status()
+                async with aiofiles.open(temp_file, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        await f.write(chunk)
 
-                # Create temporary file
-                temp_file = self.temp_dir / f"video_{os.urandom(8).hex()}.mp4"
-                with open(temp_file, "wb") as f:
-                    f.write(response.content)
-
-                return temp_file
+            return temp_file
 
         except httpx.HTTPError as e:
             logger.error(f"Error downloading video: {str(e)}")
@@ -48,62 +120,142 @@ class TranscriptionService:
                 detail="Failed to download video for transcription"
             )
 
+    def _disabled_result(self, language: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not settings.ENABLE_TRANSCRIPTION:
+            logger.info("Transcription service is disabled")
+            return {"text": "", "language": language or "en", "segments": [], "words": []}
+
+        if not self.backend.available():
+            logger.warning(f"Transcription skipped - {self.backend.name} backend not available")
+            return {"text": "", "language": language or "en", "segments": [], "words": []}
+
+        return None
+
+    async def _transcribe_file(self, file_path: Path, language: Optional[str]) -> Dict[str, Any]:
+        return await self.backend.transcribe(
+            file_path,
+            language if language in self.supported_languages else None
+        )
+
+    async def _transcribe_chunk(self, file_path: Path, language: Optional[str]) -> Dict[str, Any]:
+        """One call under the parallelism cap, retried on its own if it fails"""
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._slots():
+                    result = await self._transcribe_file(file_path, language)
+                self.chunks_transcribed += 1
+                return result
+            except HTTPException as e:
+                if attempt == self.retries:
+                    raise
+                self.chunk_retries += 1
+                logger.warning(f"Transcribing {file_path.name} failed ({e.detail}), retrying")
+                await asyncio.sleep(self.retry_delay * (attempt + 1))
+
+    async def _split_at_silences(self, media_path: Path, chunk_dir: Path) -> List[Tuple[Path, float]]:
+        """Split audio into chunks at pauses; returns (chunk, start offset) pairs.
+
+        Audio that fits in one chunk, or that ffmpeg can't analyze, is
+        returned whole.
+        """
+        # Both runs go through _run_ffmpeg, so a stalled or cancelled split never
+        # leaves an orphaned ffmpeg behind
+        try:
+            returncode, log = await self.video_service._run_ffmpeg([
+                'ffmpeg', '-i', str(media_path),
+                '-map', '0:a:0',
+                '-af', f'silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}',
+                '-f', 'null', '-'
+            ], stage="silencedetect", log_lines=None)
+        except (OSError, HTTPException) as e:
+            logger.warning(f"Silence detection unavailable, transcribing {media_path.name} whole: {str(e)}")
+            return [(media_path, 0.0)]
+        duration = next(filter(None, map(parse_duration, log.splitlines())), None)
+        if returncode != 0 or duration is None or duration <= self.chunk_seconds:
+            return [(media_path, 0.0)]
+
+        cuts = plan_chunks(duration, parse_silences(log, duration), self.chunk_seconds)
+        # The speech track is already Opus and is cut without re-encoding; video is reduced to it
+        codec_args = ['-map', '0:a:0', '-c:a', 'copy'] if media_path.suffix == ".ogg" else SPEECH_AUDIO_ARGS
+        try:
+            returncode, stderr = await self.video_service._run_ffmpeg([
+                'ffmpeg', '-i', str(media_path),
+                *codec_args,
+                '-f', 'segment',
+                '-segment_format', 'ogg',
+                '-segment_times', ','.join(str(cut) for cut in cuts),
+                '-reset_timestamps', '1',
+                '-y', str(chunk_dir / 'chunk_%03d.ogg')
+            ], stage="split")
+        except HTTPException as e:
+            returncode, stderr = -1, str(e.detail).encode()
+        chunks = sorted(chunk_dir.glob('chunk_*.ogg'))
+        if returncode != 0 or len(chunks) != len(cuts) + 1:
+            logger.warning(f"Could not split {media_path.name}, transcribing it whole: {stderr.decode()[-500:]}")
+            return [(media_path, 0.0)]
+        return list(zip(chunks, [0.0] + cuts))
+
+    async def _transcribe_media(self, media_path: Path, language: Optional[str]) -> Dict[str, Any]:
+        """Transcribe through the cache, so audio already transcribed costs no backend call"""
+        language = language if language in self.supported_languages else None
+        key = await transcription_cache.fingerprint(media_path, f"{self.backend.identity}:{language or 'auto'}")
+        if key:
+            cached = await transcription_cache.get(key)
+            if cached is not None:
+                logger.info(f"Transcript of {media_path.name} served from cache")
+                return cached
+
+        transcription = await self._transcribe_chunked(media_path, language)
+        if key:
+            await transcription_cache.put(key, transcription)
+        return transcription
+
+    async def _transcribe_chunked(self, media_path: Path, language: Optional[str]) -> Dict[str, Any]:
+        """Transcribe long audio as parallel chunks stitched back together"""
+        chunk_dir = self.temp_dir / f"chunks_{os.urandom(8).hex()}"
+        chunk_dir.mkdir()
+        try:
+            chunks = await self._split_at_silences(media_path, chunk_dir)
+            results = await asyncio.gather(
+                *(self._transcribe_chunk(path, language) for path, _ in chunks),
+                return_exceptions=True
+            )
+            # Let every chunk finish or fail before giving up, so none is left running
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            if len(chunks) > 1:
+                logger.info(f"Transcribed {media_path.name} as {len(chunks)} chunks")
+            return stitch_transcripts(results, [offset for _, offset in chunks])
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    async def transcribe_audio(
+        self,
+        audio_path: Path,
+        language: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Transcribe a local speech track or video file; the caller owns the file"""
+        disabled = self._disabled_result(language)
+        if disabled:
+            return disabled
+        return await self._transcribe_media(audio_path, language)
+
     async def transcribe_video(
         self,
         video_url: str,
         language: Optional[str] = None
     ) -> Dict[str, Any]:
         """Transcribe video to text"""
-        if not settings.ENABLE_TRANSCRIPTION:
-            logger.info("Transcription service is disabled")
-            return {"text": "", "language": language or "en", "segments": []}
-
-        if not self._ensure_client():
-            logger.warning("Transcription skipped - OpenAI API key not configured")
-            return {"text": "", "language": language or "en", "segments": []}
+        disabled = self._disabled_result(language)
+        if disabled:
+            return disabled
 
         temp_file = None
         try:
             # Download video
             temp_file = await self.download_video(video_url)
-
-            # Transcribe using OpenAI's API
-            with open(temp_file, "rb") as audio_file:
-                transcription = await asyncio.to_thread(
-                    self.client.audio.transcriptions.create,
-                    file=audio_file,
-                    model="whisper-1",
-                    language=language if language in self.supported_languages else None,
-                    response_format="verbose_json"
-                )
-
-            # Process results
-            result = {
-                "text": transcription.text,
-                "language": transcription.language,
-                "segments": [
-                    {
-                        "start": segment.start,
-                        "end": segment.end,
-                        "text": segment.text
-                    }
-                    for segment in transcription.segments
-                ]
-            }
-
-            return result
-
-        except Exception as e:
-            logger.error(f"Error transcribing video: {str(e)}")
-            if isinstance(e, openai.APIError):
-                raise HTTPException(
-                    status_code=503,
-                    detail="OpenAI service temporarily unavailable"
-                )
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to transcribe video"
-            )
+            return await self._transcribe_media(temp_file, language)
 
         finally:
             # Clean up temporary file
@@ -116,18 +268,22 @@ class TranscriptionService:
     async def cleanup_temp_files(self, max_age_hours: int = 24):
         """Clean up old temporary files"""
         try:
-            current_time = asyncio.get_event_loop().time()
-            for file_path in self.temp_dir.glob("*"):
-                file_age = current_time - file_path.stat().st_mtime
-                if file_age > max_age_hours * 3600:
-                    try:
-                        file_path.unlink()
-                    except Exception as e:
-                        logger.error(f"Error deleting file {file_path}: {str(e)}")
+            # Also runs periodically as part of the scratch sweeper
+            await asyncio.to_thread(scratch.sweep, max_age_hours * 3600, self.temp_dir)
         except Exception as e:
             logger.error(f"Error cleaning up temporary files: {str(e)}")
             # Non-critical error, just log it
 
+    def stats(self) -> Dict[str, Any]:
+        """Report chunked transcription activity"""
+        return {
+            **self.backend.stats(),
+            "cache": transcription_cache.stats(),
+            "max_parallel": settings.TRANSCRIPTION_MAX_PARALLEL,
+            "chunks_transcribed": self.chunks_transcribed,
+            "chunk_retries": self.chunk_retries
+        }
+
     async def get_supported_languages(self) -> list:
         """Get list of supported languages"""
         return self.supported_languages.copy()
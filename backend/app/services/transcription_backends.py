@@ -0,0 +1,296 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+from fastapi import HTTPException
+from openai import OpenAI, APIError
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionBackend(ABC):
+    """Turns one audio or video file into text with segment timings.
+
+    Results are {"text", "language", "segments": [{start, end, text}],
+    "words": [{start, end, word}]}; words is empty when the engine doesn't
+    report them.
+    """
+
+    name: str
+
+    @property
+    @abstractmethod
+    def identity(self) -> str:
+        """Engine and model; transcripts from different ones are cached apart"""
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether the backend is configured and can take work"""
+
+    @abstractmethod
+    async def transcribe(self, file_path: Path, language: Optional[str]) -> Dict[str, Any]:
+        """Transcribe one file; raises HTTPException on failure"""
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.name}
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    """OpenAI's hosted whisper-1"""
+
+    name = "whisper"
+
+    def __init__(self):
+        self.client = None
+
+    @property
+    def identity(self) -> str:
+        return "openai:whisper-1"
+
+    def available(self) -> bool:
+        """Ensure OpenAI client is initialized"""
+        if not self.client:
+            if not settings.OPENAI_API_KEY:
+                logger.warning("OpenAI API key not configured")
+                return False
+            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        return True
+
+    async def transcribe(self, file_path: Path, language: Optional[str]) -> Dict[str, Any]:
+        try:
+            with open(file_path, "rb") as audio_file:
+                transcription = await asyncio.to_thread(
+                    self.client.audio.transcriptions.create,
+                    file=audio_file,
+                    model="whisper-1",
+                    language=language,
+                    response_format="verbose_json",
+                    timestamp_granularities=["word", "segment"]
+                )
+
+            return {
+                "text": transcription.text,
+                "language": transcription.language,
+                "segments": [
+                    {"start": segment.start, "end": segment.end, "text": segment.text}
+                    for segment in transcription.segments or []
+                ],
+                "words": [
+                    {"start": word.start, "end": word.end, "word": word.word}
+                    for word in getattr(transcription, "words", None) or []
+                ]
+            }
+
+        except Exception as e:
+            logger.error(f"Error transcribing {file_path.name}: {str(e)}")
+            if isinstance(e, APIError):
+                raise HTTPException(
+                    status_code=503,
+                    detail="OpenAI service temporarily unavailable"
+                )
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to transcribe video"
+            )
+
+# Set in each pool worker by _load_model, so the model is loaded once per process
+_model = None
+
+def _load_model(model_name: str, compute_type: str, cpu_threads: int) -> None:
+    global _model
+    from faster_whisper import WhisperModel
+    _model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+def _transcribe_batch(jobs: List[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+    """Runs in a pool worker; one failed clip doesn't fail the rest of the batch"""
+    results = []
+    for path, language in jobs:
+        try:
+            segments, info = _model.transcribe(path, language=language, word_timestamps=True, vad_filter=True)
+            segments = list(segments)  # decoding happens lazily while iterating
+            results.append({
+                "text": "".join(s.text for s in segments).strip(),
+                "language": info.language,
+                "segments": [{"start": s.start, "end": s.end, "text": s.text} for s in segments],
+                "words": [
+                    {"start": w.start, "end": w.end, "word": w.word}
+                    for s in segments for w in (s.words or [])
+                ]
+            })
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """Quantised Whisper (faster-whisper / CTranslate2) on this host's CPUs.
+
+    A pool of worker processes each keep the model loaded. Clips are queued
+    and one dispatcher per worker hands them over. While any worker is idle
+    each clip goes out alone, so clips run in parallel; only once every
+    worker is busy does a dispatcher gather up to LOCAL_WHISPER_BATCH_SIZE
+    queued clips into one round trip. A pool broken by a dead worker is
+    replaced on the next batch.
+    """
+
+    name = "local"
+
+    @property
+    def identity(self) -> str:
+        return f"local:{settings.LOCAL_WHISPER_MODEL}:{settings.LOCAL_WHISPER_COMPUTE_TYPE}"
+
+    def __init__(self):
+        self.workers = settings.LOCAL_WHISPER_WORKERS
+        self.batch_size = settings.LOCAL_WHISPER_BATCH_SIZE
+        self.batch_wait = settings.LOCAL_WHISPER_BATCH_WAIT_MS / 1000
+        self.cpu_threads = settings.LOCAL_WHISPER_THREADS or max(1, (os.cpu_count() or 1) // self.workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: List[asyncio.Task] = []
+        self._busy = 0
+        self.batches = 0
+        self.clips = 0
+        self.failures = 0
+
+    def available(self) -> bool:
+        if importlib.util.find_spec("faster_whisper") is None:
+            logger.warning("TRANSCRIPTION_PROVIDER is local but faster-whisper is not installed")
+            return False
+        return True
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            # Forking a process that runs an event loop and threads isn't safe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_load_model,
+            initargs=(settings.LOCAL_WHISPER_MODEL, settings.LOCAL_WHISPER_COMPUTE_TYPE, self.cpu_threads)
+        )
+
+    def _ensure_started(self) -> None:
+        if self._dispatchers:
+            return
+        self._queue = asyncio.Queue()
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def transcribe(self, file_path: Path, language: Optional[str]) -> Dict[str, Any]:
+        self._ensure_started()
+        result = asyncio.get_running_loop().create_future()
+        await self._queue.put((str(file_path), language, result))
+        transcription = await result
+        if "error" in transcription:
+            logger.error(f"Error transcribing {file_path.name}: {transcription['error']}")
+            raise HTTPException(status_code=500, detail="Failed to transcribe video")
+        return transcription
+
+    async def _next_batch(self) -> List[Tuple[str, Optional[str], asyncio.Future]]:
+        """Wait for one clip; while every other worker is busy, take whatever
+        else arrives within the batch window"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.batch_wait
+        # An idle worker would run a queued clip sooner than it waits here
+        while len(batch) < self.batch_size and self._busy >= self.workers - 1:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        # Callers that gave up (e.g. a cancelled job) don't need their clip decoded
+        return [job for job in batch if not job[2].done()]
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            if self._pool is None:
+                self._pool = self._new_pool()
+            pool = self._pool
+            self._busy += 1
+            try:
+                results = await loop.run_in_executor(
+                    pool,
+                    _transcribe_batch,
+                    [(path, language) for path, language, _ in batch]
+                )
+            except BrokenProcessPool as e:
+                # A worker died (e.g. out of memory) and took the pool with it;
+                # fail the batch and start a fresh pool for the next one
+                logger.error(f"Transcription worker pool broke: {str(e)}")
+                results = [{"error": "worker pool broke"}] * len(batch)
+                if self._pool is pool:
+                    self._pool = None
+                    pool.shutdown(wait=False, cancel_futures=True)
+            except Exception as e:
+                logger.error(f"Transcription worker failed: {str(e)}")
+                results = [{"error": str(e)}] * len(batch)
+            finally:
+                self._busy -= 1
+
+            self.batches += 1
+            self.clips += len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if "error" in result:
+                    self.failures += 1
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        if self._pool:
+            await asyncio.to_thread(self._pool.shutdown, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "model": settings.LOCAL_WHISPER_MODEL,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "clips": self.clips,
+            "mean_batch_size": round(self.clips / self.batches, 2) if self.batches else None,
+            "failures": self.failures
+        }
+
+BACKENDS = {
+    "whisper": OpenAIWhisperBackend,
+    "openai": OpenAIWhisperBackend,
+    "local": LocalWhisperBackend
+}
+
+# One instance per provider, shared by every service that transcribes
+_instances: Dict[str, TranscriptionBackend] = {}
+
+def get_backend(provider: Optional[str] = None) -> TranscriptionBackend:
+    """The backend for provider, TRANSCRIPTION_PROVIDER by default"""
+    provider = (provider or settings.TRANSCRIPTION_PROVIDER).lower()
+    if provider not in BACKENDS:
+        raise ValueError(f"Unknown TRANSCRIPTION_PROVIDER {provider!r}, expected one of {', '.join(BACKENDS)}")
+    if provider not in _instances:
+        _instances[provider] = BACKENDS[provider]()
+    return _instances[provider]
+
+async def close_backends() -> None:
+    """Stop worker pools; called on shutdown"""
+    for backend in _instances.values():
+        await backend.close()
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Optional, Dict, Any
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from ..core.config import settings
+from ..db import models
+from ..db.session import async_session
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionCache:
+    """Transcripts keyed by a fingerprint of the audio itself.
+
+    The fingerprint hashes the audio decoded to 16 kHz mono PCM (plus the
+    backend and language), so a re-uploaded file, a reprocessed response or
+    a pipeline retry finds the earlier transcript whatever the container.
+    Entries are shared across responses and evicted least recently used
+    first once their total size passes TRANSCRIPTION_CACHE_MAX_BYTES. The
+    total is kept as a running count, re-read from the table every
+    resync_every stores to pick up other processes' writes, so the eviction
+    query only runs when the cache is actually over its bound. Cache
+    failures never fail a transcription.
+    """
+
+    resync_every = 100
+
+    def __init__(self):
+        self.enabled = settings.TRANSCRIPTION_CACHE_ENABLED
+        self.max_bytes = settings.TRANSCRIPTION_CACHE_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._total_bytes: Optional[int] = None
+        self._puts = 0
+
+    async def fingerprint(self, media_path: Path, identity: str) -> Optional[str]:
+        """sha256 of the normalised audio; None if it can't be decoded"""
+        if not self.enabled:
+            return None
+        hasher = hashlib.sha256(identity.encode() + b"\0")
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-nostats', '-loglevel', 'error',
+                '-i', str(media_path),
+                '-map', '0:a:0', '-ac', '1', '-ar', '16000', '-f', 's16le', '-',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.warning(f"Cannot fingerprint {media_path.name}: {str(e)}")
+            return None
+
+        # Streamed, so a long answer never sits in memory as PCM
+        decoded = 0
+        try:
+            while chunk := await process.stdout.read(1 << 16):
+                hasher.update(chunk)
+                decoded += len(chunk)
+            await process.wait()
+        finally:
+            # Also reached on cancellation; never leave an orphaned ffmpeg behind
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        if process.returncode != 0 or decoded == 0:
+            return None
+        return hasher.hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached transcript for key, marking it recently used"""
+        try:
+            async with async_session() as db:
+                result = await db.execute(
+                    update(models.TranscriptionCache)
+                    .where(models.TranscriptionCache.fingerprint == key)
+                    .values(
+                        hits=models.TranscriptionCache.hits + 1,
+                        last_used_at=datetime.now(UTC)
+                    )
+                    .returning(models.TranscriptionCache.result)
+                )
+                cached = result.scalar_one_or_none()
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Transcription cache lookup failed: {str(e)}")
+            return None
+
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    async def put(self, key: str, transcription: Dict[str, Any]) -> None:
+        """Store a transcript, trimming the cache if that takes it over its size bound"""
+        size = len(json.dumps(transcription).encode())
+        now = datetime.now(UTC)
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    insert(models.TranscriptionCache)
+                    .values(fingerprint=key, result=transcription, size_bytes=size, created_at=now, last_used_at=now)
+                    .on_conflict_do_update(
+                        index_elements=[models.TranscriptionCache.fingerprint],
+                        set_={"result": transcription, "size_bytes": size, "last_used_at": now}
+                    )
+                )
+                if self._total_bytes is None or self._puts % self.resync_every == 0:
+                    total = await self._stored_bytes(db)
+                else:
+                    # A replaced entry is counted twice until the next resync; that only trims early
+                    total = self._total_bytes + size
+                if total > self.max_bytes:
+                    await self._evict(db)
+                    total = await self._stored_bytes(db)
+                await db.commit()
+            self._total_bytes = total
+            self._puts += 1
+        except Exception as e:
+            logger.error(f"Transcription cache store failed: {str(e)}")
+            self._total_bytes = None
+
+    async def _stored_bytes(self, db) -> int:
+        result = await db.execute(select(func.coalesce(func.sum(models.TranscriptionCache.size_bytes), 0)))
+        return result.scalar_one()
+
+    async def _evict(self, db) -> None:
+        """Drop the least recently used entries beyond max_bytes"""
+        Cache = models.TranscriptionCache
+        newest_first = select(
+            Cache.fingerprint,
+            func.sum(Cache.size_bytes).over(order_by=Cache.last_used_at.desc()).label("running")
+        ).subquery()
+        result = await db.execute(
+            delete(Cache)
+            .where(Cache.fingerprint.in_(
+                select(newest_first.c.fingerprint).where(newest_first.c.running > self.max_bytes)
+            ))
+            .returning(Cache.fingerprint)
+        )
+        evicted = len(result.all())
+        if evicted:
+            self.evicted += evicted
+            logger.info(f"Evicted {evicted} transcription cache entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache effectiveness"""
+        return {
+            "enabled": self.enabled,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "stored_bytes": self._total_bytes
+        }
+
+transcription_cache = TranscriptionCache()
@@ -1,19 +1,22 @@
-from openai import AsyncOpenAI
 import httpx
 import logging
 from fastapi import HTTPException
 from typing import Dict, Any, Optional
 import asyncio
+import os
 from pathlib import Path
-import tempfile
+import aiofiles
 from ..core.config import settings
+from .http_client import http_client_pool
+from .scratch import scratch
+from .transcription_backends import get_backend
 
 logger = logging.getLogger(__name__)
 
 class TranscriptionService:
     def __init__(self):
-        """Initialize OpenAI client with API key from settings"""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        """Use the backend chosen by TRANSCRIPTION_PROVIDER"""
+        self.backend = get_backend()
         self.supported_languages = [
             "en", "es", "fr", "de", "it", "pt", "nl", "ja", "ko", "zh"
         ]
@@ -24,14 +27,18 @@ class TranscriptionService:
     async def download_video(self, url: str) -> Path:
         """Download video from URL to temporary file"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url)
+            # Stream straight to disk over the shared connection pool
+            temp_file = scratch.dir("transcriptions") / f"video_{os.urandom(8).hex()}.mp4"
+            async with http_client_pool.client.stream(
+                "GET",
+                url,
+                timeout=http_client_pool.timeout("video_download")
+            ) as response:
                 response.raise_for_status()
-
-                # Create temporary file
-                temp_file = Path(tempfile.mktemp(suffix=".mp4"))
-                temp_file.write_bytes(response.content)
-                return temp_file
+                async with aiofiles.open(temp_file, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        await f.write(chunk)
+            return temp_file
 
         except Exception as e:
             logger.error(f"Error downloading video: {str(e)}")
@@ -45,7 +52,12 @@ class TranscriptionService:
         video_url: str,
         language: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Transcribe video using OpenAI Whisper API"""
+        """Transcribe video with the configured backend"""
+        # e.g. no OpenAI key: skip rather than fail every call, as transcription.py does
+        if not self.backend.available():
+            logger.warning(f"Transcription skipped - {self.backend.name} backend not available")
+            return {"text": "", "language": language or self.default_language, "segments": [], "words": []}
+
         temp_file = None
         try:
             # Download video to temporary file
@@ -61,21 +73,7 @@ class TranscriptionService:
             # Attempt transcription with retries
             for attempt in range(self.max_retries):
                 try:
-                    with open(temp_file, "rb") as audio_file:
-                        transcript = await self.client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            language=language,
-                            response_format="verbose_json",
-                            timestamp_granularities=["word", "segment"]
-                        )
-
-                    return {
-                        "text": transcript.text,
-                        "segments": transcript.segments,
-                        "words": transcript.words,
-                        "language": transcript.language
-                    }
+                    return await self.backend.transcribe(temp_file, language)
 
                 except Exception as e:
                     if attempt == self.max_retries - 1:
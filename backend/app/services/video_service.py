@@ -2,41 +2,197 @@ from pathlib import Path
 import logging
 from fastapi import HTTPException, UploadFile
 import asyncio
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Deque
 import os
+import time
 import aiofiles
-from datetime import datetime, UTC
 import subprocess
 import json
+import math
+import hashlib
+import shutil
+from ..core.config import settings
+from .transcode_scheduler import transcode_scheduler, TranscodeQueueTimeout, PRIORITY_NORMAL
+from .scratch import scratch, Workspace
+from .encode_progress import encode_progress, parse_duration
+
+try:
+    # PyAV: libavformat in-process, so probing doesn't spawn ffprobe
+    import av
+except ImportError:
+    av = None
 
 logger = logging.getLogger(__name__)
 
+def sniff_video_format(head: bytes) -> Optional[str]:
+    """Identify the container from its leading bytes"""
+    if len(head) >= 12 and head[4:8] == b"ftyp":
+        # ISO base media: QuickTime declares the "qt  " major brand
+        return "mov" if head[8:12] == b"qt  " else "mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        # EBML header (Matroska / WebM)
+        return "webm"
+    return None
+
+# Second ffmpeg output feeding transcription: 16 kHz mono Opus is what Whisper
+# resamples to anyway and is a small fraction of the size of the MP4
+SPEECH_AUDIO_ARGS = [
+    '-map', '0:a:0',
+    '-vn',
+    '-af', 'highpass=f=80',
+    '-ac', '1',
+    '-ar', '16000',
+    '-c:a', 'libopus',
+    '-b:a', '24k',
+    '-application', 'voip'
+]
+
+def keyframe_args() -> List[str]:
+    """Keyframe on every HLS segment boundary so segments can be cut without re-encoding"""
+    return ['-force_key_frames', f'expr:gte(t,n_forced*{settings.HLS_SEGMENT_SECONDS})']
+
+def longest_keyframe_gap(packets: bytes, duration: Optional[float]) -> Optional[float]:
+    """Longest stretch without a keyframe, in seconds, from ffprobe's
+    "pts_time,flags" packet CSV; the stretch after the last keyframe runs to
+    the end. None when no keyframe is listed."""
+    times = []
+    for line in packets.decode(errors="replace").splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            times.append(float(pts))
+    if not times:
+        return None
+    times.sort()
+    end = max(duration or 0.0, times[-1])
+    return max(later - earlier for earlier, later in zip(times, times[1:] + [end]))
+
+POSTER_WIDTH = 1280
+THUMBNAIL_WIDTH = 320
+SPRITE_COLUMNS = 10
+
+REMUX_CONTAINERS = {"mov", "mp4", "m4a", "3gp", "3g2", "mj2"}
+REMUX_PIXEL_FORMATS = {"yuv420p", "yuvj420p"}
+
+def transcode_reason(probe: Dict[str, Any]) -> Optional[str]:
+    """Why an upload has to be re-encoded, or None if a stream copy will do"""
+    if not settings.REMUX_ENABLED:
+        return "remux disabled"
+
+    container = set(probe.get("format", {}).get("format_name", "").split(","))
+    if not container & REMUX_CONTAINERS:
+        return f"container {probe.get('format', {}).get('format_name')}"
+
+    streams = probe.get("streams", [])
+    video = [s for s in streams if s.get("codec_type") == "video"]
+    audio = [s for s in streams if s.get("codec_type") == "audio"]
+    if len(video) != 1:
+        return f"{len(video)} video streams"
+    video = video[0]
+    if video.get("codec_name") != "h264":
+        return f"video codec {video.get('codec_name')}"
+    if video.get("pix_fmt") not in REMUX_PIXEL_FORMATS:
+        return f"pixel format {video.get('pix_fmt')}"
+    if len(audio) > 1 or any(a.get("codec_name") != "aac" for a in audio):
+        return f"audio codec {','.join(a.get('codec_name', '?') for a in audio)}"
+
+    if min(int(video.get("width", 0)), int(video.get("height", 0))) < settings.REMUX_MIN_HEIGHT:
+        return f"resolution {video.get('width')}x{video.get('height')}"
+
+    # Streams don't always carry their own bitrate (e.g. fragmented MP4)
+    bitrate = video.get("bit_rate") or probe.get("format", {}).get("bit_rate")
+    if not bitrate:
+        return "unknown bitrate"
+    if int(bitrate) > settings.REMUX_MAX_VIDEO_BITRATE:
+        return f"bitrate {bitrate}"
+
+    return None
+
+def _probe_in_process(file_path: Path) -> Dict[str, Any]:
+    """Read the container header with PyAV, shaped like ffprobe's JSON"""
+    with av.open(str(file_path)) as container:
+        streams = []
+        for stream in container.streams:
+            context = stream.codec_context
+            info = {"codec_type": stream.type, "codec_name": context.name if context else None}
+            if stream.type == "video":
+                info.update(width=context.width, height=context.height, pix_fmt=context.pix_fmt)
+            elif stream.type == "audio":
+                info["channels"] = context.channels
+            if context and context.bit_rate:
+                info["bit_rate"] = str(context.bit_rate)
+            streams.append(info)
+
+        format_info = {"format_name": container.format.name}
+        if container.duration is not None:
+            format_info["duration"] = str(container.duration / av.time_base)
+        if container.bit_rate:
+            format_info["bit_rate"] = str(container.bit_rate)
+    return {"format": format_info, "streams": streams}
+
+def summarize_probe(probe: Dict[str, Any]) -> Dict[str, Any]:
+    """The media properties we keep from a probe; None where the container doesn't say"""
+    streams = probe.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    duration = probe.get("format", {}).get("duration")
+    bit_rate = probe.get("format", {}).get("bit_rate") or video.get("bit_rate")
+    return {
+        "duration": float(duration) if duration not in (None, "N/A") else None,
+        "width": int(video["width"]) if video.get("width") else None,
+        "height": int(video["height"]) if video.get("height") else None,
+        "codec": video.get("codec_name"),
+        "audio_codec": audio.get("codec_name"),
+        "audio_channels": int(audio["channels"]) if audio.get("channels") else None,
+        "bit_rate": int(bit_rate) if bit_rate not in (None, "N/A") else None
+    }
+
+class RecordingTooLong(HTTPException):
+    """An answer over the length limit; processing it again can't succeed"""
+
+    def __init__(self, max_duration: float):
+        super().__init__(
+            status_code=400,
+            detail=f"Recording too long. Maximum length: {max_duration / 60:g} minutes"
+        )
+
 class VideoService:
     def __init__(self):
         self.supported_formats = ['.mp4', '.webm', '.mov']
-        self.max_file_size = 100 * 1024 * 1024  # 100MB
-        self.temp_dir = Path("temp_videos")
-        self.temp_dir.mkdir(exist_ok=True)
+        self.max_file_size = settings.RECORDING_MAX_UPLOAD_BYTES
+        self.chunk_size = 1024 * 1024  # 1MB
+        self.max_duration = settings.RECORDING_MAX_DURATION_SECONDS
+        self.temp_dir = scratch.dir("videos")
+
+    def _check_extension(self, filename: str) -> str:
+        file_ext = Path(filename or "").suffix.lower()
+        if file_ext not in self.supported_formats:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file format. Supported formats: {', '.join(self.supported_formats)}"
+            )
+        return file_ext
+
+    def _file_too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {self.max_file_size / 1024 / 1024}MB"
+        )
+
+    def check_duration(self, duration: Optional[float]) -> None:
+        """Reject answers over the length limit; unknown durations are let through"""
+        if duration is not None and duration > self.max_duration:
+            raise RecordingTooLong(self.max_duration)
 
     async def validate_video(self, file: UploadFile) -> bool:
         """Validate video format and size"""
         try:
             # Check file extension
-            file_ext = Path(file.filename).suffix.lower()
-            if file_ext not in self.supported_formats:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file format. Supported formats: {', '.join(self.supported_formats)}"
-                )
+            self._check_extension(file.filename)
 
-            # Check file size
-            content = await file.read()
-            await file.seek(0)  # Reset file pointer
-            if len(content) > self.max_file_size:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"File too large. Maximum size: {self.max_file_size / 1024 / 1024}MB"
-                )
+            # Check file size without reading the upload into memory
+            if file.size is not None and file.size > self.max_file_size:
+                raise self._file_too_large()
 
             return True
 
@@ -46,98 +202,467 @@ class VideoService:
             logger.error(f"Error validating video: {str(e)}")
             raise HTTPException(status_code=500, detail="Error validating video file")
 
-    async def compress_video(self, file: UploadFile) -> Path:
-        """Compress video to standard format"""
+    async def ingest_upload(self, file: UploadFile) -> Dict[str, Any]:
+        """Stream an upload to disk in fixed-size chunks.
+
+        The size limit, sha256 and container sniffing are all handled in the
+        same pass, so peak memory is one chunk regardless of file size.
+        """
+        self._check_extension(file.filename)
+        if file.size is not None and file.size > self.max_file_size:
+            raise self._file_too_large()
+        scratch.ensure_room(file.size or 0)
+
+        temp_path = self.temp_dir / f"upload_{os.urandom(8).hex()}{Path(file.filename).suffix.lower()}"
+        hasher = hashlib.sha256()
+        size = 0
+        head = b""
         try:
-            # Create temporary file
-            timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
-            temp_input = self.temp_dir / f"input_{timestamp}{Path(file.filename).suffix}"
-            temp_output = self.temp_dir / f"compressed_{timestamp}.mp4"
+            async with aiofiles.open(temp_path, 'wb') as out_file:
+                while chunk := await file.read(self.chunk_size):
+                    size += len(chunk)
+                    if size > self.max_file_size:
+                        raise self._file_too_large()
+                    if len(head) < 64:
+                        head += chunk[:64 - len(head)]
+                    hasher.update(chunk)
+                    await out_file.write(chunk)
+
+            video_format = sniff_video_format(head)
+            if video_format is None:
+                raise HTTPException(status_code=400, detail="File is not a recognized video container")
+
+            # Held until the pipeline has processed it
+            scratch.adjust_shared(size)
+            return {
+                "path": temp_path,
+                "size": size,
+                "sha256": hasher.hexdigest(),
+                "format": video_format,
+                "filename": file.filename
+            }
+
+        except HTTPException:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+        except Exception as e:
+            logger.error(f"Error ingesting upload: {str(e)}")
+            if temp_path.exists():
+                temp_path.unlink()
+            raise HTTPException(status_code=500, detail="Error receiving video file")
+
+    async def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        job: Optional[str] = None,
+        stage: str = "ffmpeg",
+        log_lines: Optional[int] = 50,
+        stall_guard: bool = True
+    ) -> Tuple[int, bytes]:
+        """Run ffmpeg, tracking its progress and killing it if output stops advancing.
 
-            # Save uploaded file
-            async with aiofiles.open(temp_input, 'wb') as out_file:
-                content = await file.read()
-                await out_file.write(content)
+        Returns the exit code and the last log_lines lines of the log (all of
+        it with None, for runs whose log is their result). stall_guard=False
+        is for runs whose output only appears at the end of the input, where
+        out_time standing still doesn't mean ffmpeg is stuck.
+        """
+        # Machine-readable key=value blocks on stdout instead of the human status line
+        cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + cmd[1:]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        progress = encode_progress.start(job, stage)
+        stderr_tail: Deque[bytes] = deque(maxlen=log_lines)
 
-            # Compress video using ffmpeg
+        async def drain_stderr():
+            async for line in process.stderr:
+                if progress.duration is None:
+                    progress.duration = parse_duration(line)
+                stderr_tail.append(line)
+
+        stderr_task = asyncio.create_task(drain_stderr())
+        stall_timeout = settings.FFMPEG_STALL_TIMEOUT_SECONDS
+        stalled = False
+        try:
+            while True:
+                remaining = None
+                if stall_guard:
+                    remaining = max(0.0, stall_timeout - (time.monotonic() - progress.advanced_at))
+                try:
+                    line = await asyncio.wait_for(process.stdout.readline(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    stalled = True
+                    break
+                if not line:
+                    break
+                progress.feed(line.decode(errors="replace").strip())
+
+            if stalled:
+                logger.error(
+                    f"ffmpeg {stage} for {job} made no progress for {stall_timeout}s "
+                    f"at {progress.out_time:.1f}s, killing it"
+                )
+                process.kill()
+            await process.wait()
+            await stderr_task
+        finally:
+            # Also reached on cancellation; never leave an orphaned ffmpeg behind
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            stderr_task.cancel()
+            encode_progress.finish(progress, stalled=stalled)
+
+        if stalled:
+            raise HTTPException(status_code=500, detail="Encode stalled")
+        return process.returncode, b"".join(stderr_tail)
+
+    def _scratch_path(self, name: str, workspace: Optional[Workspace], small: bool = False) -> Path:
+        """Output location: inside the job's workspace, else uniquely named in temp_dir"""
+        if workspace:
+            return workspace.small_path(name) if small else workspace.path(name)
+        stem, suffix = os.path.splitext(name)
+        return self.temp_dir / f"{stem}_{os.urandom(8).hex()}{suffix}"
+
+    @staticmethod
+    def _job(workspace: Optional[Workspace]) -> Optional[str]:
+        return workspace.name if workspace else None
+
+    def _speech_output(self, audio_output: Optional[Path]) -> List[str]:
+        return SPEECH_AUDIO_ARGS + ['-y', str(audio_output)] if audio_output else []
+
+    async def prepare_video(
+        self,
+        input_path: Path,
+        priority: int = PRIORITY_NORMAL,
+        extract_audio: bool = True,
+        workspace: Optional[Workspace] = None
+    ) -> Dict[str, Any]:
+        """Remux compliant uploads, fully transcode everything else.
+
+        Answers over the length limit are rejected before any encoding. With
+        extract_audio, the same ffmpeg run also writes the speech track used
+        for transcription ("audio_path", None if there is no audio). "probe"
+        is the source's summarized properties, None if it couldn't be probed.
+        """
+        audio_output = None
+        summary = None
+        try:
+            probe = await self.probe_video(input_path)
+            summary = summarize_probe(probe)
+            reason = transcode_reason(probe)
+            if extract_audio and any(s.get("codec_type") == "audio" for s in probe.get("streams", [])):
+                audio_output = self._scratch_path("speech.ogg", workspace, small=True)
+        except HTTPException:
+            reason = "probe failed"
+        if summary:
+            self.check_duration(summary["duration"])
+
+        if reason is None:
             try:
-                cmd = [
+                return {
+                    "path": await self.remux_video(input_path, audio_output, workspace),
+                    "mode": "remux",
+                    "reason": None,
+                    "audio_path": audio_output,
+                    "probe": summary
+                }
+            except HTTPException:
+                reason = "remux failed"
+
+        logger.info(f"Transcoding {input_path.name}: {reason}")
+        return {
+            "path": await self.compress_video(input_path, priority, audio_output, workspace),
+            "mode": "transcode",
+            "reason": reason,
+            "audio_path": audio_output,
+            "probe": summary
+        }
+
+    async def remux_video(
+        self,
+        input_path: Path,
+        audio_output: Optional[Path] = None,
+        workspace: Optional[Workspace] = None
+    ) -> Path:
+        """Stream-copy into MP4 with the moov atom up front; no re-encode"""
+        temp_output = self._scratch_path("remuxed.mp4", workspace)
+        try:
+            # I/O bound, so it doesn't take a transcoding slot
+            returncode, stderr = await self._run_ffmpeg([
+                'ffmpeg',
+                '-i', str(input_path),
+                '-map', '0:v:0',
+                '-map', '0:a:0?',
+                '-c', 'copy',
+                '-movflags', '+faststart',
+                '-y',
+                str(temp_output)
+            ] + self._speech_output(audio_output), self._job(workspace), "remux")
+            if returncode != 0:
+                logger.error(f"FFmpeg remux error: {stderr.decode()}")
+                raise HTTPException(status_code=500, detail="Error remuxing video")
+            return temp_output
+
+        except Exception as e:
+            logger.error(f"Error remuxing video: {str(e)}")
+            for output in (temp_output, audio_output):
+                if output and output.exists():
+                    output.unlink()
+            raise HTTPException(status_code=500, detail="Error remuxing video file")
+
+    async def compress_video(
+        self,
+        input_path: Path,
+        priority: int = PRIORITY_NORMAL,
+        audio_output: Optional[Path] = None,
+        workspace: Optional[Workspace] = None
+    ) -> Path:
+        """Compress an ingested video file to standard format"""
+        temp_output = self._scratch_path("compressed.mp4", workspace)
+        try:
+            # Wait for a CPU slot so concurrent encodes don't oversubscribe the cores
+            async with transcode_scheduler.slot(priority) as threads:
+                # Compress video using ffmpeg
+                returncode, stderr = await self._run_ffmpeg([
                     'ffmpeg',
-                    '-i', str(temp_input),
+                    '-i', str(input_path),
                     '-c:v', 'libx264',
                     '-c:a', 'aac',
                     '-b:v', '1000k',
                     '-b:a', '128k',
-                    '-threads', '0',
+                    '-threads', str(threads),
+                    *keyframe_args(),
+                    '-movflags', '+faststart',  # Playable before fully downloaded
                     '-y',  # Overwrite output file if exists
                     str(temp_output)
-                ]
+                ] + self._speech_output(audio_output), self._job(workspace), "transcode")
 
-                # Run ffmpeg command
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-
-                if process.returncode != 0:
+                if returncode != 0:
                     logger.error(f"FFmpeg error: {stderr.decode()}")
                     raise HTTPException(
                         status_code=500,
                         detail="Error compressing video"
                     )
 
-                return temp_output
-
-            finally:
-                # Clean up input file
-                if temp_input.exists():
-                    temp_input.unlink()
+            return temp_output
 
         except Exception as e:
             logger.error(f"Error compressing video: {str(e)}")
             # Clean up any temporary files
-            for temp_file in [temp_input, temp_output]:
-                if temp_file.exists():
-                    temp_file.unlink()
+            for output in (temp_output, audio_output):
+                if output and output.exists():
+                    output.unlink()
+            if isinstance(e, TranscodeQueueTimeout):
+                raise
             raise HTTPException(status_code=500, detail="Error compressing video file")
 
-    async def get_video_metadata(self, file_path: Path) -> Dict[str, Any]:
-        """Get video metadata using ffprobe"""
+    async def package_hls(
+        self,
+        video_path: Path,
+        reencode: bool = False,
+        priority: int = PRIORITY_NORMAL,
+        workspace: Optional[Workspace] = None
+    ) -> Path:
+        """Cut a processed MP4 into an fMP4 HLS rendition; returns the output directory.
+
+        Our own encodes already have keyframes on segment boundaries and a
+        streamable bitrate, so they are only repackaged. reencode is for
+        remuxed uploads whose bitrate is too high to stream or whose
+        keyframes are too far apart to cut short segments.
+        """
+        output_dir = self._scratch_path("hls", workspace)
+        output_dir.mkdir()
+        hls_args = [
+            '-f', 'hls',
+            '-hls_time', str(settings.HLS_SEGMENT_SECONDS),
+            '-hls_playlist_type', 'vod',
+            '-hls_segment_type', 'fmp4',
+            '-hls_flags', 'independent_segments',
+            '-hls_fmp4_init_filename', 'init.mp4',
+            '-hls_segment_filename', str(output_dir / 'seg_%05d.m4s'),
+            '-y',
+            str(output_dir / 'index.m3u8')
+        ]
+        try:
+            if reencode:
+                async with transcode_scheduler.slot(priority) as threads:
+                    returncode, stderr = await self._run_ffmpeg([
+                        'ffmpeg',
+                        '-i', str(video_path),
+                        '-c:v', 'libx264',
+                        '-c:a', 'aac',
+                        '-b:v', '1000k',
+                        '-b:a', '128k',
+                        '-threads', str(threads),
+                        *keyframe_args()
+                    ] + hls_args, self._job(workspace), "hls")
+            else:
+                returncode, stderr = await self._run_ffmpeg([
+                    'ffmpeg',
+                    '-i', str(video_path),
+                    '-c', 'copy'
+                ] + hls_args, self._job(workspace), "hls")
+
+            if returncode != 0:
+                logger.error(f"FFmpeg HLS error: {stderr.decode()}")
+                raise HTTPException(status_code=500, detail="Error packaging video")
+            return output_dir
+
+        except Exception as e:
+            logger.error(f"Error packaging HLS: {str(e)}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise HTTPException(status_code=500, detail="Error packaging video for streaming")
+
+    async def extract_previews(
+        self,
+        video_path: Path,
+        metadata: Dict[str, Any],
+        workspace: Optional[Workspace] = None
+    ) -> Dict[str, Any]:
+        """Write a poster, a thumbnail and a scrub sprite sheet in one ffmpeg pass.
+
+        The poster and thumbnail are taken from keyframes only. The sprite reads
+        a second, fully decoded copy of the input: with only keyframes, fps
+        would repeat the nearest one and tiles wouldn't show their own time.
+        Returns the image paths and the sprite layout, all in a fresh directory.
+        """
+        duration = metadata["duration"]
+        tile_width = settings.SPRITE_TILE_WIDTH
+        # Even heights keep the scaler happy for odd aspect ratios
+        tile_height = max(2, round(tile_width * metadata["height"] / metadata["width"] / 2) * 2)
+        interval = max(1.0, duration / settings.SPRITE_MAX_TILES)
+        count = max(1, math.ceil(duration / interval))
+        rows = math.ceil(count / SPRITE_COLUMNS)
+        # Skip the first moments of longer answers; short ones may have a single keyframe
+        poster_at = min(duration * 0.1, 3.0) if duration >= 10 else 0.0
+
+        output_dir = self._scratch_path("previews", workspace, small=True)
+        output_dir.mkdir()
+        filters = ";".join([
+            "[0:v]split=2[p][t]",
+            f"[p]trim=start={poster_at:.3f},scale={POSTER_WIDTH}:-2[poster]",
+            f"[t]trim=start={poster_at:.3f},scale={THUMBNAIL_WIDTH}:-2[thumb]",
+            f"[1:v]fps=1/{interval:.3f},scale={tile_width}:{tile_height},tile={SPRITE_COLUMNS}x{rows}[sprite]"
+        ])
+        cmd = [
+            'ffmpeg',
+            '-skip_frame', 'nokey',
+            '-i', str(video_path),
+            '-i', str(video_path),
+            '-filter_complex', filters,
+            '-threads', '1',
+            '-map', '[poster]', '-frames:v', '1', '-q:v', '3', '-y', str(output_dir / 'poster.jpg'),
+            '-map', '[thumb]', '-frames:v', '1', '-q:v', '5', '-y', str(output_dir / 'thumbnail.jpg'),
+            '-map', '[sprite]', '-frames:v', '1', '-q:v', '5', '-y', str(output_dir / 'sprite.jpg')
+        ]
+        try:
+            # The sprite's single frame is only written once the whole input is
+            # decoded, so out_time can stand still for most of a valid run. Bound
+            # the run by the answer's length instead of by progress.
+            returncode, stderr = await asyncio.wait_for(
+                self._run_ffmpeg(cmd, self._job(workspace), "previews", stall_guard=False),
+                timeout=settings.FFMPEG_STALL_TIMEOUT_SECONDS + duration
+            )
+            images = {name: output_dir / f"{name}.jpg" for name in ("poster", "thumbnail", "sprite")}
+            if returncode != 0 or not all(path.exists() for path in images.values()):
+                logger.error(f"FFmpeg preview error: {stderr.decode()}")
+                raise HTTPException(status_code=500, detail="Error extracting previews")
+
+            return {
+                "directory": output_dir,
+                **images,
+                "sprite_info": {
+                    "columns": SPRITE_COLUMNS,
+                    "rows": rows,
+                    "count": count,
+                    "interval": interval,
+                    "tile_width": tile_width,
+                    "tile_height": tile_height
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Error extracting previews: {str(e)}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise HTTPException(status_code=500, detail="Error extracting video previews")
+
+    async def keyframe_gap(self, file_path: Path, duration: Optional[float]) -> Optional[float]:
+        """Longest stretch of the video stream without a keyframe; None if it can't be read.
+
+        Lists packets without decoding them, so it costs a read of the file.
+        """
         try:
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                str(file_path)
-            ]
-
-            # Run ffprobe command
             process = await asyncio.create_subprocess_exec(
-                *cmd,
+                'ffprobe',
+                '-v', 'error',
+                '-select_streams', 'v:0',
+                '-show_entries', 'packet=pts_time,flags',
+                '-of', 'csv=p=0',
+                str(file_path),
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.warning(f"Cannot list keyframes of {file_path.name}: {str(e)}")
+            return None
+        try:
+            stdout, _ = await process.communicate()
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        if process.returncode != 0:
+            return None
+        return longest_keyframe_gap(stdout, duration)
+
+    async def probe_video(self, file_path: Path) -> Dict[str, Any]:
+        """Format and stream information, shaped like ffprobe's JSON"""
+        if av is not None:
+            try:
+                return await asyncio.to_thread(_probe_in_process, file_path)
+            except Exception as e:
+                logger.warning(f"In-process probe of {file_path.name} failed, falling back to ffprobe: {str(e)}")
+
+        cmd = [
+            'ffprobe',
+            '-v', 'quiet',
+            '-print_format', 'json',
+            '-show_format',
+            '-show_streams',
+            str(file_path)
+        ]
+
+        # Run ffprobe command
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+
+        if process.returncode != 0:
+            logger.error(f"FFprobe error: {stderr.decode()}")
+            raise HTTPException(
+                status_code=500,
+                detail="Error getting video metadata"
             )
-            stdout, stderr = await process.communicate()
 
-            if process.returncode != 0:
-                logger.error(f"FFprobe error: {stderr.decode()}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Error getting video metadata"
-                )
+        return json.loads(stdout.decode())
+
+    async def get_video_metadata(self, file_path: Path) -> Dict[str, Any]:
+        """Get the media properties of a processed video"""
+        try:
+            metadata = summarize_probe(await self.probe_video(file_path))
+            if metadata['duration'] is None or metadata['width'] is None:
+                raise ValueError("no duration or video stream")
 
-            probe = json.loads(stdout.decode())
-            video_info = next(s for s in probe['streams'] if s['codec_type'] == 'video')
-            
             return {
-                'duration': float(probe['format']['duration']),
-                'width': int(video_info['width']),
-                'height': int(video_info['height']),
-                'codec': video_info['codec_name'],
+                **metadata,
+                'bit_rate': metadata['bit_rate'] or 0,
                 'size': os.path.getsize(file_path)
             }
 
@@ -148,14 +673,8 @@ class VideoService:
     async def cleanup_temp_files(self, max_age_hours: int = 24):
         """Clean up old temporary files"""
         try:
-            current_time = datetime.now(UTC)
-            for file_path in self.temp_dir.glob('*'):
-                file_age = current_time - datetime.fromtimestamp(
-                    file_path.stat().st_mtime,
-                    UTC
-                )
-                if file_age.total_seconds() > max_age_hours * 3600:
-                    file_path.unlink()
+            # Also runs periodically as part of the scratch sweeper
+            await asyncio.to_thread(scratch.sweep, max_age_hours * 3600, self.temp_dir)
 
         except Exception as e:
             logger.error(f"Error cleaning up temporary files: {str(e)}")
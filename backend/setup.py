@@ -18,6 +18,7 @@ setup(
         "boto3>=1.34.14",
         "pytest>=7.4.4",
         "httpx>=0.26.0",
+        "h2>=4.1.0",
         "uuid>=1.30",
         "openai>=1.12.0",
         "python-magic>=0.4.27",
@@ -0,0 +1,77 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import media
+from app.api.media import parse_range_header, rewrite_hls_playlist
+
+# Create test client
+client = TestClient(app)
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    """Serve media from a temporary local storage root"""
+    monkeypatch.setattr(media.storage_service, "_ensure_client", lambda: False)
+    monkeypatch.setattr(media.storage_service, "temp_dir", tmp_path)
+    (tmp_path / "avatars").mkdir()
+    (tmp_path / "avatars" / "clip.mp4").write_bytes(bytes(range(100)))
+    (tmp_path / "recordings").mkdir()
+    (tmp_path / "recordings" / "answer.mp4").write_bytes(bytes(range(100)))
+    (tmp_path / "20240101_000000_upload.webm").write_bytes(bytes(range(100)))
+    return tmp_path
+
+def test_parse_range_header():
+    """Open-ended, bounded and suffix ranges resolve to inclusive offsets"""
+    assert parse_range_header(None, 100) is None
+    assert parse_range_header("bytes=0-", 100) == (0, 99)
+    assert parse_range_header("bytes=10-19", 100) == (10, 19)
+    assert parse_range_header("bytes=90-500", 100) == (90, 99)
+    assert parse_range_header("bytes=-10", 100) == (90, 99)
+    assert parse_range_header("bytes=0-1,5-6", 100) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_range_header("bytes=100-", 100)
+    assert exc.value.status_code == 416
+
+def test_range_request_returns_partial_content(local_storage):
+    """Range requests get 206 with only the requested bytes"""
+    response = client.get("/api/v1/media/avatars/clip.mp4", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == bytes(range(10, 20))
+    assert response.headers["content-range"] == "bytes 10-19/100"
+    assert "immutable" in response.headers["cache-control"]
+
+def test_full_request_and_traversal(local_storage):
+    """Plain requests get the whole file; keys cannot escape the storage root"""
+    response = client.get("/api/v1/media/avatars/clip.mp4")
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    assert len(response.content) == 100
+    assert client.get("/api/v1/media/avatars/../../etc/passwd").status_code == 404
+
+def test_only_avatars_are_publicly_cacheable(local_storage):
+    """Recordings are served with private caching; other keys aren't served at all"""
+    assert client.get("/api/v1/media/avatars/clip.mp4").headers["cache-control"].startswith("public")
+    response = client.get("/api/v1/media/recordings/answer.mp4")
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("private")
+    assert client.get("/api/v1/media/20240101_000000_upload.webm").status_code == 404
+
+def test_rewrite_hls_playlist():
+    """Segment and init-section URIs are resolved, tags are left alone"""
+    playlist = "\n".join([
+        "#EXTM3U",
+        "#EXT-X-TARGETDURATION:2",
+        '#EXT-X-MAP:URI="init.mp4"',
+        "#EXTINF:2.000000,",
+        "seg_00000.m4s",
+        "#EXT-X-ENDLIST"
+    ])
+    rewritten = rewrite_hls_playlist(playlist, lambda uri: f"https://cdn.example/hls/{uri}?sig=1")
+    assert rewritten.splitlines() == [
+        "#EXTM3U",
+        "#EXT-X-TARGETDURATION:2",
+        '#EXT-X-MAP:URI="https://cdn.example/hls/init.mp4?sig=1"',
+        "#EXTINF:2.000000,",
+        "https://cdn.example/hls/seg_00000.m4s?sig=1",
+        "#EXT-X-ENDLIST"
+    ]
@@ -0,0 +1,84 @@
+import uuid
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import recordings
+from app.db.session import get_async_db
+
+# Create test client
+client = TestClient(app)
+
+def test_multipart_complete_rejects_keys_outside_the_interview():
+    """Only objects under the interview's upload prefix can be completed"""
+    response = client.post(
+        "/api/v1/recordings/upload/multipart/complete",
+        json={
+            "upload_id": "upload-1",
+            "key": "avatars/someone-else.mp4",
+            "interview_id": str(uuid.uuid4()),
+            "question_id": str(uuid.uuid4()),
+            "parts": [{"part_number": 1, "etag": "\"abc\""}]
+        }
+    )
+    assert response.status_code == 400
+
+class _Session:
+    def __init__(self, recording):
+        self.recording = recording
+        self.deleted = []
+
+    async def get(self, model, key):
+        return self.recording
+
+    async def delete(self, instance):
+        self.deleted.append(instance)
+
+    async def commit(self):
+        pass
+
+def _delete(recording, monkeypatch):
+    deleted_keys, deleted_prefixes = [], []
+    async def delete_file(key):
+        deleted_keys.append(key)
+        return True
+    async def delete_prefix(prefix):
+        deleted_prefixes.append(prefix)
+        return 0
+    monkeypatch.setattr(recordings.storage_service, "delete_file", delete_file)
+    monkeypatch.setattr(recordings.storage_service, "delete_prefix", delete_prefix)
+    session = _Session(recording)
+    async def get_session():
+        yield session
+    app.dependency_overrides[get_async_db] = get_session
+    try:
+        response = client.delete(f"/api/v1/recordings/{recording.id}")
+    finally:
+        app.dependency_overrides.clear()
+    return response, session, deleted_keys, deleted_prefixes
+
+def test_delete_removes_the_video_and_everything_under_the_response(monkeypatch):
+    """The stored video goes by its recorded key; HLS and previews by the response prefix"""
+    recording = SimpleNamespace(
+        id=uuid.uuid4(),
+        interview_id=uuid.uuid4(),
+        video_url="https://storage.example/presigned",
+        processing_metadata={"video_key": "recordings/i/20261018_compressed.mp4"}
+    )
+    response, session, keys, prefixes = _delete(recording, monkeypatch)
+    assert response.status_code == 200
+    assert keys == ["recordings/i/20261018_compressed.mp4"]
+    assert prefixes == [f"recordings/{recording.interview_id}/{recording.id}/"]
+    assert session.deleted == [recording]
+
+def test_delete_handles_a_recording_without_a_video(monkeypatch):
+    """A pending or failed row has no video_url; its raw upload is deleted instead"""
+    recording = SimpleNamespace(
+        id=uuid.uuid4(),
+        interview_id=uuid.uuid4(),
+        video_url=None,
+        processing_metadata={"upload": {"storage_key": "recordings/i/raw.webm"}}
+    )
+    response, session, keys, _ = _delete(recording, monkeypatch)
+    assert response.status_code == 200
+    assert keys == ["recordings/i/raw.webm"]
+    assert session.deleted == [recording]
@@ -0,0 +1,90 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.security import create_webhook_token, verify_webhook_token
+from app.db.session import get_async_db
+from app.services.avatar_reconciler import avatar_reconciler
+
+# Create test client
+client = TestClient(app)
+
+def test_did_webhook_rejects_bad_token(monkeypatch):
+    """Webhooks without a valid signature token are rejected"""
+    monkeypatch.setattr(settings, "DID_WEBHOOK_SECRET", "test-secret")
+    response = client.post(
+        "/api/v1/webhooks/did",
+        params={"token": "forged"},
+        json={"id": "tlk_123", "status": "done", "result_url": "https://example.com/v.mp4"}
+    )
+    assert response.status_code == 401
+
+def test_did_webhook_ignores_intermediate_status(monkeypatch):
+    """Non-terminal talk events are accepted without touching questions"""
+    monkeypatch.setattr(settings, "DID_WEBHOOK_SECRET", "test-secret")
+    response = client.post(
+        "/api/v1/webhooks/did",
+        params={"token": create_webhook_token(uuid.uuid4())},
+        json={"id": "tlk_123", "status": "started"}
+    )
+    assert response.status_code == 200
+    assert response.json()["updated"] == 0
+
+def test_webhook_token_is_bound_to_question_and_expires(monkeypatch):
+    """Tokens name one question and stop verifying once expired"""
+    monkeypatch.setattr(settings, "DID_WEBHOOK_SECRET", "test-secret")
+    question_id = str(uuid.uuid4())
+    assert verify_webhook_token(create_webhook_token(question_id)) == question_id
+
+    monkeypatch.setattr(settings, "DID_WEBHOOK_TOKEN_TTL_HOURS", -1)
+    assert verify_webhook_token(create_webhook_token(question_id)) is None
+
+class _Question:
+    def __init__(self, talk_id):
+        self.avatar_video_id = talk_id
+
+class _Session:
+    def __init__(self, question):
+        self.question = question
+
+    async def get(self, model, key):
+        return self.question
+
+def _with_question(talk_id):
+    async def session():
+        yield _Session(_Question(talk_id))
+    app.dependency_overrides[get_async_db] = session
+
+def test_did_webhook_rejects_token_for_another_talk(monkeypatch):
+    """A token issued for one question can't report on some other talk"""
+    monkeypatch.setattr(settings, "DID_WEBHOOK_SECRET", "test-secret")
+    _with_question("tlk_mine")
+    try:
+        response = client.post(
+            "/api/v1/webhooks/did",
+            params={"token": create_webhook_token(uuid.uuid4())},
+            json={"id": "tlk_other", "status": "done", "result_url": "https://example.com/v.mp4"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 403
+
+def test_did_webhook_accepts_string_error(monkeypatch):
+    """Errors sent as a bare string are stored rather than crashing the handler"""
+    monkeypatch.setattr(settings, "DID_WEBHOOK_SECRET", "test-secret")
+    applied = []
+    async def apply_results(completed, failed):
+        applied.append(failed)
+        return 1
+    monkeypatch.setattr(avatar_reconciler, "apply_results", apply_results)
+    _with_question("tlk_123")
+    try:
+        response = client.post(
+            "/api/v1/webhooks/did",
+            params={"token": create_webhook_token(uuid.uuid4())},
+            json={"id": "tlk_123", "status": "error", "error": "Face not detected"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert applied == [{"tlk_123": "Video generation failed: Face not detected"}]
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta, UTC
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from app.services.avatar_cache import AvatarCacheService
+
+avatar_cache = AvatarCacheService()
+
+def test_same_inputs_share_key():
+    """Identical render inputs map to the same cache entry"""
+    first = avatar_cache.compute_key("Tell us about yourself.", "en-US-JennyNeural", None, "https://example.com/a.jpg")
+    second = avatar_cache.compute_key("Tell us about yourself. ", "en-US-JennyNeural", None, "https://example.com/a.jpg")
+    assert first == second
+    assert len(first) == 64
+
+def test_render_inputs_split_key():
+    """Changing any render input produces a different cache entry"""
+    base = avatar_cache.compute_key("Hello", "en-US-JennyNeural", None, "https://example.com/a.jpg")
+    assert base != avatar_cache.compute_key("Hello", "en-US-GuyNeural", None, "https://example.com/a.jpg")
+    assert base != avatar_cache.compute_key("Hello", "en-US-JennyNeural", "Cheerful", "https://example.com/a.jpg")
+    assert base != avatar_cache.compute_key("Hello", "en-US-JennyNeural", None, "https://example.com/b.jpg")
+    assert base != avatar_cache.compute_key("Hello there", "en-US-JennyNeural", None, "https://example.com/a.jpg")
+
+class FakeSession:
+    def __init__(self, entry=None):
+        self.entry = entry
+        self.statements = []
+
+    async def get(self, model, key):
+        return self.entry
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+def _entry(storage_key=None, age_hours=48):
+    return SimpleNamespace(
+        cache_key="k",
+        status="completed",
+        storage_key=storage_key,
+        created_at=datetime.now(UTC) - timedelta(hours=age_hours)
+    )
+
+def test_ttl_only_expires_renders_still_on_did():
+    """A D-ID URL past the TTL is not reused; a mirrored copy never expires"""
+    assert asyncio.run(avatar_cache.lookup(FakeSession(_entry()), "k")) is None
+    mirrored = _entry(storage_key="avatars/k/talk.mp4")
+    assert asyncio.run(avatar_cache.lookup(FakeSession(mirrored), "k")) is mirrored
+
+def test_evict_ttl_skips_mirrored_entries():
+    """The TTL clause of the eviction only matches entries without a mirrored copy"""
+    db = FakeSession()
+    asyncio.run(avatar_cache.evict(db))
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "avatar_video_cache.storage_key IS NULL AND avatar_video_cache.created_at <" in sql
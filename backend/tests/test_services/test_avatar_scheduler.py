@@ -0,0 +1,99 @@
+import asyncio
+import uuid
+import httpx
+import pytest
+from app.services.avatar_scheduler import AvatarJobScheduler, PRIORITY_CANDIDATE, PRIORITY_ADMIN
+from app.services.did_service import DIDService, DIDServiceError
+from app.services.http_client import http_client_pool
+
+class RetryableError(Exception):
+    retryable = True
+
+def test_candidate_jobs_run_before_admin_jobs():
+    """Queued candidate-facing jobs are picked ahead of admin regenerations"""
+    async def run():
+        scheduler = AvatarJobScheduler()
+        scheduler.concurrency = 1
+        order = []
+
+        async def job(name):
+            order.append(name)
+
+        # Occupy the only worker so the rest queue up
+        gate = asyncio.Event()
+        scheduler.submit(gate.wait)
+        await asyncio.sleep(0)
+        scheduler.submit(job, "admin", priority=PRIORITY_ADMIN)
+        scheduler.submit(job, "candidate", priority=PRIORITY_CANDIDATE)
+        gate.set()
+        await scheduler._queue.join()
+        await scheduler.stop()
+        assert order == ["candidate", "admin"]
+
+    asyncio.run(run())
+
+def test_retryable_failures_are_retried_then_reported():
+    """Retryable errors are retried up to max_attempts before on_failure runs"""
+    async def run():
+        scheduler = AvatarJobScheduler()
+        scheduler.retry_base_delay = 0.001
+        scheduler.max_attempts = 3
+        attempts = []
+        failures = []
+
+        async def job(question_id):
+            attempts.append(question_id)
+            raise RetryableError("rate limited")
+
+        async def on_failure(question_id, error):
+            failures.append((question_id, str(error)))
+
+        scheduler.submit(job, "q1", on_failure=on_failure)
+        for _ in range(200):
+            if failures:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        assert len(attempts) == 3
+        assert failures == [("q1", "rate limited")]
+
+    asyncio.run(run())
+
+def test_only_unsent_talk_creations_are_retryable(monkeypatch):
+    """A talk request that may have reached D-ID is never flagged for retry"""
+    def create_with(error):
+        def handler(request):
+            raise error("boom", request=request)
+        monkeypatch.setattr(http_client_pool, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        with pytest.raises(DIDServiceError) as exc:
+            asyncio.run(DIDService().create_avatar_video("Hello"))
+        return exc.value.retryable
+
+    assert create_with(httpx.ConnectError) is True
+    assert create_with(httpx.ReadTimeout) is False
+    assert create_with(httpx.RemoteProtocolError) is False
+
+def test_pending_questions_are_resubmitted_on_startup(monkeypatch):
+    """Jobs dropped by a shutdown are found again from the questions still pending"""
+    from types import SimpleNamespace
+    from app.api import interviews
+
+    question_id = uuid.uuid4()
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+        async def __aexit__(self, *exc):
+            return False
+        async def execute(self, statement):
+            row = SimpleNamespace(id=question_id, text="Why us?", voice_id=None, voice_style=None)
+            return SimpleNamespace(all=lambda: [row])
+    submitted = []
+    def submit(func, *args, **kwargs):
+        submitted.append((func, args, kwargs["priority"]))
+    monkeypatch.setattr(interviews, "async_session", FakeSession)
+    monkeypatch.setattr(interviews.avatar_scheduler, "submit", submit)
+
+    assert asyncio.run(interviews.requeue_pending_avatars()) == 1
+    assert submitted == [
+        (interviews.generate_avatar_video, (question_id, "Why us?", "en-US-JennyNeural", None), PRIORITY_CANDIDATE)
+    ]
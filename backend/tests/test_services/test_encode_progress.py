@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services.encode_progress import EncodeProgress, encode_progress, parse_duration
+from app.services.video_service import VideoService
+
+def test_progress_blocks_give_percent_speed_and_eta():
+    """Each progress= line closes a block that updates the job's position"""
+    progress = EncodeProgress("response_1", "transcode", 60.0)
+    for line in ["frame=300", "out_time_us=15000000", "speed=2.5x"]:
+        assert progress.feed(line) is False
+    assert progress.feed("progress=continue") is True
+    assert progress.percent == 25.0
+    assert progress.speed == 2.5
+    assert progress.eta_seconds == 18.0
+
+    # A block that doesn't move forward is not progress
+    assert progress.feed("out_time_us=15000000") is False
+    assert progress.feed("progress=continue") is False
+
+def test_progress_without_duration_or_speed():
+    """Streams of unknown length report position only"""
+    progress = EncodeProgress(None, "remux", None)
+    progress.feed("out_time_us=N/A")
+    progress.feed("speed=N/A")
+    progress.feed("progress=continue")
+    assert progress.to_dict()["percent"] is None
+    assert progress.to_dict()["eta_seconds"] is None
+
+def test_parse_duration():
+    """The input duration is read from ffmpeg's log"""
+    assert parse_duration(b"  Duration: 00:01:23.50, start: 0.000000, bitrate: 900 kb/s\n") == 83.5
+    assert parse_duration(b"  Duration: N/A, start: 0.000000, bitrate: N/A\n") is None
+    assert parse_duration(b"Stream #0:0: Video: h264\n") is None
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    def make(body):
+        script = tmp_path / "ffmpeg"
+        script.write_text("#!/bin/sh\n" + body)
+        script.chmod(0o755)
+        return str(script)
+    return make
+
+def test_run_ffmpeg_tracks_job_until_exit(fake_ffmpeg):
+    """Progress is visible under the job while ffmpeg runs and dropped afterwards"""
+    ffmpeg = fake_ffmpeg(
+        'echo "  Duration: 00:00:04.00, start: 0.000000" >&2\n'
+        'printf "out_time_us=2000000\\nspeed=1.0x\\nprogress=continue\\n"\n'
+        'sleep 0.3\n'
+        'printf "out_time_us=4000000\\nspeed=1.0x\\nprogress=end\\n"\n'
+    )
+    seen = []
+
+    async def run():
+        task = asyncio.create_task(VideoService()._run_ffmpeg([ffmpeg], "response_7", "transcode"))
+        await asyncio.sleep(0.15)
+        seen.extend(encode_progress.for_job("response_7"))
+        return await task
+
+    returncode, log = asyncio.run(run())
+    assert returncode == 0
+    assert b"Duration" in log
+    assert seen[0]["stage"] == "transcode"
+    assert seen[0]["percent"] == 50.0
+    assert encode_progress.for_job("response_7") == []
+
+def test_run_ffmpeg_kills_stalled_encode(fake_ffmpeg, monkeypatch):
+    """An encode whose output stops advancing is killed and reported"""
+    monkeypatch.setattr(settings, "FFMPEG_STALL_TIMEOUT_SECONDS", 0.3)
+    ffmpeg = fake_ffmpeg(
+        'printf "out_time_us=1000000\\nprogress=continue\\n"\n'
+        'while true; do printf "out_time_us=1000000\\nprogress=continue\\n"; sleep 0.05; done\n'
+    )
+    stalled = encode_progress.stalled
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(VideoService()._run_ffmpeg([ffmpeg], "response_8", "transcode"))
+    assert exc.value.detail == "Encode stalled"
+    assert encode_progress.stalled == stalled + 1
+    assert encode_progress.for_job("response_8") == []
+
+def test_run_ffmpeg_without_stall_guard_waits_for_late_output(fake_ffmpeg, monkeypatch):
+    """Runs that only write at the end of the input aren't killed for standing still"""
+    monkeypatch.setattr(settings, "FFMPEG_STALL_TIMEOUT_SECONDS", 0.2)
+    ffmpeg = fake_ffmpeg(
+        'printf "out_time_us=0\\nprogress=continue\\n"\n'
+        'sleep 0.5\n'
+        'printf "out_time_us=0\\nprogress=end\\n"\n'
+    )
+    returncode, _ = asyncio.run(VideoService()._run_ffmpeg([ffmpeg], "response_9", "previews", stall_guard=False))
+    assert returncode == 0
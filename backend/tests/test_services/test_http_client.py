@@ -0,0 +1,18 @@
+import asyncio
+from app.services.http_client import HTTPClientPool
+
+def test_pool_lifecycle_and_stats():
+    """The shared client is reused until shutdown and reports pool usage"""
+    async def run():
+        pool = HTTPClientPool()
+        await pool.startup()
+        client = pool.client
+        assert pool.client is client
+        stats = pool.stats()
+        assert stats["open"] is True
+        assert stats["connections"] == 0
+        assert stats["max_connections"] == pool.limits.max_connections
+        await pool.shutdown()
+        assert pool.stats()["open"] is False
+
+    asyncio.run(run())
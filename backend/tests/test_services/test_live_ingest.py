@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+import pytest
+from app.services.live_ingest import LiveIngestManager, LiveIngestSession
+from app.services.transcode_scheduler import transcode_scheduler
+
+WEBM_HEAD = b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01"
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = LiveIngestManager()
+    manager.video_service.temp_dir = tmp_path
+    return manager
+
+def _fake_encoder(monkeypatch, script):
+    """Stand in for ffmpeg with a shell script using the session's output paths"""
+    def command(self):
+        return ["sh", "-c", script.format(video=self.video_path, audio=self.audio_path)]
+    monkeypatch.setattr(LiveIngestSession, "_command", command)
+
+async def _stream(manager, chunks):
+    session = await manager.open()
+    for chunk in chunks:
+        await session.feed(chunk)
+    result = await session.finish()
+    manager.close(session, result)
+    return result
+
+def test_stream_is_spooled_and_encoded_live(manager, monkeypatch):
+    """Chunks land in the spool and the live encoder's outputs are handed over"""
+    _fake_encoder(monkeypatch, "cat > {video}; echo speech > {audio}")
+    chunks = [WEBM_HEAD, b"a" * 100, b"b" * 100]
+    result = asyncio.run(_stream(manager, chunks))
+
+    content = b"".join(chunks)
+    assert result["path"].read_bytes() == content
+    assert result["path"].suffix == ".webm"
+    assert result["sha256"] == hashlib.sha256(content).hexdigest()
+    assert open(result["live_encode"]["video"], "rb").read() == content
+    assert manager.stats()["encoders"] == 0
+    assert transcode_scheduler.stats()["active"] == 0
+    assert manager.stats()["fallbacks"] == 0
+
+def test_failed_encoder_falls_back_to_spool(manager, monkeypatch, tmp_path):
+    """A broken live encode leaves only the spool for the pipeline"""
+    _fake_encoder(monkeypatch, "cat > /dev/null; exit 1")
+    result = asyncio.run(_stream(manager, [WEBM_HEAD, b"a" * 100]))
+
+    assert result["live_encode"] is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == [result["path"].name]
+    assert manager.stats()["encoders"] == 0
+    assert manager.stats()["fallbacks"] == 1
+
+def test_encoder_limit_spools_only(manager, monkeypatch):
+    """Streams over the live encoder limit are spooled without an encoder"""
+    _fake_encoder(monkeypatch, "exit 1")
+    manager.max_encoders = 0
+    result = asyncio.run(_stream(manager, [WEBM_HEAD]))
+    assert result["live_encode"] is None
+    assert result["path"].exists()
+
+def test_live_encode_needs_a_free_transcoding_slot(manager, monkeypatch):
+    """With the scheduler's slots all busy, the stream is only spooled"""
+    _fake_encoder(monkeypatch, "exit 1")
+    monkeypatch.setattr(transcode_scheduler, "max_concurrent", 0)
+    result = asyncio.run(_stream(manager, [WEBM_HEAD]))
+    assert result["live_encode"] is None
+    assert manager.stats()["encoders"] == 0
+    assert transcode_scheduler.stats()["active"] == 0
@@ -0,0 +1,62 @@
+import asyncio
+import base64
+import hashlib
+import pytest
+from fastapi import HTTPException
+from app.services.local_uploads import LocalUploadStore
+
+def _digest(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+async def _chunks(data: bytes, size: int = 3):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalUploadStore(tmp_path / "uploads", part_size=10)
+
+def test_parts_out_of_order_assemble_in_place(store, tmp_path):
+    """Parts land at their offsets in any order and completion is a rename"""
+    content = bytes(range(25))
+    state = store.create("recordings/answer.webm", len(content), "video/webm")
+    upload_id = state["upload_id"]
+    parts = {1: content[:10], 2: content[10:20], 3: content[20:]}
+
+    async def run():
+        for number in (3, 1):
+            await store.write_part(upload_id, number, _chunks(parts[number]), _digest(parts[number]))
+        assert store.received_offset(store.load(upload_id)) == 10
+
+        with pytest.raises(HTTPException) as exc:
+            await store.complete(upload_id, tmp_path / "final.webm")
+        assert exc.value.status_code == 409
+
+        await store.write_part(upload_id, 2, _chunks(parts[2]), _digest(parts[2]))
+        await store.complete(upload_id, tmp_path / "final.webm")
+
+    asyncio.run(run())
+    assert (tmp_path / "final.webm").read_bytes() == content
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+def test_bad_checksum_is_not_recorded(store):
+    """A corrupted part is rejected and stays missing so the client resends it"""
+    state = store.create("recordings/answer.webm", 10, "video/webm")
+
+    async def run():
+        with pytest.raises(HTTPException) as exc:
+            await store.write_part(state["upload_id"], 1, _chunks(b"a" * 10), _digest(b"b" * 10))
+        assert exc.value.status_code == 460
+
+        with pytest.raises(HTTPException) as exc:
+            await store.write_part(state["upload_id"], 1, _chunks(b"a" * 11), _digest(b"a" * 11))
+        assert exc.value.status_code == 400
+
+    asyncio.run(run())
+    assert store.load(state["upload_id"])["parts"] == {}
+
+def test_unknown_upload_ids_are_rejected(store):
+    """Upload ids never resolve outside the upload directory"""
+    with pytest.raises(HTTPException) as exc:
+        store.load("../../etc/passwd")
+    assert exc.value.status_code == 404
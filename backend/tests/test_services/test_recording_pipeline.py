@@ -0,0 +1,265 @@
+import asyncio
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.services.recording_pipeline import RecordingPipeline
+from app.services.scratch import ScratchSpace
+from app.services.transcode_scheduler import TranscodeQueueTimeout
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.recording_pipeline.settings.HLS_ENABLED", False)
+    monkeypatch.setattr("app.services.recording_pipeline.settings.PREVIEWS_ENABLED", False)
+    space = ScratchSpace()
+    space.root = tmp_path / "scratch"
+    space.fast_root = None
+    monkeypatch.setattr("app.services.recording_pipeline.scratch", space)
+
+    pipeline = RecordingPipeline()
+    pipeline.updates = []
+    async def update(response_id, **values):
+        pipeline.updates.append(values)
+    async def complete(response_id, transcription, **values):
+        pipeline.updates.append({"status": "completed"})
+    async def prepare_video(source_path, workspace=None):
+        output = workspace.path("compressed.mp4")
+        output.write_bytes(b"mp4")
+        return {"path": output, "mode": "transcode", "reason": "test", "audio_path": None, "probe": None}
+    async def get_video_metadata(path):
+        return {"duration": 10.0, "width": 640, "height": 360, "codec": "h264", "bit_rate": 1000, "size": 3}
+    async def upload_file(path, prefix):
+        return {"url": f"https://storage.example/{prefix}{path.name}", "key": f"{prefix}{path.name}"}
+    async def transcribe_video(url):
+        return {"text": "hello", "segments": []}
+    async def transcribe_audio(path):
+        pipeline.transcribed.append(path)
+        return {"text": "hello", "segments": []}
+    pipeline._update = update
+    pipeline._complete = complete
+    pipeline.video_service.prepare_video = prepare_video
+    pipeline.video_service.get_video_metadata = get_video_metadata
+    pipeline.storage_service.upload_file = upload_file
+    pipeline.transcription_service.transcribe_video = transcribe_video
+    pipeline.transcription_service.transcribe_audio = transcribe_audio
+    pipeline.transcribed = []
+    pipeline.space = space
+    return pipeline
+
+def _response(source_path):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        interview_id=uuid.uuid4(),
+        source_path=str(source_path),
+        processing_metadata={"upload": {"size": 3}},
+        video_url=None
+    )
+
+def _process(pipeline, response):
+    async def run():
+        async with pipeline.space.workspace("job") as workspace:
+            await pipeline._process(response, workspace)
+    asyncio.run(run())
+
+def test_source_is_deleted_once_the_video_is_stored(pipeline, tmp_path):
+    """A processed answer no longer needs the uploaded original"""
+    source = tmp_path / "upload.webm"
+    source.write_bytes(b"webm")
+    _process(pipeline, _response(source))
+    assert not source.exists()
+    assert pipeline.updates[-1]["status"] == "completed"
+
+def test_failed_processing_keeps_the_source(pipeline, tmp_path):
+    """A transient failure leaves the upload in place for a retry"""
+    source = tmp_path / "upload.webm"
+    source.write_bytes(b"webm")
+    async def upload_file(path, prefix):
+        raise HTTPException(status_code=500, detail="Failed to upload file to storage")
+    pipeline.storage_service.upload_file = upload_file
+
+    _process(pipeline, _response(source))
+    assert source.exists()
+    assert pipeline.updates[-1]["status"] == "failed"
+    assert "source_path" not in pipeline.updates[-1]
+
+def test_cancelled_processing_keeps_the_source(pipeline, tmp_path):
+    """Shutdown cancels the job but the stale requeue still finds the upload"""
+    source = tmp_path / "upload.webm"
+    source.write_bytes(b"webm")
+    async def upload_file(path, prefix):
+        raise asyncio.CancelledError()
+    pipeline.storage_service.upload_file = upload_file
+
+    with pytest.raises(asyncio.CancelledError):
+        _process(pipeline, _response(source))
+    assert source.exists()
+    assert pipeline.updates == []
+
+def test_queue_timeout_requeues_instead_of_failing(pipeline, tmp_path, monkeypatch):
+    """Waiting too long for an encode slot sends the row back to pending"""
+    monkeypatch.setattr("app.services.recording_pipeline.settings.TRANSCODE_REQUEUE_DELAY_SECONDS", 0)
+    source = tmp_path / "upload.webm"
+    source.write_bytes(b"webm")
+    async def prepare_video(source_path, workspace=None):
+        raise TranscodeQueueTimeout("No transcoding slot within 600s")
+    pipeline.video_service.prepare_video = prepare_video
+    enqueued = []
+    pipeline.enqueue = enqueued.append
+    response = _response(source)
+
+    async def run():
+        async with pipeline.space.workspace("job") as workspace:
+            await pipeline._process(response, workspace)
+        await asyncio.sleep(0.01)
+    asyncio.run(run())
+    assert pipeline.updates == [{"status": "pending"}]
+    assert enqueued == [response.id]
+    assert source.exists()
+    assert pipeline.stats()["failed"] == 0
+
+def test_direct_upload_is_deleted_once_the_video_is_stored(pipeline):
+    """The raw object of a direct-to-S3 upload isn't kept alongside the processed one"""
+    deleted = []
+    async def download_file(key, destination):
+        destination.write_bytes(b"webm")
+        return destination
+    async def delete_file(key):
+        deleted.append(key)
+        return True
+    pipeline.storage_service.download_file = download_file
+    pipeline.storage_service.delete_file = delete_file
+    response = _response(None)
+    response.source_path = None
+    response.processing_metadata = {"upload": {"storage_key": "recordings/i/raw.webm", "size": 4}}
+
+    _process(pipeline, response)
+    assert deleted == ["recordings/i/raw.webm"]
+    stored = next(u for u in pipeline.updates if "processing_metadata" in u)
+    assert "storage_key" not in stored["processing_metadata"]["upload"]
+
+def test_retry_transcribes_a_fresh_copy_of_the_stored_video(pipeline):
+    """After a failed transcription the stored video is fetched by key, not by its expired URL"""
+    downloads = []
+    async def download_file(key, destination):
+        downloads.append(key)
+        destination.write_bytes(b"mp4")
+        return destination
+    async def transcribe_video(url):
+        raise AssertionError("presigned URL used")
+    pipeline.storage_service.download_file = download_file
+    pipeline.transcription_service.transcribe_video = transcribe_video
+    response = _response(None)
+    response.source_path = None
+    response.video_url = "https://storage.example/expired"
+    response.processing_metadata = {
+        "video_key": "recordings/i/20261018_compressed.mp4",
+        "video": {"duration": 10.0, "width": 640, "height": 360, "codec": "h264", "bit_rate": 1000, "size": 3}
+    }
+
+    _process(pipeline, response)
+    assert downloads == ["recordings/i/20261018_compressed.mp4"]
+    assert pipeline.transcribed[0].name == "stored.mp4"
+    assert pipeline.updates[-1]["status"] == "completed"
+
+def test_stored_video_key_is_recorded(pipeline, tmp_path):
+    """The processed video's key is kept so a retry or a delete can find it"""
+    source = tmp_path / "upload.webm"
+    source.write_bytes(b"webm")
+    _process(pipeline, _response(source))
+    stored = next(u for u in pipeline.updates if "processing_metadata" in u)
+    assert stored["processing_metadata"]["video_key"].endswith("compressed.mp4")
+
+def test_sparse_keyframes_force_an_hls_reencode(pipeline, monkeypatch):
+    """A remuxed upload is only stream-copied into HLS when its keyframes fit the segments"""
+    monkeypatch.setattr("app.services.recording_pipeline.settings.HLS_SEGMENT_SECONDS", 2)
+    monkeypatch.setattr("app.services.recording_pipeline.settings.HLS_MAX_BITRATE", 1_500_000)
+    gaps = {"recorder.mp4": 30.0, "camera.mp4": 2.0, "unreadable.mp4": None}
+    async def keyframe_gap(path, duration):
+        return gaps[path.name]
+    pipeline.video_service.keyframe_gap = keyframe_gap
+    video = {"duration": 30.0, "bit_rate": 800_000}
+
+    def needs_reencode(name, metadata=video):
+        return asyncio.run(pipeline._hls_needs_reencode(Path(name), metadata))
+    assert needs_reencode("recorder.mp4")
+    assert not needs_reencode("camera.mp4")
+    assert needs_reencode("unreadable.mp4")
+    assert needs_reencode("camera.mp4", {**video, "bit_rate": 4_000_000})
+
+def _stored_headers(pipeline):
+    headers = {}
+    async def upload_file_to_key(path, key, content_type=None, cache_control=None):
+        headers[key] = cache_control
+        return {"url": f"https://storage.example/{key}", "key": key}
+    pipeline.storage_service.upload_file_to_key = upload_file_to_key
+    return headers
+
+def test_hls_rendition_is_only_privately_cacheable(pipeline, tmp_path):
+    """Segments and playlists of a candidate's answer never land in shared caches"""
+    headers = _stored_headers(pipeline)
+    async def package_hls(video_path, reencode, priority, workspace):
+        hls_dir = workspace.path("hls")
+        hls_dir.mkdir()
+        for name in ("init.mp4", "seg_00000.m4s", "index.m3u8"):
+            (hls_dir / name).write_bytes(b"x")
+        return hls_dir
+    pipeline.video_service.package_hls = package_hls
+    response = _response(None)
+
+    async def run():
+        async with pipeline.space.workspace("job") as workspace:
+            return await pipeline._publish_hls(response, tmp_path / "video.mp4", {}, False, workspace)
+    assert asyncio.run(run())["segments"] == 1
+    assert len(headers) == 3
+    assert all(value.startswith("private, ") for value in headers.values())
+
+def test_previews_are_only_privately_cacheable(pipeline, tmp_path):
+    """Poster, thumbnail and sprite are stored as private like the rest of recordings/"""
+    headers = _stored_headers(pipeline)
+    async def extract_previews(video_path, video_metadata, workspace):
+        directory = workspace.path("previews")
+        directory.mkdir()
+        files = {}
+        for name in ("poster", "thumbnail", "sprite"):
+            files[name] = directory / f"{name}.jpg"
+            files[name].write_bytes(b"jpg")
+        return {**files, "directory": directory, "sprite_info": {"columns": 10}}
+    pipeline.video_service.extract_previews = extract_previews
+    response = _response(None)
+
+    async def run():
+        async with pipeline.space.workspace("job") as workspace:
+            return await pipeline._publish_previews(response, tmp_path / "video.mp4", {}, workspace)
+    assert asyncio.run(run())["sprite_info"] == {"columns": 10}
+    assert len(headers) == 3
+    assert all(value.startswith("private, ") for value in headers.values())
+
+def test_over_length_answer_is_rejected_before_anything_is_stored(pipeline, tmp_path):
+    """A streamed answer whose length is only known after encoding never reaches the bucket"""
+    uploads, deleted = [], []
+    async def get_video_metadata(path):
+        return {"duration": 900.0, "width": 640, "height": 360, "codec": "h264", "bit_rate": 1000, "size": 3}
+    async def upload_file(path, prefix):
+        uploads.append(path)
+        return {"url": "https://storage.example/v.mp4", "key": "recordings/i/v.mp4"}
+    async def download_file(key, destination):
+        destination.write_bytes(b"webm")
+        return destination
+    async def delete_file(key):
+        deleted.append(key)
+        return True
+    pipeline.video_service.get_video_metadata = get_video_metadata
+    pipeline.storage_service.upload_file = upload_file
+    pipeline.storage_service.download_file = download_file
+    pipeline.storage_service.delete_file = delete_file
+    response = _response(None)
+    response.source_path = None
+    response.processing_metadata = {"upload": {"storage_key": "recordings/i/raw.webm", "size": 4}}
+
+    _process(pipeline, response)
+    assert uploads == []
+    assert deleted == ["recordings/i/raw.webm"]
+    failed = pipeline.updates[-1]
+    assert failed["status"] == "failed"
+    assert "storage_key" not in failed["processing_metadata"]["upload"]
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+import pytest
+from fastapi import HTTPException
+from app.services.scratch import ScratchSpace
+
+@pytest.fixture
+def scratch(tmp_path):
+    space = ScratchSpace()
+    space.root = tmp_path / "scratch"
+    space.fast_root = None
+    space.quota = 100
+    return space
+
+def test_workspace_is_removed_and_released(scratch):
+    """A job's files and reservation go away when it ends, even on error"""
+    async def run():
+        with pytest.raises(RuntimeError):
+            async with scratch.workspace("job", reserve_bytes=60) as workspace:
+                workspace.path("out.mp4").write_bytes(b"x")
+                assert scratch.reserved == 60
+                raise RuntimeError("encode failed")
+        assert not workspace.directory.exists()
+        assert scratch.reserved == 0
+
+    asyncio.run(run())
+
+def test_reservations_wait_for_quota(scratch):
+    """A job that doesn't fit waits until a running job releases its space"""
+    async def run():
+        order = []
+
+        async def job(name, nbytes, hold):
+            async with scratch.workspace(name, reserve_bytes=nbytes):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        first = asyncio.create_task(job("first", 70, 0.05))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(job("second", 70, 0))
+        await asyncio.sleep(0.01)
+        assert order == ["first"]
+        await asyncio.gather(first, second)
+        assert order == ["first", "second"]
+        assert scratch.stats()["reservation_waits"] == 1
+
+    asyncio.run(run())
+
+def test_sweep_removes_old_shared_files_and_orphaned_jobs(scratch):
+    """Stale shared files and crashed jobs' directories are swept, fresh ones kept"""
+    shared = scratch.dir("videos")
+    old_file, new_file = shared / "old.webm", shared / "new.webm"
+    old_file.write_bytes(b"x" * 10)
+    new_file.write_bytes(b"x" * 5)
+    orphan = scratch.jobs_root / "response_dead"
+    orphan.mkdir(parents=True)
+    (orphan / "compressed.mp4").write_bytes(b"x" * 20)
+    stale = time.time() - 7200
+    for path in (old_file, orphan):
+        os.utime(path, (stale, stale))
+
+    assert scratch.sweep(max_age=3600) == 30
+    assert not old_file.exists() and not orphan.exists()
+    assert new_file.exists()
+    assert scratch.measure() == 5
+
+    with pytest.raises(HTTPException) as exc:
+        scratch.ensure_room(96)
+    assert exc.value.status_code == 507
+
+def test_sweep_spares_files_still_in_use(scratch):
+    """A pending recording's source survives the sweep however old it is"""
+    shared = scratch.dir("videos")
+    pending, orphan = shared / "upload_pending.webm", shared / "upload_orphan.webm"
+    for path in (pending, orphan):
+        path.write_bytes(b"x" * 10)
+        stale = time.time() - 7200
+        os.utime(path, (stale, stale))
+
+    assert scratch.sweep(max_age=3600, keep={pending.resolve()}) == 10
+    assert pending.exists() and not orphan.exists()
+
+def test_sweeper_skips_a_round_when_files_in_use_are_unknown(scratch, monkeypatch):
+    """If the rows can't be read, nothing shared is deleted"""
+    monkeypatch.setattr("app.services.scratch.settings.SCRATCH_SWEEP_INTERVAL_SECONDS", 3600)
+    source = scratch.dir("videos") / "upload_pending.webm"
+    source.write_bytes(b"x")
+    stale = time.time() - 7200
+    os.utime(source, (stale, stale))
+    scratch.max_age = 3600
+
+    async def files_in_use():
+        raise ConnectionError("database is down")
+    scratch.keep_in_use(files_in_use)
+
+    async def run():
+        await scratch.start()
+        await asyncio.sleep(0.05)
+        await scratch.stop()
+    asyncio.run(run())
+    assert source.exists()
@@ -0,0 +1,60 @@
+import asyncio
+from urllib.parse import urlparse, parse_qs
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services.storage import StorageService
+
+@pytest.fixture
+def minio_storage(monkeypatch):
+    """Storage pointed at an S3-compatible endpoint; presigning never hits the network"""
+    monkeypatch.setattr(settings, "AWS_ACCESS_KEY_ID", "minioadmin")
+    monkeypatch.setattr(settings, "AWS_SECRET_ACCESS_KEY", "minioadmin")
+    monkeypatch.setattr(settings, "AWS_BUCKET_NAME", "interviews")
+    monkeypatch.setattr(settings, "AWS_S3_ENDPOINT_URL", "http://minio:9000")
+    monkeypatch.setattr(settings, "AWS_S3_PUBLIC_ENDPOINT_URL", "http://localhost:9000")
+    return StorageService()
+
+def test_part_urls_are_presigned_for_the_public_endpoint(minio_storage):
+    """Each part gets its own signed URL on the host browsers can reach"""
+    urls = asyncio.run(minio_storage.generate_presigned_upload_urls(
+        "recordings/answer.webm", "upload-1", [1, 2, 3]
+    ))
+    assert list(urls) == [1, 2, 3]
+    for part_number, url in urls.items():
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        assert parsed.netloc == "localhost:9000"
+        assert parsed.path == "/interviews/recordings/answer.webm"
+        assert query["partNumber"] == [str(part_number)]
+        assert query["uploadId"] == ["upload-1"]
+        assert "X-Amz-Signature" in query
+    assert minio_storage.s3_client.meta.endpoint_url == "http://minio:9000"
+
+def test_part_numbers_are_validated(minio_storage):
+    """S3 only accepts part numbers 1-10000"""
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(minio_storage.generate_presigned_upload_urls("k", "upload-1", [0, 1]))
+    assert exc.value.status_code == 400
+
+def test_multipart_uploads_share_the_recording_size_limit(minio_storage):
+    """A multipart upload can't be larger than a single upload may be"""
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(minio_storage.create_multipart_upload(
+            "answer.webm", "video/webm", file_size=settings.RECORDING_MAX_UPLOAD_BYTES + 1
+        ))
+    assert exc.value.status_code == 413
+
+def test_delete_prefix_removes_only_that_prefix_locally(tmp_path, monkeypatch):
+    """A response's HLS and preview objects go; its neighbours stay"""
+    storage = StorageService()
+    monkeypatch.setattr(storage, "_ensure_client", lambda: False)
+    storage.temp_dir = tmp_path
+    for key in ("recordings/i/r1/hls/index.m3u8", "recordings/i/r1/previews/poster.jpg", "recordings/i/r2/hls/index.m3u8"):
+        (tmp_path / key).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / key).write_bytes(b"x")
+
+    assert asyncio.run(storage.delete_prefix("recordings/i/r1/")) == 2
+    assert not (tmp_path / "recordings/i/r1").exists()
+    assert (tmp_path / "recordings/i/r2/hls/index.m3u8").exists()
+    assert asyncio.run(storage.delete_prefix("recordings/i/missing/")) == 0
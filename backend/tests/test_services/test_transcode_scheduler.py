@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from app.services.transcode_scheduler import TranscodeScheduler, TranscodeQueueTimeout, PRIORITY_HIGH, PRIORITY_LOW
+
+def test_slots_are_bounded_and_granted_by_priority():
+    """Only max_concurrent encodes run; waiting high-priority jobs go first"""
+    async def run():
+        scheduler = TranscodeScheduler()
+        scheduler.max_concurrent = 1
+        order = []
+        release = asyncio.Event()
+
+        async def encode(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+
+        first = asyncio.create_task(encode("first", PRIORITY_LOW))
+        await asyncio.sleep(0)
+        low = asyncio.create_task(encode("low", PRIORITY_LOW))
+        high = asyncio.create_task(encode("high", PRIORITY_HIGH))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["active"] == 1
+        assert scheduler.stats()["queue_depth"] == 2
+        release.set()
+        await asyncio.gather(first, low, high)
+        assert order == ["first", "high", "low"]
+        assert scheduler.stats()["active"] == 0
+        assert scheduler.stats()["completed"] == 3
+
+    asyncio.run(run())
+
+def test_wait_beyond_limit_is_rejected():
+    """Jobs that cannot get a slot within max_wait give up with a timeout"""
+    async def run():
+        scheduler = TranscodeScheduler()
+        scheduler.max_concurrent = 1
+        scheduler.max_wait = 0.01
+        async with scheduler.slot():
+            with pytest.raises(TranscodeQueueTimeout):
+                async with scheduler.slot():
+                    pass
+        assert scheduler.stats()["active"] == 0
+        assert scheduler.stats()["timed_out"] == 1
+
+    asyncio.run(run())
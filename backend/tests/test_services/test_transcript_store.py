@@ -0,0 +1,39 @@
+import uuid
+from types import SimpleNamespace
+from app.services.transcript_store import pack_segments, unpack_segment
+
+def test_pack_segments_assigns_words_and_uses_milliseconds():
+    """Segments are stored in ms with the words that start inside them"""
+    response_id = uuid.uuid4()
+    rows = pack_segments(response_id, {
+        "segments": [
+            {"start": 0.0, "end": 2.5, "text": " I led the migration."},
+            {"start": 2.5, "end": 4.01, "text": " To Postgres. "}
+        ],
+        "words": [
+            {"start": 0.0, "end": 0.2, "word": " I"},
+            {"start": 0.2, "end": 0.6, "word": " led"},
+            {"start": 2.6, "end": 2.8, "word": " To"},
+            {"start": 2.8, "end": 3.9, "word": " Postgres."}
+        ]
+    })
+    assert [r["seq"] for r in rows] == [0, 1]
+    assert rows[1]["start_ms"] == 2500 and rows[1]["end_ms"] == 4010
+    assert rows[1]["text"] == "To Postgres."
+    assert rows[0]["words"] == [[0, 200, "I"], [200, 600, "led"]]
+    assert rows[1]["words"] == [[2600, 2800, "To"], [2800, 3900, "Postgres."]]
+
+def test_pack_segments_without_words():
+    """Engines that don't report word timings store segments only"""
+    rows = pack_segments(uuid.uuid4(), {"segments": [{"start": 1, "end": 2, "text": "Hi"}]})
+    assert rows[0]["words"] is None
+    assert pack_segments(uuid.uuid4(), {"text": "", "segments": []}) == []
+
+def test_unpack_segment_returns_seconds():
+    """Stored rows come back in the transcription's own shape"""
+    row = SimpleNamespace(start_ms=2500, end_ms=4010, text="To Postgres.", words=[[2600, 2800, "To"]])
+    assert unpack_segment(row) == {
+        "start": 2.5, "end": 4.01, "text": "To Postgres.",
+        "words": [{"start": 2.6, "end": 2.8, "word": "To"}]
+    }
+    assert unpack_segment(row, with_words=False)["words"] is None
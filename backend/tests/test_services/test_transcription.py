@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services.transcription import (
+    TranscriptionService, parse_silences, plan_chunks, stitch_transcripts
+)
+
+@pytest.fixture
+def service(tmp_path):
+    service = TranscriptionService()
+    service.temp_dir = tmp_path
+    service.retry_delay = 0
+    return service
+
+def test_parse_silences():
+    """silencedetect lines become pauses; an unterminated one runs to the end"""
+    log = (
+        b"[silencedetect @ 0x1] silence_start: 12.5\n"
+        b"[silencedetect @ 0x1] silence_end: 13.5 | silence_duration: 1\n"
+        b"size=N/A time=00:01:00.00\n"
+        b"[silencedetect @ 0x1] silence_start: 58\n"
+    )
+    assert parse_silences(log, 60.0) == [(12.5, 13.5), (58.0, 60.0)]
+
+def test_plan_chunks_cuts_at_latest_pause():
+    """Cuts fall in pauses near the limit, or hard at the limit without one"""
+    silences = [(20.0, 21.0), (50.0, 51.0), (55.0, 56.0), (100.0, 101.0)]
+    assert plan_chunks(150.0, silences, 60.0) == [55.5, 100.5]
+    assert plan_chunks(130.0, [], 60.0) == [60.0, 120.0]
+    assert plan_chunks(45.0, silences, 60.0) == []
+
+def test_stitch_shifts_timestamps():
+    """Chunk segments are moved onto the recording's timeline"""
+    results = [
+        {"text": " Hello there.", "language": "en", "segments": [{"start": 0.0, "end": 2.0, "text": "Hello there."}]},
+        {"text": "General Kenobi. ", "language": "en", "segments": [{"start": 1.0, "end": 3.0, "text": "General Kenobi."}]}
+    ]
+    stitched = stitch_transcripts(results, [0.0, 55.5])
+    assert stitched["text"] == "Hello there. General Kenobi."
+    assert stitched["segments"][1] == {"start": 56.5, "end": 58.5, "text": "General Kenobi."}
+
+def test_chunks_run_in_parallel_and_retry_alone(service, tmp_path, monkeypatch):
+    """Chunks share the parallelism cap and a failing chunk is retried on its own"""
+    monkeypatch.setattr("app.services.transcription.settings.TRANSCRIPTION_MAX_PARALLEL", 2)
+    chunks = [(tmp_path / f"chunk_{i}.ogg", i * 60.0) for i in range(4)]
+    attempts = {}
+    running = []
+    peak = []
+
+    async def split(media_path, chunk_dir):
+        return chunks
+    async def transcribe_file(path, language):
+        attempts[path.name] = attempts.get(path.name, 0) + 1
+        running.append(path)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(path)
+        if path.name == "chunk_2.ogg" and attempts[path.name] == 1:
+            raise HTTPException(status_code=503, detail="busy")
+        return {"text": path.stem, "language": "en", "segments": [{"start": 1.0, "end": 2.0, "text": path.stem}]}
+    service._split_at_silences = split
+    service._transcribe_file = transcribe_file
+
+    result = asyncio.run(service._transcribe_chunked(tmp_path / "speech.ogg", None))
+    assert result["text"] == "chunk_0 chunk_1 chunk_2 chunk_3"
+    assert [s["start"] for s in result["segments"]] == [1.0, 61.0, 121.0, 181.0]
+    assert attempts == {"chunk_0.ogg": 1, "chunk_1.ogg": 1, "chunk_2.ogg": 2, "chunk_3.ogg": 1}
+    assert max(peak) == 2
+    assert service.chunk_retries == 1
+
+def test_chunk_failing_every_attempt_fails_transcript(service, tmp_path):
+    """Retries are bounded and the error reaches the caller"""
+    async def split(media_path, chunk_dir):
+        return [(media_path, 0.0)]
+    async def transcribe_file(path, language):
+        raise HTTPException(status_code=500, detail="Failed to transcribe video")
+    service._split_at_silences = split
+    service._transcribe_file = transcribe_file
+
+    with pytest.raises(HTTPException):
+        asyncio.run(service._transcribe_chunked(tmp_path / "speech.ogg", None))
+    assert service.chunk_retries == service.retries
+    assert list(tmp_path.iterdir()) == []
+
+def test_cached_audio_skips_the_backend(service, tmp_path, monkeypatch):
+    """Audio with a stored transcript is never sent to the backend again"""
+    from app.services.transcription import transcription_cache
+    store = {}
+    keys = []
+    async def fingerprint(path, identity):
+        keys.append(identity)
+        return "pcm-hash"
+    async def get(key):
+        return store.get(key)
+    async def put(key, transcription):
+        store[key] = transcription
+    monkeypatch.setattr(transcription_cache, "fingerprint", fingerprint)
+    monkeypatch.setattr(transcription_cache, "get", get)
+    monkeypatch.setattr(transcription_cache, "put", put)
+
+    calls = []
+    async def chunked(path, language):
+        calls.append(path)
+        return {"text": "hello", "language": "en", "segments": [], "words": []}
+    service._transcribe_chunked = chunked
+
+    first = asyncio.run(service._transcribe_media(tmp_path / "take1.ogg", "en"))
+    second = asyncio.run(service._transcribe_media(tmp_path / "retry.ogg", "en"))
+    assert first == second
+    assert len(calls) == 1
+    assert keys[0].endswith(":en")
+
+def test_split_runs_ffmpeg_under_the_stall_guard(service, tmp_path):
+    """Both split passes go through _run_ffmpeg, with the whole silencedetect log"""
+    runs = []
+    async def run_ffmpeg(cmd, job=None, stage="ffmpeg", log_lines=50):
+        runs.append((stage, log_lines))
+        if stage == "silencedetect":
+            return 0, (
+                b"  Duration: 00:02:00.00, start: 0.000000, bitrate: 24 kb/s\n"
+                b"[silencedetect @ 0x1] silence_start: 55\n"
+                b"[silencedetect @ 0x1] silence_end: 56 | silence_duration: 1\n"
+            )
+        for i in range(3):
+            (tmp_path / f"chunk_{i:03d}.ogg").write_bytes(b"ogg")
+        return 0, b""
+    service.video_service._run_ffmpeg = run_ffmpeg
+
+    chunks = asyncio.run(service._split_at_silences(tmp_path / "speech.ogg", tmp_path))
+    assert runs == [("silencedetect", None), ("split", 50)]
+    assert [offset for _, offset in chunks] == [0.0, 55.5, 115.5]
+
+def test_unavailable_backend_skips_legacy_video_transcription(monkeypatch):
+    """Without a usable backend the legacy service returns an empty transcript, not a 500"""
+    from app.services import transcription_service
+    service = transcription_service.TranscriptionService()
+    monkeypatch.setattr(service.backend, "available", lambda: False)
+    async def download_video(url):
+        raise AssertionError("downloaded without a backend")
+    service.download_video = download_video
+
+    result = asyncio.run(service.transcribe_video("https://storage.example/answer.mp4"))
+    assert result["text"] == ""
+    assert result["segments"] == []
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import pytest
+from fastapi import HTTPException
+from app.services import transcription_backends
+from app.services.transcription_backends import (
+    LocalWhisperBackend, OpenAIWhisperBackend, TranscriptionBackend, get_backend
+)
+
+def test_backend_selected_by_provider():
+    """Providers map to one shared backend each; unknown names fail loudly"""
+    assert isinstance(get_backend("whisper"), OpenAIWhisperBackend)
+    assert isinstance(get_backend("local"), LocalWhisperBackend)
+    assert get_backend("local") is get_backend("LOCAL")
+    with pytest.raises(ValueError):
+        get_backend("carrier-pigeon")
+    with pytest.raises(TypeError):
+        TranscriptionBackend()
+
+@pytest.fixture
+def local_backend(monkeypatch):
+    batches = []
+
+    def transcribe_batch(jobs):
+        # Stands in for the model running in a worker process
+        batches.append(len(jobs))
+        time.sleep(0.05)
+        if any(path.endswith("oom.ogg") for path, _ in jobs):
+            raise BrokenProcessPool("A child process terminated abruptly")
+        return [
+            {"error": "corrupt"} if path.endswith("bad.ogg") else
+            {"text": Path(path).stem, "language": "en", "segments": [], "words": []}
+            for path, _ in jobs
+        ]
+
+    monkeypatch.setattr(transcription_backends, "_transcribe_batch", transcribe_batch)
+    backend = LocalWhisperBackend()
+    backend.workers = 1
+    backend.batch_size = 4
+    backend._new_pool = lambda: ThreadPoolExecutor(max_workers=backend.workers)
+    backend.batches_seen = batches
+    return backend
+
+def test_local_backend_batches_queued_clips(local_backend):
+    """Clips queued while the worker is busy go to it together"""
+    async def run():
+        try:
+            return await asyncio.gather(*(
+                local_backend.transcribe(Path(f"clip_{i}.ogg"), "en") for i in range(6)
+            ))
+        finally:
+            await local_backend.close()
+
+    results = asyncio.run(run())
+    assert [r["text"] for r in results] == [f"clip_{i}" for i in range(6)]
+    assert max(local_backend.batches_seen) == 4
+    assert sum(local_backend.batches_seen) == 6
+    assert local_backend.stats()["batches"] == len(local_backend.batches_seen)
+
+def test_local_backend_fails_only_the_bad_clip(local_backend):
+    """A clip the model can't decode doesn't take its batch down with it"""
+    async def run():
+        try:
+            return await asyncio.gather(
+                local_backend.transcribe(Path("good.ogg"), None),
+                local_backend.transcribe(Path("bad.ogg"), None),
+                return_exceptions=True
+            )
+        finally:
+            await local_backend.close()
+
+    good, bad = asyncio.run(run())
+    assert good["text"] == "good"
+    assert isinstance(bad, HTTPException)
+    assert local_backend.failures == 1
+
+def test_local_backend_runs_clips_in_parallel_while_workers_are_idle(local_backend):
+    """Each idle worker takes a clip of its own rather than one worker taking both"""
+    local_backend.workers = 2
+
+    async def run():
+        try:
+            return await asyncio.gather(*(
+                local_backend.transcribe(Path(f"clip_{i}.ogg"), None) for i in range(2)
+            ))
+        finally:
+            await local_backend.close()
+
+    asyncio.run(run())
+    assert local_backend.batches_seen == [1, 1]
+
+def test_local_backend_replaces_a_broken_pool(local_backend):
+    """A worker dying fails its batch; the next clip gets a fresh pool"""
+    async def run():
+        try:
+            with pytest.raises(HTTPException):
+                await local_backend.transcribe(Path("oom.ogg"), None)
+            assert local_backend._pool is None
+            return await local_backend.transcribe(Path("after.ogg"), None)
+        finally:
+            await local_backend.close()
+
+    assert asyncio.run(run())["text"] == "after"
+    assert local_backend.failures == 1
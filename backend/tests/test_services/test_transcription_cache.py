@@ -0,0 +1,78 @@
+import asyncio
+from pathlib import Path
+from app.services.transcription_cache import TranscriptionCache
+
+class FakeProcess:
+    """ffmpeg that never finishes decoding"""
+
+    def __init__(self):
+        self.returncode = None
+        self.killed = False
+        self.stdout = self
+
+    async def read(self, size):
+        await asyncio.sleep(3600)
+
+    def kill(self):
+        self.killed = True
+        self.returncode = -9
+
+    async def wait(self):
+        return self.returncode
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        pass
+
+    async def commit(self):
+        pass
+
+def test_cancelled_fingerprint_kills_ffmpeg(monkeypatch):
+    """A job cancelled mid-fingerprint doesn't leave its decoder running"""
+    process = FakeProcess()
+    async def create_subprocess_exec(*args, **kwargs):
+        return process
+    monkeypatch.setattr("app.services.transcription_cache.asyncio.create_subprocess_exec", create_subprocess_exec)
+    cache = TranscriptionCache()
+    cache.enabled = True
+
+    async def run():
+        task = asyncio.create_task(cache.fingerprint(Path("speech.ogg"), "local:small:int8:en"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert process.killed
+
+def test_put_only_trims_when_over_the_bound(monkeypatch):
+    """The eviction query runs once the running total passes max_bytes, not on every store"""
+    monkeypatch.setattr("app.services.transcription_cache.async_session", FakeSession)
+    cache = TranscriptionCache()
+    cache.max_bytes = 150
+    transcription = {"text": "a" * 40}  # 52 bytes as JSON
+    reads = []
+    evictions = []
+    async def stored_bytes(db):
+        reads.append(True)
+        return 52
+    async def evict(db):
+        evictions.append(True)
+    cache._stored_bytes = stored_bytes
+    cache._evict = evict
+
+    async def run():
+        for i in range(3):
+            await cache.put(f"key-{i}", transcription)
+
+    asyncio.run(run())
+    # Read once to start the running total, once more after the trim
+    assert len(reads) == 2
+    assert len(evictions) == 1
+    assert cache.stats()["stored_bytes"] == 52
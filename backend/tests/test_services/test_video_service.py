@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.services.video_service import (
+    VideoService, sniff_video_format, transcode_reason, summarize_probe, longest_keyframe_gap
+)
+
+MP4_HEAD = b"\x00\x00\x00\x20ftypisom\x00\x00\x02\x00"
+WEBM_HEAD = b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01"
+
+@pytest.fixture
+def video_service(tmp_path):
+    service = VideoService()
+    service.temp_dir = tmp_path
+    service.chunk_size = 16
+    return service
+
+def test_sniff_video_format():
+    """Containers are recognized from their magic bytes"""
+    assert sniff_video_format(MP4_HEAD) == "mp4"
+    assert sniff_video_format(b"\x00\x00\x00\x14ftypqt  ") == "mov"
+    assert sniff_video_format(WEBM_HEAD) == "webm"
+    assert sniff_video_format(b"<html>not a video</html>") is None
+
+def test_ingest_streams_hashes_and_sniffs(video_service):
+    """Uploads are written in chunks with their hash and format"""
+    content = MP4_HEAD + b"x" * 100
+    upload = UploadFile(io.BytesIO(content), filename="answer.mp4")
+    ingested = asyncio.run(video_service.ingest_upload(upload))
+    assert ingested["path"].read_bytes() == content
+    assert ingested["size"] == len(content)
+    assert ingested["sha256"] == hashlib.sha256(content).hexdigest()
+    assert ingested["format"] == "mp4"
+
+def test_ingest_aborts_over_limit(video_service, tmp_path):
+    """Oversized uploads are rejected and leave nothing on disk"""
+    video_service.max_file_size = 50
+    upload = UploadFile(io.BytesIO(WEBM_HEAD + b"x" * 100), filename="answer.webm")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(video_service.ingest_upload(upload))
+    assert exc.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+def _probe(**video):
+    stream = {"codec_type": "video", "codec_name": "h264", "pix_fmt": "yuv420p",
+              "width": 1280, "height": 720, "bit_rate": "2500000"}
+    stream.update(video)
+    return {
+        "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "95.5", "bit_rate": "2700000"},
+        "streams": [stream, {"codec_type": "audio", "codec_name": "aac", "channels": 2}]
+    }
+
+def test_transcode_reason():
+    """Compliant H.264/AAC MP4 is remuxed, anything else is re-encoded"""
+    assert transcode_reason(_probe()) is None
+    assert transcode_reason(_probe(width=720, height=1280)) is None
+    assert transcode_reason(_probe(bit_rate=None)) is None  # falls back to the container bitrate
+    assert transcode_reason(_probe(codec_name="vp8")) == "video codec vp8"
+    assert transcode_reason(_probe(width=640, height=480)) == "resolution 640x480"
+    assert transcode_reason(_probe(bit_rate="20000000")) == "bitrate 20000000"
+    webm = _probe()
+    webm["format"]["format_name"] = "matroska,webm"
+    assert transcode_reason(webm).startswith("container")
+
+def test_summarize_probe():
+    """Probe results are reduced to the properties stored on the response"""
+    assert summarize_probe(_probe()) == {
+        "duration": 95.5, "width": 1280, "height": 720, "codec": "h264",
+        "audio_codec": "aac", "audio_channels": 2, "bit_rate": 2700000
+    }
+    streamed = _probe()
+    streamed["format"] = {"format_name": "matroska,webm"}
+    assert summarize_probe(streamed)["duration"] is None
+    assert summarize_probe(streamed)["bit_rate"] == 2500000
+
+def test_longest_keyframe_gap():
+    """Gaps are measured between keyframes and from the last one to the end"""
+    packets = b"0.000000,K__\n0.033000,___\n2.000000,K__\n4.000000,K_\n"
+    assert longest_keyframe_gap(packets, 5.0) == 2.0
+    # MediaRecorder-style: one keyframe, then only deltas
+    assert longest_keyframe_gap(b"0.000000,K__\n0.033000,___\n", 42.0) == 42.0
+    assert longest_keyframe_gap(b"0.033000,___\n", 42.0) is None
+
+def test_prepare_video_rejects_long_answers_before_encoding(video_service, tmp_path):
+    """Answers over the length limit never reach ffmpeg"""
+    async def probe(path):
+        return {**_probe(), "format": {"format_name": "mp4", "duration": "301.2"}}
+    async def encode(*args):
+        raise AssertionError("should not encode")
+    video_service.probe_video = probe
+    video_service.remux_video = encode
+    video_service.compress_video = encode
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(video_service.prepare_video(tmp_path / "in.mp4"))
+    assert exc.value.status_code == 400
+
+def test_prepare_video_falls_back_to_transcode(video_service, tmp_path):
+    """A failed remux still produces a transcoded file and speech track"""
+    calls = []
+    async def probe(path):
+        return _probe()
+    async def remux(path, audio_output, workspace):
+        raise HTTPException(status_code=500, detail="boom")
+    async def compress(path, priority, audio_output, workspace):
+        calls.append(audio_output)
+        return tmp_path / "compressed.mp4"
+    video_service.probe_video = probe
+    video_service.remux_video = remux
+    video_service.compress_video = compress
+    prepared = asyncio.run(video_service.prepare_video(tmp_path / "in.mp4"))
+    assert prepared["path"] == tmp_path / "compressed.mp4"
+    assert prepared["mode"] == "transcode"
+    assert prepared["reason"] == "remux failed"
+    assert prepared["audio_path"] == calls[0]
+    assert calls[0].suffix == ".ogg"
+    assert prepared["probe"]["duration"] == 95.5
+
+def test_prepare_video_without_audio_skips_speech_track(video_service, tmp_path):
+    """Silent recordings get no speech output, which ffmpeg would reject"""
+    async def probe(path):
+        silent = _probe()
+        silent["streams"] = silent["streams"][:1]
+        return silent
+    async def remux(path, audio_output, workspace):
+        assert audio_output is None
+        return tmp_path / "remuxed.mp4"
+    video_service.probe_video = probe
+    video_service.remux_video = remux
+    prepared = asyncio.run(video_service.prepare_video(tmp_path / "in.mp4"))
+    assert prepared["mode"] == "remux"
+    assert prepared["audio_path"] is None
+
+def test_extract_previews_lays_out_sprite(video_service):
+    """One ffmpeg run writes all three images; the sprite layout is reported"""
+    commands = []
+    async def run_ffmpeg(cmd, job=None, stage=None, stall_guard=True):
+        commands.append(cmd)
+        # Output only appears at the end of the input, so progress can't show a stall
+        assert stall_guard is False
+        for arg in cmd:
+            if arg.endswith(".jpg"):
+                open(arg, "wb").close()
+        return 0, b""
+    video_service._run_ffmpeg = run_ffmpeg
+
+    previews = asyncio.run(video_service.extract_previews(
+        video_service.temp_dir / "answer.mp4",
+        {"duration": 300.0, "width": 1280, "height": 720}
+    ))
+    assert len(commands) == 1
+    assert previews["sprite_info"] == {
+        "columns": 10, "rows": 10, "count": 100, "interval": 3.0,
+        "tile_width": 160, "tile_height": 90
+    }
+    assert all(previews[name].exists() for name in ("poster", "thumbnail", "sprite"))
+    # Keyframes only for the stills; the sprite reads a fully decoded input
+    cmd = commands[0]
+    source = str(video_service.temp_dir / "answer.mp4")
+    assert cmd[1:7] == ['-skip_frame', 'nokey', '-i', source, '-i', source]
+    assert "[1:v]fps=" in cmd[cmd.index('-filter_complex') + 1]